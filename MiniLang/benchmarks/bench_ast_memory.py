@@ -0,0 +1,56 @@
+"""
+Memory held by a ~1M-node AST: slotted node objects vs the AstArena.
+
+    python -m benchmarks.bench_ast_memory [statements]
+"""
+import sys
+import time
+import tracemalloc
+
+from minilang.lexer.regex_lexer import RegexLexer
+from minilang.parser.parser import Parser
+from minilang.parser.arena import AstArena
+from minilang.compiler.compiler import Compiler
+
+
+def generate_source(statements):
+    # 6 nodes per statement: Let, BinaryOp(+), Identifier, BinaryOp(*), 2x Number
+    lines = ["let x0 = 1;"]
+    for i in range(1, statements):
+        lines.append(f"let x{i} = x{i - 1} + {i} * 2;")
+    return "\n".join(lines)
+
+
+def measure(label, tokens, nodes=None):
+    tracemalloc.start()
+    start = time.perf_counter()
+    ast = Parser(iter(tokens), nodes=nodes).parse()
+    parse_time = time.perf_counter() - start
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    Compiler().compile(ast)
+    compile_time = time.perf_counter() - start
+
+    print(
+        f"  {label:<8} held {held / 2**20:7.1f} MB  peak {peak / 2**20:7.1f} MB"
+        f"  parse {parse_time:5.2f}s  compile {compile_time:5.2f}s"
+    )
+    return ast
+
+
+def main():
+    statements = int(sys.argv[1]) if len(sys.argv) > 1 else 170_000
+    tokens = list(RegexLexer(generate_source(statements)).tokens())
+
+    print(f"{statements} statements")
+    tree = measure("objects", tokens)
+    del tree
+    arena = AstArena()
+    measure("arena", tokens, nodes=arena)
+    print(f"  arena: {len(arena)} nodes, {arena.nbytes() / len(arena):.1f} bytes/node in arrays")
+
+
+if __name__ == "__main__":
+    main()
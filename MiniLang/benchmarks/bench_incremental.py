@@ -0,0 +1,55 @@
+"""
+Edit-to-code latency: a full `compile_source` build versus an
+`IncrementalCompiler` rebuild after editing one function, near the start
+and near the end of a generated file of N functions.
+
+    python -m benchmarks.bench_incremental [functions]
+"""
+import sys
+import time
+
+from minilang.build import compile_source
+from minilang.compiler.incremental import IncrementalCompiler
+
+from .workloads import generated
+
+
+def timed(build):
+    start = time.perf_counter()
+    build()
+    return (time.perf_counter() - start) * 1000
+
+
+def edit(source, n):
+    # One more statement in helper_n: the function grows, later code moves
+    old = f"if (total_{n} == 42)"
+    return source.replace(old, f"total_{n} = total_{n} + 1; {old}", 1)
+
+
+def main():
+    functions = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    source = generated(functions)
+    print(f"{functions} functions, {len(source) // 1024} KiB")
+
+    full = timed(lambda: compile_source(source, peephole=False, inline=0))
+    print(f"{'full build':<26}{full:>10.1f} ms")
+
+    session = IncrementalCompiler()
+    first = timed(lambda: session.compile(source))
+    print(f"{'incremental, cold':<26}{first:>10.1f} ms")
+    same = timed(lambda: session.compile(source))
+    print(f"{'incremental, no change':<26}{same:>10.1f} ms")
+
+    for label, n in (("edit last function", functions - 1), ("edit first function", 0)):
+        changed = edit(source, n)
+        ms = timed(lambda: session.compile(changed))
+        stats = session.stats
+        print(
+            f"{label:<26}{ms:>10.1f} ms  {full / ms:5.1f}x  "
+            f"(compiled {stats['compiled']}, relinked {stats['relinked']} of {stats['chunks']})"
+        )
+        session.compile(source)
+
+
+if __name__ == "__main__":
+    main()
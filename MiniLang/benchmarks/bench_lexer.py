@@ -0,0 +1,73 @@
+"""
+Scanner throughput in MB/s on generated MiniLang source.
+
+    python -m benchmarks.bench_lexer [size_mb]
+"""
+import sys
+import time
+
+from minilang.lexer.lexer import Lexer
+from minilang.lexer.regex_lexer import RegexLexer
+from minilang.lexer.token import TokenType
+
+
+CHUNK = """
+fn helper_{n}(alpha, beta) {{
+    let total_{n} = alpha * {n} + beta / 7;
+    while (total_{n} > 1000) {{
+        total_{n} = total_{n} - 1234567;
+    }}
+    if (total_{n} == 42) {{ return 0; }}
+    return total_{n};
+}}
+print(helper_{n}({n}, 99999));
+"""
+
+
+def generate_source(size_mb):
+    parts = []
+    size = 0
+    n = 0
+    target = int(size_mb * 1024 * 1024)
+    while size < target:
+        chunk = CHUNK.format(n=n)
+        parts.append(chunk)
+        size += len(chunk)
+        n += 1
+    return "".join(parts)
+
+
+def drain(lexer):
+    count = 0
+    while lexer.next_token().type != TokenType.EOF:
+        count += 1
+    return count
+
+
+def drain_generator(lexer):
+    return sum(1 for _ in lexer.tokens()) - 1
+
+
+def main():
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 4
+    source = generate_source(size_mb)
+    mb = len(source) / (1024 * 1024)
+    print(f"source: {mb:.2f} MB")
+
+    baseline = None
+    scanners = (
+        ("char", lambda: drain(Lexer(source))),
+        ("regex", lambda: drain(RegexLexer(source))),
+        ("regex-gen", lambda: drain_generator(RegexLexer(source))),
+    )
+    for label, scan in scanners:
+        start = time.perf_counter()
+        count = scan()
+        elapsed = time.perf_counter() - start
+        rate = mb / elapsed
+        baseline = baseline or rate
+        print(f"  {label:<10} {rate:7.2f} MB/s  {count / elapsed / 1e6:6.2f} M tokens/s  ({rate / baseline:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
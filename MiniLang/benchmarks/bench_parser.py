@@ -0,0 +1,69 @@
+"""
+Parser throughput in tokens/s on expression-heavy generated MiniLang.
+Tokens are scanned up front, so only parsing is timed.
+
+    python -m benchmarks.bench_parser [size_mb]
+"""
+import sys
+import time
+from types import SimpleNamespace
+
+from minilang.lexer.regex_lexer import RegexLexer
+from minilang.parser.arena import AstArena
+from minilang.parser.parser import Parser
+
+
+REPEAT = 5
+
+CHUNK = """
+fn mix_{n}(a, b, c) {{
+    let p = a * b + c / 3 - (a + {n}) * (b - c) / 2;
+    let q = (p + a * a - b * b) / (c * 4 + 1) + mix_{n}(a + b, c * 2 - p, p);
+    while (p * 2 + q < a * b * c - {n}) {{
+        p = p + (q - a) * (b + c) / 5 - 1;
+    }}
+    if (p - q * 3 == a + b * (c - {n})) {{ return p * q - a / (b + 1); }}
+    return ((p + q) * (a - b) + c) / (p - q + {n} * 7);
+}}
+print(mix_{n}({n} * 3 + 1, {n} - 2 * 5, ({n} + 4) / 2));
+"""
+
+
+def generate_source(size_mb):
+    parts = []
+    size = 0
+    n = 0
+    target = int(size_mb * 1024 * 1024)
+    while size < target:
+        chunk = CHUNK.format(n=n)
+        parts.append(chunk)
+        size += len(chunk)
+        n += 1
+    return "".join(parts)
+
+
+def replay(tokens):
+    # A lexer that hands back already-scanned tokens
+    return SimpleNamespace(next_token=iter(tokens).__next__)
+
+
+def main():
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 1
+    tokens = list(RegexLexer(generate_source(size_mb)).tokens())
+    print(f"tokens: {len(tokens)}")
+
+    builds = (
+        ("tree", lambda: Parser(replay(tokens)).parse()),
+        ("arena", lambda: Parser(replay(tokens), nodes=AstArena()).parse()),
+    )
+    for label, parse in builds:
+        best = float("inf")
+        for _ in range(REPEAT):
+            start = time.perf_counter()
+            parse()
+            best = min(best, time.perf_counter() - start)
+        print(f"  {label:<6} {len(tokens) / best / 1e6:6.3f} M tokens/s  ({best * 1e3:7.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Stack bytecode versus register code on the harness workloads: code size
+and run time of the stack `VirtualMachine`, the `PackedVM` and the
+`RegisterVM`, all fed from the same optimized AST.
+
+    python -m benchmarks.bench_register [repeat]
+"""
+import contextlib
+import io
+import sys
+import time
+
+from minilang.lexer.regex_lexer import RegexLexer
+from minilang.parser.parser import Parser
+from minilang.semantic.semantic_analyzer import SemanticAnalyzer
+from minilang.compiler.compiler import Compiler
+from minilang.compiler.optimizer import Optimizer
+from minilang.compiler.peephole import PeepholeOptimizer
+from minilang.compiler.packed import pack
+from minilang.compiler.register import RegisterCompiler
+from minilang.vm.vm import VirtualMachine
+from minilang.vm.packed_vm import PackedVM
+from minilang.vm.register_vm import RegisterVM
+
+from .workloads import WORKLOADS
+
+
+def front_end(code):
+    ast = Parser(RegexLexer(code)).parse()
+    SemanticAnalyzer().analyze(ast)
+    return Optimizer().optimize(ast)
+
+
+def stack_program(ast):
+    compiler = Compiler()
+    bytecode, functions = compiler.compile(ast)
+    return bytecode, functions, compiler.globals
+
+
+def best_of(make_vm, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        vm = make_vm()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            vm.run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    print(f"{'workload':<11}{'engine':<10}{'instrs':>8}{'ms':>10}{'speedup':>9}")
+    for name, code in WORKLOADS.items():
+        ast = front_end(code)
+        bytecode, functions, global_names = stack_program(ast)
+        peeped, peeped_functions = PeepholeOptimizer().optimize(
+            *stack_program(ast)[:2]
+        )
+        packed = pack(peeped, peeped_functions, global_names)
+        program = RegisterCompiler().compile(ast)
+
+        engines = (
+            ("switch", len(bytecode), lambda: VirtualMachine(bytecode, len(global_names))),
+            ("packed", len(peeped), lambda: PackedVM(packed)),
+            ("register", len(program.code), lambda: RegisterVM(program)),
+        )
+        baseline = None
+        for engine, size, make_vm in engines:
+            elapsed = best_of(make_vm, repeat)
+            baseline = baseline or elapsed
+            print(
+                f"{name:<11}{engine:<10}{size:>8}{elapsed * 1000:>10.1f}"
+                f"{baseline / elapsed:>8.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+Semantic analysis time on programs with N globals and N functions: with
+one chained scope per function the time should grow linearly in N.
+
+    python -m benchmarks.bench_semantic [n ...]
+"""
+import sys
+import time
+
+from minilang.lexer.regex_lexer import RegexLexer
+from minilang.parser.parser import Parser
+from minilang.semantic.semantic_analyzer import SemanticAnalyzer
+
+
+def generate(n):
+    parts = [f"let g{i} = {i};\n" for i in range(n)]
+    parts += [
+        f"fn f{i}(a) {{ let t = a + g{i}; g{i} = t; return t; }}\nprint(f{i}({i}));\n"
+        for i in range(n)
+    ]
+    return "".join(parts)
+
+
+def main():
+    sizes = [int(n) for n in sys.argv[1:]] or [1000, 2000, 4000, 8000]
+    print(f"{'n':>6}{'ms':>10}{'us/n':>8}")
+    for n in sizes:
+        ast = Parser(RegexLexer(generate(n))).parse()
+        start = time.perf_counter()
+        SemanticAnalyzer().analyze(ast)
+        ms = (time.perf_counter() - start) * 1000
+        print(f"{n:>6}{ms:>10.1f}{ms * 1000 / n:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
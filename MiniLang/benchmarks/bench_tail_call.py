@@ -0,0 +1,71 @@
+"""
+Deep accumulator-style recursion with and without tail calls: run time
+and peak memory of the frames.
+
+    python -m benchmarks.bench_tail_call [depth]
+"""
+import contextlib
+import io
+import sys
+import time
+import tracemalloc
+
+from minilang.lexer.regex_lexer import RegexLexer
+from minilang.parser.parser import Parser
+from minilang.compiler.compiler import Compiler
+from minilang.compiler.packed import pack
+from minilang.vm.dispatch_vm import DispatchVM
+from minilang.vm.packed_vm import PackedVM
+
+
+SOURCE = """
+fn sum(n, acc) {{
+    if (n == 0) {{ return acc; }}
+    return sum(n - 1, acc + n);
+}}
+print(sum({depth}, 0));
+"""
+
+
+def compile_source(code, tail_calls):
+    ast = Parser(RegexLexer(code)).parse()
+    return Compiler(tail_calls=tail_calls).compile(ast)
+
+
+ENGINES = (
+    ("dispatch", lambda bytecode, functions: DispatchVM(bytecode)),
+    ("packed", lambda bytecode, functions: PackedVM(pack(bytecode, functions))),
+)
+
+
+def measure(make_vm, traced):
+    vm = make_vm()
+    if traced:
+        tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        vm.run()
+    elapsed = time.perf_counter() - start
+    peak = 0
+    if traced:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    code = SOURCE.format(depth=depth)
+    print(f"sum({depth}, 0)")
+    for name, engine in ENGINES:
+        for tail_calls in (False, True):
+            bytecode, functions = compile_source(code, tail_calls)
+            make_vm = lambda: engine(bytecode, functions)
+            elapsed, _ = measure(make_vm, traced=False)
+            _, peak = measure(make_vm, traced=True)
+            label = "TAIL_CALL" if tail_calls else "CALL"
+            print(f"  {name:<9} {label:<10} {elapsed:8.3f} s  peak {peak / 1e6:8.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
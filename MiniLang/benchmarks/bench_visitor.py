@@ -0,0 +1,83 @@
+"""
+The four AST passes on a wide tree (the generated workload: thousands
+of small functions) and a deep one (one expression chaining N `+`
+terms, far past Python's recursion limit), in microseconds per node.
+
+    python -m benchmarks.bench_visitor [deep_terms]
+"""
+import contextlib
+import os
+import sys
+import time
+
+from minilang.lexer.regex_lexer import RegexLexer
+from minilang.parser.parser import Parser
+from minilang.parser.ast_printer import ASTPrinter
+from minilang.semantic.semantic_analyzer import SemanticAnalyzer
+from minilang.compiler.optimizer import Optimizer
+from minilang.compiler.compiler import Compiler
+
+from .workloads import WORKLOADS
+
+
+REPEAT = 5
+
+
+def deep(terms):
+    return "let x = 1; print(" + " + ".join(["x"] * terms) + ");"
+
+
+def count(node):
+    # Nodes in the tree, without recursing
+    total = 0
+    work = [node]
+    while work:
+        node = work.pop()
+        total += 1
+        for attr in ("statements", "args"):
+            work += getattr(node, attr, ())
+        for attr in ("value", "expression", "condition", "then_branch", "else_branch", "body", "left", "right"):
+            child = getattr(node, attr, None)
+            if child is not None and not isinstance(child, int):
+                work.append(child)
+    return total
+
+
+def passes():
+    # Each pass gets its own fresh tree: the optimizer rewrites in place
+    def analyze(ast):
+        SemanticAnalyzer().analyze(ast)
+
+    def optimize(ast):
+        Optimizer().optimize(ast)
+
+    def compile_(ast):
+        Compiler().compile(ast)
+
+    def print_(ast):
+        with open(os.devnull, "w") as null, contextlib.redirect_stdout(null):
+            ASTPrinter().print(ast)
+
+    return {"analyze": analyze, "optimize": optimize, "compile": compile_, "print": print_}
+
+
+def main():
+    terms = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    trees = {"wide": WORKLOADS["generated"], "deep": deep(terms)}
+    print(f"{'tree':<6}{'nodes':>8}  " + "".join(f"{name:>10}" for name in passes()) + "   (us/node)")
+    for label, code in trees.items():
+        nodes = count(Parser(RegexLexer(code)).parse())
+        row = []
+        for run in passes().values():
+            best = float("inf")
+            for _ in range(REPEAT):
+                ast = Parser(RegexLexer(code)).parse()
+                start = time.perf_counter()
+                run(ast)
+                best = min(best, time.perf_counter() - start)
+            row.append(best * 1e6 / nodes)
+        print(f"{label:<6}{nodes:>8}  " + "".join(f"{us:>10.2f}" for us in row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+Per-phase timing and peak memory of the whole pipeline on every workload,
+as JSON, with an optional comparison against a stored baseline.
+
+    python -m benchmarks.harness                      # print a table
+    python -m benchmarks.harness --json result.json   # also write JSON
+    python -m benchmarks.harness --save-baseline      # record benchmarks/baseline.json
+    python -m benchmarks.harness --compare            # exit 1 on a regression
+
+Timings are the best of `--repeat` runs. Peak memory is measured in a
+separate traced run, since tracemalloc slows everything it watches.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+from minilang.build import back_end
+from minilang.frontend import LEXERS
+from minilang.lexer.token import TokenType
+from minilang.parser.parser import Parser
+from minilang.compiler.optimizer import Optimizer
+from minilang.semantic.semantic_analyzer import SemanticAnalyzer
+from minilang.vm.vm import VirtualMachine
+
+from .workloads import WORKLOADS
+
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# The steps of build.compile_source with the CLI's defaults (regex lexer,
+# every optimization on); "Compiler" is its whole back end: code
+# generation, inlining, peephole pass and packing
+PHASES = ("Lexer", "Parser", "SemanticAnalyzer", "Optimizer", "Compiler", "VirtualMachine.run")
+
+# A phase regresses when it is this much slower than the baseline...
+THRESHOLD = 0.25
+# ...and the difference is large enough not to be timer noise
+MIN_DELTA = 0.002
+
+
+def tokenize(code):
+    lexer = LEXERS["regex"](code)
+    tokens = []
+    while True:
+        tok = lexer.next_token()
+        tokens.append(tok)
+        if tok.type == TokenType.EOF:
+            return tokens
+
+
+def analyze(ast):
+    analyzer = SemanticAnalyzer({})
+    analyzer.analyze(ast)
+    return ast, analyzer
+
+
+def optimize(analyzed):
+    ast, analyzer = analyzed
+    return Optimizer().optimize(ast), analyzer
+
+
+def compile_program(optimized):
+    ast, analyzer = optimized
+    return back_end(ast, analyzer, {})
+
+
+def execute(program):
+    with contextlib.redirect_stdout(io.StringIO()):
+        VirtualMachine(program.instructions(), program.num_globals).run()
+
+
+def pipeline(code):
+    # (phase, step) pairs; each step takes the previous step's result
+    return (
+        ("Lexer", lambda _: tokenize(code)),
+        ("Parser", lambda tokens: Parser(tokens).parse()),
+        ("SemanticAnalyzer", analyze),
+        ("Optimizer", optimize),
+        ("Compiler", compile_program),
+        ("VirtualMachine.run", execute),
+    )
+
+
+def time_phases(code):
+    result = None
+    times = {}
+    for phase, step in pipeline(code):
+        start = time.perf_counter()
+        result = step(result)
+        times[phase] = time.perf_counter() - start
+    return times
+
+
+def peak_memory(code):
+    result = None
+    peaks = {}
+    tracemalloc.start()
+    try:
+        for phase, step in pipeline(code):
+            tracemalloc.reset_peak()
+            result = step(result)
+            peaks[phase] = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+
+def bench(code, repeat):
+    best = None
+    for _ in range(repeat):
+        times = time_phases(code)
+        best = times if best is None else {p: min(best[p], times[p]) for p in PHASES}
+    peaks = peak_memory(code)
+    return {
+        "seconds": best,
+        "total_seconds": sum(best.values()),
+        "peak_bytes": peaks,
+        "max_peak_bytes": max(peaks.values()),
+    }
+
+
+def run(names, repeat):
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "repeat": repeat,
+        "workloads": {name: bench(WORKLOADS[name], repeat) for name in names},
+    }
+
+
+def compare(report, baseline, threshold=THRESHOLD, min_delta=MIN_DELTA):
+    """List (workload, phase, baseline_s, current_s) for every slower phase."""
+    regressions = []
+    for name, current in report["workloads"].items():
+        before = baseline.get("workloads", {}).get(name)
+        if before is None:
+            continue
+        for phase in PHASES:
+            old = before["seconds"].get(phase)
+            new = current["seconds"][phase]
+            if old is None:
+                continue
+            if new > old * (1 + threshold) and new - old > min_delta:
+                regressions.append((name, phase, old, new))
+    return regressions
+
+
+def print_report(report, baseline=None):
+    header = "".join(f"{p:>20}" for p in PHASES)
+    print(f"{'workload':<12}{header}{'peak MB':>10}")
+    for name, result in report["workloads"].items():
+        cells = []
+        for phase in PHASES:
+            cell = f"{result['seconds'][phase] * 1000:.2f} ms"
+            before = baseline and baseline.get("workloads", {}).get(name)
+            if before and before["seconds"].get(phase):
+                cell += f" {result['seconds'][phase] / before['seconds'][phase]:.2f}x"
+            cells.append(f"{cell:>20}")
+        print(f"{name:<12}{''.join(cells)}{result['max_peak_bytes'] / 1e6:10.2f}")
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(prog="python -m benchmarks.harness")
+    arg_parser.add_argument("workloads", nargs="*", help="subset of: " + ", ".join(WORKLOADS))
+    arg_parser.add_argument("--repeat", type=int, default=3, help="best of this many runs")
+    arg_parser.add_argument("--json", metavar="PATH", help="write the report here ('-' for stdout)")
+    arg_parser.add_argument("--baseline", default=BASELINE, help="baseline file to compare with or save")
+    arg_parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    arg_parser.add_argument("--compare", action="store_true", help="fail if any phase regressed")
+    arg_parser.add_argument("--threshold", type=float, default=THRESHOLD, help="allowed slowdown ratio")
+    args = arg_parser.parse_args(argv)
+
+    names = args.workloads or list(WORKLOADS)
+    unknown = [n for n in names if n not in WORKLOADS]
+    if unknown:
+        arg_parser.error(f"unknown workload(s): {', '.join(unknown)}")
+
+    report = run(names, args.repeat)
+
+    baseline = None
+    if args.compare:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    if args.json == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        print_report(report, baseline)
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+    if baseline is not None:
+        regressions = compare(report, baseline, args.threshold)
+        for name, phase, old, new in regressions:
+            print(
+                f"REGRESSION {name} {phase}: {old * 1000:.2f} ms -> {new * 1000:.2f} ms",
+                file=sys.stderr,
+            )
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
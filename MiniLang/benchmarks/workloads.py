@@ -0,0 +1,108 @@
+"""
+MiniLang programs used by the benchmark harness, one per kind of load.
+"""
+
+RECURSION = """
+fn fib(n) {
+    if (n < 2) { return n; }
+    return fib(n - 1) + fib(n - 2);
+}
+
+fn fact(n) {
+    if (n == 0) { return 1; }
+    return n * fact(n - 1);
+}
+
+print(fib(18));
+let i = 0;
+while (i < 200) {
+    let f = fact(30);
+    i = i + 1;
+}
+print(fact(30));
+"""
+
+LOOPS = """
+let i = 0;
+let total = 0;
+while (i < 30000) {
+    total = total + i;
+    i = i + 1;
+}
+print(total);
+
+let outer = 0;
+let cells = 0;
+while (outer < 100) {
+    let inner = 0;
+    while (inner < 100) {
+        cells = cells + 1;
+        inner = inner + 1;
+    }
+    outer = outer + 1;
+}
+print(cells);
+"""
+
+BRANCHY = """
+let i = 0;
+let small = 0;
+let even = 0;
+let other = 0;
+while (i < 10000) {
+    let r = i - i / 7 * 7;
+    if (r < 2) {
+        small = small + 1;
+    } else {
+        if (r == 4) {
+            even = even + 1;
+        } else {
+            if (r > 5) { small = small - 1; } else { other = other + 1; }
+        }
+    }
+    i = i + 1;
+}
+print(small);
+print(even);
+print(other);
+"""
+
+CALLS = """
+fn add(a, b) { return a + b; }
+fn twice(x) { return add(x, x); }
+fn mix(a, b, c) { return add(twice(a), add(b, c)); }
+
+let i = 0;
+let total = 0;
+while (i < 3000) {
+    total = mix(i, total / 1000, 3);
+    i = i + 1;
+}
+print(total);
+"""
+
+GENERATED_CHUNK = """
+fn helper_{n}(alpha, beta) {{
+    let total_{n} = alpha * {n} + beta / 7;
+    while (total_{n} > 1000) {{
+        total_{n} = total_{n} - 1234567;
+    }}
+    if (total_{n} == 42) {{ return 0; }}
+    return total_{n} + {n} * 1 + 0;
+}}
+print(helper_{n}({n}, 99999));
+"""
+
+
+def generated(functions=1000):
+    # Front-end heavy: thousands of small functions, each run once
+    return "".join(GENERATED_CHUNK.format(n=n) for n in range(functions))
+
+
+WORKLOADS = {
+    "recursion": RECURSION,
+    "loops": LOOPS,
+    "branchy": BRANCHY,
+    "calls": CALLS,
+    "generated": generated(),
+}
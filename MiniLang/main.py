@@ -17,16 +17,17 @@ def run(code, title):
     # ---------- TOKENS ----------
     print("\n--- TOKENS ---")
     lexer = Lexer(code)
+    tokens = []
     while True:
         tok = lexer.next_token()
         print(tok)
+        tokens.append(tok)
         if tok.type.name == "EOF":
             break
 
     # ---------- PARSE ----------
     print("\n--- AST ---")
-    lexer = Lexer(code)
-    parser = Parser(lexer)
+    parser = Parser(tokens)
     ast = parser.parse()
     ASTPrinter().print(ast)
 
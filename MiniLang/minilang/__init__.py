@@ -0,0 +1,3 @@
+from .program import Program, compile
+
+__all__ = ["Program", "compile"]
@@ -0,0 +1,106 @@
+import contextlib
+import functools
+import io
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from minilang.build import run_file
+from minilang.vm.output import StreamSink
+
+
+SUFFIXES = (".ml",)
+
+
+class ScriptResult:
+    """Outcome of one script: captured stdout, error text or None, seconds."""
+
+    __slots__ = ("path", "output", "error", "seconds")
+
+    def __init__(self, path, output, error, seconds):
+        self.path = path
+        self.output = output
+        self.error = error
+        self.seconds = seconds
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        status = "ok" if self.ok else "failed"
+        return f"ScriptResult({self.path!r}, {status}, {self.seconds:.3f}s)"
+
+
+def collect(paths, suffixes=SUFFIXES):
+    """Expand directories (recursively, sorted) into their script files."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            found = []
+            for root, dirs, names in os.walk(path):
+                dirs.sort()
+                found += [os.path.join(root, n) for n in names if n.endswith(suffixes)]
+            files += sorted(found)
+        else:
+            files.append(path)
+    return files
+
+
+def run_script(path, options):
+    # Runs in a worker: anything the script does wrong stays in its result
+    output = io.StringIO()
+    # PRINT output is collected and written once; the redirect catches
+    # anything else the run writes to stdout
+    sink = StreamSink(output, flush="exit")
+    error = None
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(output):
+            try:
+                run_file(path, output=sink, **options)
+            finally:
+                sink.flush()
+    except Exception as e:
+        error = "".join(traceback.format_exception_only(type(e), e)).strip()
+    return ScriptResult(path, output.getvalue(), error, time.perf_counter() - start)
+
+
+def run_batch(paths, workers=None, **options):
+    """
+    Compile and run every script in `paths` (files or directories) and
+    return their `ScriptResult`s in input order. `options` are passed to
+    `run_file`. With more than one worker the scripts are spread over a
+    process pool, in chunks so that tiny scripts don't pay one round trip
+    each; `workers=1` runs them in this process.
+    """
+    files = collect(paths)
+    workers = workers or os.cpu_count() or 1
+    task = functools.partial(run_script, options=options)
+    if workers <= 1 or len(files) <= 1:
+        return [task(path) for path in files]
+
+    results = []
+    while len(results) < len(files):
+        pending = files[len(results):]
+        chunksize = max(1, min(64, len(pending) // (workers * 4)))
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for result in pool.map(task, pending, chunksize=chunksize):
+                    results.append(result)
+        except BrokenProcessPool:
+            # A worker died (killed, out of memory, ...) and took the pool
+            # with it: run the first unfinished script alone, so a crash is
+            # pinned on the script that causes it, then carry on
+            results.append(isolated(task, files[len(results)]))
+    return results
+
+
+def isolated(task, path):
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        try:
+            return pool.submit(task, path).result()
+        except BrokenProcessPool as e:
+            return ScriptResult(path, "", f"worker crashed: {type(e).__name__}: {e}", 0.0)
@@ -0,0 +1,239 @@
+import mmap
+import os
+
+from minilang.frontend import front_end, imported, parse
+from minilang.modules import ModuleLoader
+from minilang.compiler.compiler import Compiler
+from minilang.compiler.optimizer import Optimizer
+from minilang.compiler.packed import pack
+from minilang.compiler.linker import assemble, link
+from minilang.compiler.peephole import PeepholeOptimizer
+from minilang.compiler.inliner import Inliner, MAX_SIZE
+from minilang.compiler.register import RegisterCompiler
+from minilang.compiler import pycodegen
+from minilang.compiler import cache
+from minilang.vm.vm import VirtualMachine
+from minilang.vm.dispatch_vm import DispatchVM
+from minilang.vm.packed_vm import PackedVM
+from minilang.vm.register_vm import RegisterVM
+from minilang.vm.profiler import ProfilingVM
+from minilang.vm import memo as memo_cache
+from minilang.semantic.semantic_analyzer import SemanticAnalyzer
+
+
+ENGINES = {
+    "switch": VirtualMachine,
+    "dispatch": DispatchVM,
+    "packed": PackedVM,
+    "register": RegisterVM,
+}
+
+
+def module_loader(modules=None, **options):
+    # `modules`, or a new ModuleLoader with `options`
+    return ModuleLoader(**options) if modules is None else modules
+
+
+def compile_source(
+    code,
+    lexer="regex",
+    ast="tree",
+    peephole=True,
+    optimize=True,
+    inline=MAX_SIZE,
+    inline_report=None,
+    purity=False,
+    modules=None,
+):
+    # `inline` is the inliner's size threshold (0 = off); the lines of its
+    # report are appended to `inline_report` if given. With `purity`, the
+    # SemanticAnalyzer's pure functions are listed in names["pure"].
+    # Imported modules come from `modules` (a modules.ModuleLoader, by
+    # default one for the current directory) and are linked in, their
+    # files listed in names["modules"].
+    modules = module_loader(modules)
+    ast, analyzer, externs = front_end(code, lexer, ast, optimize, modules)
+    return back_end(ast, analyzer, externs, peephole, inline, inline_report, purity, modules)
+
+
+def back_end(ast, analyzer, externs, peephole=True, inline=MAX_SIZE, inline_report=None, purity=False, modules=None):
+    # Code generation for an AST from front_end: compile, link the
+    # imported modules, inline, peephole-optimize and pack
+    compiler = Compiler(symbols=analyzer.symbols, externs=externs)
+    bytecode, functions = compiler.compile(ast)
+    global_slots = compiler.globals
+
+    objects = []
+    if analyzer.imports:
+        objects = modules.link_order(analyzer.imports)
+        program = assemble(None, bytecode, functions, global_slots, analyzer.imports, analyzer.pure_functions())
+        bytecode, functions, global_slots = link(objects + [program])
+
+    if inline:
+        inliner = Inliner(inline)
+        bytecode, functions = inliner.inline(bytecode, functions, len(global_slots))
+        if inline_report is not None:
+            inline_report.extend(inliner.report())
+    if peephole:
+        bytecode, functions = PeepholeOptimizer().optimize(bytecode, functions)
+    program = pack(bytecode, functions, global_slots)
+    if purity:
+        program.names["pure"] = [name for obj in objects for name in obj.pure] + analyzer.pure_functions()
+    if objects:
+        program.names["modules"] = modules.dependencies(objects)
+    return program
+
+
+def compile_register(code, lexer="regex", ast="tree", optimize=True):
+    # The register backend has its own code generator on top of the same
+    # front end; its programs are not cached
+    ast = parse(code, lexer, ast)
+    if imported(ast):
+        raise Exception(f"Cannot import '{imported(ast)[0]}': the register backend does not link modules")
+    SemanticAnalyzer().analyze(ast)
+    if optimize:
+        ast = Optimizer().optimize(ast)
+    return RegisterCompiler().compile(ast)
+
+
+def compile_python(code, lexer="regex", ast="tree", optimize=True, filename="<minilang>"):
+    # Raises pycodegen.Unsupported for programs the backend can't translate
+    ast = parse(code, lexer, ast)
+    if imported(ast):
+        raise pycodegen.Unsupported("imports are linked as bytecode")
+    SemanticAnalyzer().analyze(ast)
+    if optimize:
+        ast = Optimizer().optimize(ast)
+    return pycodegen.compile_program(ast, filename)
+
+
+def run_python(code, lexer="regex", ast="tree", optimize=True, filename="<minilang>", output=None):
+    """
+    Run MiniLang source as native Python code, falling back to the
+    bytecode VM when the translator can't handle it. Returns True if the
+    program ran natively.
+    """
+    try:
+        native = compile_python(code, lexer, ast, optimize, filename)
+    except pycodegen.Unsupported:
+        program = compile_source(code, lexer, ast, optimize=optimize)
+        VirtualMachine(program.instructions(), program.num_globals, output=output).run()
+        return False
+    pycodegen.execute(native, output=output)
+    return True
+
+
+def map_source(f):
+    # mmap keeps huge sources out of the Python heap; empty files can't be mapped
+    try:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except ValueError:
+        return b""
+
+
+def load_program(
+    path,
+    use_cache=True,
+    cache_dir=None,
+    lexer="regex",
+    ast="tree",
+    peephole=True,
+    optimize=True,
+    inline=MAX_SIZE,
+    inline_report=None,
+    purity=False,
+    module_path=(),
+):
+    # Imports are looked up next to the script, then in `module_path`
+    modules = module_loader(
+        path=[os.path.dirname(os.path.abspath(path)), *module_path],
+        use_cache=use_cache,
+        cache_dir=cache_dir,
+        lexer=lexer,
+        ast=ast,
+        optimize=optimize,
+    )
+    with open(path, "rb") as f:
+        data = map_source(f) if lexer == "stream" else f.read()
+
+    try:
+        # The stream lexer decodes chunks itself; the others need the full text
+        code = data if lexer == "stream" else data.decode("utf-8")
+
+        if not use_cache:
+            return compile_source(code, lexer, ast, peephole, optimize, inline, inline_report, purity, modules)
+
+        digest = cache.source_hash(data, options=(peephole, optimize, inline, purity))
+        mlc_path = cache.cache_path(path, cache_dir)
+
+        # A hit skips the lexer, parser and compiler entirely
+        program = cache.read_cache(mlc_path, digest)
+        if program is None:
+            program = compile_source(code, lexer, ast, peephole, optimize, inline, inline_report, purity, modules)
+            cache.write_cache(mlc_path, program, digest)
+        return program
+    finally:
+        if isinstance(data, mmap.mmap):
+            data.close()
+
+
+def run_file(
+    path,
+    engine="switch",
+    use_cache=True,
+    cache_dir=None,
+    lexer="regex",
+    ast="tree",
+    peephole=True,
+    optimize=True,
+    inline=MAX_SIZE,
+    inline_report=None,
+    profile=False,
+    memoize=False,
+    memo_size=memo_cache.DEFAULT_SIZE,
+    memo_report=None,
+    output=None,
+    module_path=(),
+):
+    # With `memoize`, pure function calls are cached (up to `memo_size`
+    # results) and a hit/miss line is appended to `memo_report` if given.
+    # `output` is a PRINT sink (see vm.output); the caller flushes it.
+    # `module_path` lists more directories to import modules from.
+    if engine == "python" and not profile:
+        with open(path, encoding="utf-8") as f:
+            code = f.read()
+        try:
+            native = compile_python(code, lexer, ast, optimize, str(path))
+        except pycodegen.Unsupported:
+            engine = "switch"
+        else:
+            pycodegen.execute(native, output=output)
+            return
+
+    if engine == "register" and not profile:
+        with open(path, encoding="utf-8") as f:
+            code = f.read()
+        RegisterVM(compile_register(code, lexer, ast, optimize), output).run()
+        return
+
+    program = load_program(
+        path, use_cache, cache_dir, lexer, ast, peephole, optimize, inline, inline_report, memoize, module_path
+    )
+
+    if profile:
+        # The instrumented loop replaces the chosen engine; returns a Profile
+        functions = dict(zip(program.names["functions"], program.functions))
+        return ProfilingVM(program.instructions(), functions, program.num_globals, output).run()
+
+    memo = None
+    if memoize:
+        functions = dict(zip(program.names["functions"], program.functions))
+        memo = memo_cache.for_program(functions, program.names.get("pure", []), memo_size)
+
+    if engine == "packed":
+        vm = PackedVM(program, memo, output)
+    else:
+        vm = ENGINES[engine](program.instructions(), program.num_globals, memo, output)
+    vm.run()
+    if memo is not None and memo_report is not None:
+        memo_report.append(memo.format())
@@ -1,31 +1,230 @@
+import argparse
+import os
 import sys
-from minilang.lexer.lexer import Lexer
-from minilang.parser.parser import Parser
-from minilang.compiler.compiler import Compiler
-from minilang.vm.vm import VirtualMachine
 
+from minilang.frontend import LEXERS
+from minilang.build import ENGINES, run_file
+from minilang.batch import run_batch
+from minilang.compiler.inliner import MAX_SIZE
+from minilang.vm import memo as memo_cache
+from minilang.vm import output as sinks
 
-def run_file(path):
-    with open(path, "r") as f:
-        code = f.read()
 
-    lexer = Lexer(code)
-    parser = Parser(lexer)
-    ast = parser.parse()
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(prog="python -m minilang.cli")
+    arg_parser.add_argument(
+        "files",
+        nargs="+",
+        metavar="file",
+        help="script to run; several files or a directory run as a batch",
+    )
+    arg_parser.add_argument(
+        "--engine",
+        choices=sorted(ENGINES) + ["python"],
+        default="switch",
+        help="interpreter loop to execute the bytecode with (register: three-address code, python: compiled to Python functions)",
+    )
+    arg_parser.add_argument(
+        "--lexer",
+        choices=sorted(LEXERS),
+        default="regex",
+        help="scanner used by the front end",
+    )
+    arg_parser.add_argument(
+        "--ast",
+        choices=["tree", "arena"],
+        default="tree",
+        help="AST representation: node objects or the flat arena",
+    )
+    arg_parser.add_argument(
+        "--no-optimize",
+        action="store_true",
+        help="skip the AST optimizer (folding, propagation, pruning)",
+    )
+    arg_parser.add_argument(
+        "--inline-size",
+        type=int,
+        default=MAX_SIZE,
+        metavar="N",
+        help=f"inline non-recursive functions of at most N instructions (default {MAX_SIZE}, 0 = off)",
+    )
+    arg_parser.add_argument(
+        "--inline-report",
+        action="store_true",
+        help="list inlined call sites on stderr (recompiles, bypassing the cache)",
+    )
+    arg_parser.add_argument(
+        "--no-peephole",
+        action="store_true",
+        help="skip the bytecode peephole optimizer",
+    )
+    arg_parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="run under the opcode profiler and report to stderr",
+    )
+    arg_parser.add_argument(
+        "--profile-format",
+        choices=["text", "json"],
+        default="text",
+        help="format of the profile report (default: text)",
+    )
+    arg_parser.add_argument(
+        "--profile-output",
+        metavar="PATH",
+        help="write the profile report to PATH instead of stderr",
+    )
+    arg_parser.add_argument(
+        "--memoize",
+        action="store_true",
+        help="cache results of pure function calls (switch, dispatch and packed engines)",
+    )
+    arg_parser.add_argument(
+        "--memo-size",
+        type=int,
+        metavar="N",
+        help=f"keep at most N memoized results, least recently used evicted first (default {memo_cache.DEFAULT_SIZE})",
+    )
+    arg_parser.add_argument(
+        "--memo-stats",
+        action="store_true",
+        help="report memo cache hits and misses on stderr",
+    )
+    arg_parser.add_argument(
+        "--output",
+        choices=["print", "buffered"],
+        default="print",
+        help="how PRINT writes to stdout: print() per value, or buffered writes",
+    )
+    arg_parser.add_argument(
+        "--output-file",
+        metavar="PATH",
+        help="write program output to PATH (buffered) instead of stdout",
+    )
+    arg_parser.add_argument(
+        "--buffer-size",
+        type=int,
+        default=sinks.DEFAULT_BUFFER_SIZE,
+        metavar="N",
+        help=f"characters of output to collect before writing (default {sinks.DEFAULT_BUFFER_SIZE})",
+    )
+    arg_parser.add_argument(
+        "--flush",
+        choices=sinks.FLUSH_POLICIES,
+        default="size",
+        help="when buffered output is written: when the buffer fills, after every line, or at exit",
+    )
+    arg_parser.add_argument(
+        "--workers",
+        type=int,
+        metavar="N",
+        help="batch mode: run scripts in N worker processes (default: one per CPU)",
+    )
+    arg_parser.add_argument(
+        "--module-path",
+        action="append",
+        default=[],
+        metavar="DIR",
+        help="also look for imported modules in DIR, after the script's directory (repeatable)",
+    )
+    arg_parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="always recompile and do not read or write .mlc and .mlo files",
+    )
+    arg_parser.add_argument(
+        "--cache-dir",
+        help="store .mlc files here instead of next to the source",
+    )
+    args = arg_parser.parse_args(argv)
 
-    compiler = Compiler()
-    bytecode = compiler.compile(ast)
+    memo_options = args.memoize or args.memo_size is not None or args.memo_stats
+    if memo_options and args.engine in ("register", "python"):
+        arg_parser.error(f"--memoize, --memo-size and --memo-stats do not work with --engine {args.engine}")
+    if args.memo_size is None:
+        args.memo_size = memo_cache.DEFAULT_SIZE
 
-    vm = VirtualMachine(bytecode)
-    vm.run()
+    batch = len(args.files) > 1 or os.path.isdir(args.files[0]) or args.workers is not None
+    if batch:
+        if args.profile or args.inline_report or args.memo_stats:
+            arg_parser.error("--profile, --inline-report and --memo-stats take a single file")
+        failures = run_batch_command(args)
+        if failures:
+            sys.exit(1)
+        return
 
+    inline_report = [] if args.inline_report else None
+    memo_report = [] if args.memo_stats else None
+    output = None
+    if args.output_file:
+        output = sinks.StreamSink.open(args.output_file, buffer_size=args.buffer_size, flush=args.flush)
+    elif args.output == "buffered":
+        output = sinks.StreamSink(sys.stdout, buffer_size=args.buffer_size, flush=args.flush)
 
-def main():
-    if len(sys.argv) < 2:
-        print("Usage: python -m minilang.cli <file>")
-        sys.exit(1)
+    try:
+        result = run_file(
+            args.files[0],
+            engine=args.engine,
+            use_cache=not args.no_cache and inline_report is None,
+            cache_dir=args.cache_dir,
+            lexer=args.lexer,
+            ast=args.ast,
+            peephole=not args.no_peephole,
+            optimize=not args.no_optimize,
+            inline=args.inline_size,
+            inline_report=inline_report,
+            profile=args.profile,
+            memoize=args.memoize,
+            memo_size=args.memo_size,
+            memo_report=memo_report,
+            output=output,
+            module_path=args.module_path,
+        )
+    finally:
+        if output is not None:
+            output.close()
 
-    run_file(sys.argv[1])
+    for report in (inline_report, memo_report):
+        for line in report or []:
+            print(line, file=sys.stderr)
+
+    if args.profile:
+        report = result.to_json() if args.profile_format == "json" else result.format()
+        if args.profile_output:
+            with open(args.profile_output, "w") as f:
+                f.write(report + "\n")
+        else:
+            print(report, file=sys.stderr)
+
+
+def run_batch_command(args):
+    results = run_batch(
+        args.files,
+        workers=args.workers,
+        engine=args.engine,
+        use_cache=not args.no_cache,
+        cache_dir=args.cache_dir,
+        lexer=args.lexer,
+        ast=args.ast,
+        peephole=not args.no_peephole,
+        optimize=not args.no_optimize,
+        inline=args.inline_size,
+        memoize=args.memoize,
+        memo_size=args.memo_size,
+        module_path=args.module_path,
+    )
+
+    # Outputs in input order, a status line per script on stderr
+    for result in results:
+        print(f"==> {result.path} <==")
+        sys.stdout.write(result.output)
+        status = "ok" if result.ok else f"FAILED: {result.error}"
+        print(f"{result.path}: {result.seconds * 1000:.1f} ms {status}", file=sys.stderr)
+
+    failures = sum(not result.ok for result in results)
+    total = sum(result.seconds for result in results)
+    print(f"{len(results)} scripts, {failures} failed, {total:.3f} s", file=sys.stderr)
+    return failures
 
 
 if __name__ == "__main__":
@@ -1,11 +1,20 @@
+import operator
 from enum import Enum, auto
 
 
+# Bump whenever the emitted bytecode changes so cached .mlc files go stale
+COMPILER_VERSION = 4
+
+
 class OpCode(Enum):
     # ---------- Stack ----------
     PUSH_CONST = auto()
-    LOAD_VAR = auto()
-    STORE_VAR = auto()
+
+    # ---------- Variables (slot indexed) ----------
+    LOAD_LOCAL = auto()
+    STORE_LOCAL = auto()
+    LOAD_GLOBAL = auto()
+    STORE_GLOBAL = auto()
 
     # ---------- Arithmetic ----------
     ADD = auto()
@@ -22,11 +31,24 @@ class OpCode(Enum):
     JUMP = auto()
     JUMP_IF_FALSE = auto()
 
+    # ---------- Superinstructions (peephole) ----------
+    INC_LOCAL = auto()  # (slot, amount)
+    INC_GLOBAL = auto()  # (slot, amount)
+    JUMP_IF_NOT_LT = auto()  # pop b, a; jump unless a < b
+    JUMP_IF_NOT_GT = auto()
+    JUMP_IF_NOT_EQ = auto()
+    JUMP_IF_LT = auto()  # pop b, a; jump if a < b
+    JUMP_IF_GT = auto()
+    JUMP_IF_EQ = auto()
+    BRANCH_LOCAL = auto()  # (slot, const, JUMP_IF_x, target): x-compare var with const
+    BRANCH_GLOBAL = auto()
+
     # ---------- IO ----------
     PRINT = auto()
 
     # ---------- Functions ----------
     CALL = auto()
+    TAIL_CALL = auto()  # like CALL, but replaces the caller's frame
     RETURN = auto()
     FUNC_START = auto()
 
@@ -34,6 +56,28 @@ class OpCode(Enum):
     HALT = auto()
 
 
+# Opcodes whose operand is (addr, argc, nlocals) of the callee
+CALLS = {OpCode.CALL, OpCode.TAIL_CALL}
+
+# Test applied to (a, b) by each compare-and-branch opcode; jump when true
+BRANCH_TESTS = {
+    OpCode.JUMP_IF_NOT_LT: operator.ge,
+    OpCode.JUMP_IF_NOT_GT: operator.le,
+    OpCode.JUMP_IF_NOT_EQ: operator.ne,
+    OpCode.JUMP_IF_LT: operator.lt,
+    OpCode.JUMP_IF_GT: operator.gt,
+    OpCode.JUMP_IF_EQ: operator.eq,
+}
+
+
+def format_operand(operand):
+    if isinstance(operand, tuple):
+        return "(" + ", ".join(format_operand(x) for x in operand) + ")"
+    if isinstance(operand, OpCode):
+        return operand.name
+    return str(operand)
+
+
 class Instruction:
     def __init__(self, opcode, operand=None):
         self.opcode = opcode
@@ -42,4 +86,4 @@ class Instruction:
     def __repr__(self):
         if self.operand is None:
             return f"{self.opcode.name}"
-        return f"{self.opcode.name} {self.operand}"
+        return f"{self.opcode.name} {format_operand(self.operand)}"
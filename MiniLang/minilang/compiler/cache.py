@@ -0,0 +1,195 @@
+import hashlib
+import marshal
+import os
+import struct
+import sys
+from array import array
+
+from .bytecode import COMPILER_VERSION
+from .linker import ObjectCode
+from .packed import PackedCode
+
+
+# ------------------------------------------------------------
+# .mlc layout
+#
+#   magic        4s   b"MLC\0"
+#   format       H    layout version of this file
+#   compiler     H    COMPILER_VERSION that produced the code
+#   source hash  32s  sha256 of the source text
+#   byteorder    B    0 = little, 1 = big (for the operand array)
+#   payload           marshal of the PackedCode fields
+#
+# .mlo files (a module's ObjectCode) share the layout with their own
+# magic. A program linked with modules lists their paths and source
+# hashes in names["modules"] and is stale once one of them changes.
+# ------------------------------------------------------------
+MAGIC = b"MLC\x00"
+OBJECT_MAGIC = b"MLO\x00"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHH32sB")
+
+
+def source_hash(source, options=()):
+    # str, bytes or any buffer such as an mmap of the source file, plus
+    # any compile options that change the generated code
+    if isinstance(source, str):
+        source = source.encode("utf-8")
+    digest = hashlib.sha256(source)
+    digest.update(repr(tuple(options)).encode("utf-8"))
+    return digest.digest()
+
+
+def cache_path(source_path, cache_dir=None, suffix=".mlc"):
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    if cache_dir is None:
+        return os.path.join(os.path.dirname(source_path), stem + suffix)
+
+    # Distinct sources with the same file name must not share an entry
+    key = hashlib.sha1(os.path.abspath(source_path).encode("utf-8")).hexdigest()[:8]
+    return os.path.join(cache_dir, f"{stem}-{key}{suffix}")
+
+
+def header(magic, digest):
+    return HEADER.pack(
+        magic,
+        FORMAT_VERSION,
+        COMPILER_VERSION,
+        digest,
+        0 if sys.byteorder == "little" else 1,
+    )
+
+
+def unpack(data, magic, digest):
+    # (payload, byteswap) of the data, or None if stale, foreign or corrupt
+    if len(data) < HEADER.size:
+        return None
+
+    stored_magic, fmt, version, stored, order = HEADER.unpack_from(data)
+    if stored_magic != magic or fmt != FORMAT_VERSION or version != COMPILER_VERSION:
+        return None
+    if stored != digest:
+        return None
+
+    try:
+        fields = marshal.loads(data[HEADER.size:])
+    except (EOFError, ValueError, TypeError):
+        return None
+    return fields, order != (0 if sys.byteorder == "little" else 1)
+
+
+def int_array(data, byteswap):
+    result = array("i")
+    result.frombytes(data)
+    if byteswap:
+        result.byteswap()
+    return result
+
+
+def dumps(code, digest):
+    payload = marshal.dumps((
+        code.ops.tobytes(),
+        code.args.tobytes(),
+        code.consts,
+        code.functions,
+        code.names,
+        code.num_globals,
+    ))
+    return header(MAGIC, digest) + payload
+
+
+def loads(data, digest):
+    # Returns None if the data is stale, foreign or corrupt
+    loaded = unpack(data, MAGIC, digest)
+    if loaded is None:
+        return None
+    (ops_bytes, args_bytes, consts, functions, names, num_globals), byteswap = loaded
+
+    ops = array("B")
+    ops.frombytes(ops_bytes)
+    return PackedCode(ops, int_array(args_bytes, byteswap), consts, functions, names, num_globals)
+
+
+def dumps_object(obj, digest):
+    payload = marshal.dumps((
+        obj.name,
+        obj.ops.tobytes(),
+        obj.args.tobytes(),
+        obj.consts,
+        obj.relocations,
+        obj.calls,
+        obj.symbols,
+        obj.globals,
+        obj.imports,
+        obj.pure,
+    ))
+    return header(OBJECT_MAGIC, digest) + payload
+
+
+def loads_object(data, digest):
+    loaded = unpack(data, OBJECT_MAGIC, digest)
+    if loaded is None:
+        return None
+    (name, ops_bytes, args_bytes, *tables), byteswap = loaded
+
+    ops = array("B")
+    ops.frombytes(ops_bytes)
+    return ObjectCode(name, ops, int_array(args_bytes, byteswap), *tables)
+
+
+def modules_unchanged(code):
+    # A linked program also depends on the sources of its modules
+    for path, digest in code.names.get("modules", ()):
+        try:
+            with open(path, "rb") as f:
+                if source_hash(f.read()) != digest:
+                    return False
+        except OSError:
+            return False
+    return True
+
+
+def read_file(path):
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def read_cache(path, digest):
+    data = read_file(path)
+    code = None if data is None else loads(data, digest)
+    if code is None or not modules_unchanged(code):
+        return None
+    return code
+
+
+def read_object(path, digest):
+    data = read_file(path)
+    return None if data is None else loads_object(data, digest)
+
+
+def write_cache(path, code, digest):
+    write_file(path, dumps(code, digest))
+
+
+def write_object(path, obj, digest):
+    write_file(path, dumps_object(obj, digest))
+
+
+def write_file(path, data):
+    # Best effort, like __pycache__: an unwritable location just means no cache
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
@@ -1,12 +1,44 @@
 from minilang.parser.ast import *
 from minilang.lexer.token import TokenType
+from minilang.parser.visitor import Visitor
 from .bytecode import OpCode, Instruction
 
 
-class Compiler:
-    def __init__(self):
+BINARY = {
+    TokenType.PLUS: OpCode.ADD,
+    TokenType.MINUS: OpCode.SUB,
+    TokenType.MUL: OpCode.MUL,
+    TokenType.DIV: OpCode.DIV,
+    TokenType.LT: OpCode.LT,
+    TokenType.GT: OpCode.GT,
+    TokenType.EQ: OpCode.EQ,
+}
+
+
+class Compiler(Visitor):
+    def __init__(self, tail_calls=True, symbols=None, externs=None):
         self.instructions = []
         self.functions = {}
+        self.tail_calls = tail_calls
+
+        # Calls to functions not compiled yet: (index, name, argc), patched
+        # at the end of the program. A call to one of `externs` (imported
+        # name -> number of parameters) keeps the name as its target, for
+        # the linker to resolve.
+        self.pending = []
+        self.externs = externs or {}
+
+        # name -> slot; locals is None while compiling top-level code
+        self.globals = {}
+        self.locals = None
+
+        # With the SemanticAnalyzer's SymbolTable every use comes resolved
+        # to a Binding in `scope`; without one, names are resolved here
+        self.symbols = symbols
+        self.scope = None
+        if symbols is not None:
+            self.globals = symbols.global_slots()
+            self.scope = symbols.globals
 
     # --------------------------------------------------
     # Emit helper
@@ -15,141 +47,209 @@ class Compiler:
         self.instructions.append(Instruction(opcode, operand))
 
     # --------------------------------------------------
-    # Main compile entry
+    # Name resolution
     # --------------------------------------------------
-    def compile(self, node):
-
-        # ================= PROGRAM =================
-        if isinstance(node, Program):
-            for stmt in node.statements:
-                self.compile(stmt)
-            self.emit(OpCode.HALT)
-            return self.instructions, self.functions
-
-        # ================= BLOCK =================
+    def global_slot(self, name):
+        if name not in self.globals:
+            self.globals[name] = len(self.globals)
+        return self.globals[name]
+
+    def resolve(self, name):
+        # (is_local, slot)
+        if self.scope is not None:
+            binding = self.scope.resolved[name]
+            return binding.depth > 0, binding.slot
+        if self.locals is not None and name in self.locals:
+            return True, self.locals[name]
+        return False, self.global_slot(name)
+
+    def emit_load(self, name):
+        local, slot = self.resolve(name)
+        self.emit(OpCode.LOAD_LOCAL if local else OpCode.LOAD_GLOBAL, slot)
+
+    def emit_store(self, name):
+        local, slot = self.resolve(name)
+        self.emit(OpCode.STORE_LOCAL if local else OpCode.STORE_GLOBAL, slot)
+
+    def collect_locals(self, node, names):
+        # Every `let` inside a function body (at any block depth) is a local
+        if isinstance(node, LetStatement):
+            if node.name not in names:
+                names[node.name] = len(names)
         elif isinstance(node, Block):
             for stmt in node.statements:
-                self.compile(stmt)
-
-        # ================= LET =================
-        elif isinstance(node, LetStatement):
-            self.compile(node.value)
-            self.emit(OpCode.STORE_VAR, node.name)
-
-        # ================= ASSIGN =================
-        elif isinstance(node, AssignStatement):
-            self.compile(node.value)
-            self.emit(OpCode.STORE_VAR, node.name)
-
-        # ================= PRINT =================
-        elif isinstance(node, PrintStatement):
-            self.compile(node.expression)
-            self.emit(OpCode.PRINT)
-
-        # ================= NUMBER =================
-        elif isinstance(node, Number):
-            self.emit(OpCode.PUSH_CONST, node.value)
-
-        # ================= IDENT =================
-        elif isinstance(node, Identifier):
-            self.emit(OpCode.LOAD_VAR, node.name)
-
-        # ================= BINARY =================
-        elif isinstance(node, BinaryOp):
-            self.compile(node.left)
-            self.compile(node.right)
-
-            if node.op.type == TokenType.PLUS:
-                self.emit(OpCode.ADD)
-            elif node.op.type == TokenType.MINUS:
-                self.emit(OpCode.SUB)
-            elif node.op.type == TokenType.MUL:
-                self.emit(OpCode.MUL)
-            elif node.op.type == TokenType.DIV:
-                self.emit(OpCode.DIV)
-            elif node.op.type == TokenType.LT:
-                self.emit(OpCode.LT)
-            elif node.op.type == TokenType.GT:
-                self.emit(OpCode.GT)
-            elif node.op.type == TokenType.EQ:
-                self.emit(OpCode.EQ)
-
-        # ================= IF =================
+                self.collect_locals(stmt, names)
         elif isinstance(node, IfStatement):
-            self.compile(node.condition)
+            self.collect_locals(node.then_branch, names)
+            if node.else_branch:
+                self.collect_locals(node.else_branch, names)
+        elif isinstance(node, WhileStatement):
+            self.collect_locals(node.body, names)
+        return names
 
-            jfalse = len(self.instructions)
-            self.emit(OpCode.JUMP_IF_FALSE, None)
+    # --------------------------------------------------
+    # Main compile entry
+    # --------------------------------------------------
+    def compile(self, node):
+        return self.visit(node)
 
-            self.compile(node.then_branch)
+    # ================= PROGRAM =================
+    def visit_Program(self, node):
+        for stmt in node.statements:
+            yield stmt
+        self.emit(OpCode.HALT)
+        self.resolve_calls()
+        return self.instructions, self.functions
 
-            if node.else_branch:
-                jend = len(self.instructions)
-                self.emit(OpCode.JUMP, None)
+    # ================= IMPORT =================
+    def visit_ImportStatement(self, node):
+        # Nothing to run here: the linker puts the module's code first
+        pass
 
-                self.instructions[jfalse].operand = len(self.instructions)
-                self.compile(node.else_branch)
-                self.instructions[jend].operand = len(self.instructions)
-            else:
-                self.instructions[jfalse].operand = len(self.instructions)
+    # ================= BLOCK =================
+    def visit_Block(self, node):
+        return node.statements
 
-        # ================= WHILE =================
-        elif isinstance(node, WhileStatement):
-            start = len(self.instructions)
+    # ================= LET / ASSIGN =================
+    def visit_LetStatement(self, node):
+        yield node.value
+        self.emit_store(node.name)
 
-            self.compile(node.condition)
+    visit_AssignStatement = visit_LetStatement
 
-            jfalse = len(self.instructions)
-            self.emit(OpCode.JUMP_IF_FALSE, None)
+    # ================= PRINT =================
+    def visit_PrintStatement(self, node):
+        yield node.expression
+        self.emit(OpCode.PRINT)
 
-            self.compile(node.body)
-            self.emit(OpCode.JUMP, start)
+    # ================= NUMBER =================
+    def visit_Number(self, node):
+        self.emit(OpCode.PUSH_CONST, node.value)
 
-            self.instructions[jfalse].operand = len(self.instructions)
+    # ================= IDENT =================
+    def visit_Identifier(self, node):
+        self.emit_load(node.name)
 
-        # ================= FUNCTION DEF =================
-        elif isinstance(node, FunctionDef):
-            func_start = len(self.instructions)
+    # ================= BINARY =================
+    def visit_BinaryOp(self, node):
+        yield node.left
+        yield node.right
+        self.emit(BINARY[node.op.type])
 
-            # Store function entry in table
-            self.functions[node.name] = (func_start, node.params)
+    # ================= IF =================
+    def visit_IfStatement(self, node):
+        yield node.condition
 
-            # FUNC_START placeholder → will patch end addr
-            self.emit(OpCode.FUNC_START, None)
+        jfalse = len(self.instructions)
+        self.emit(OpCode.JUMP_IF_FALSE, None)
 
-            # STORE params (reverse because stack order)
-            for p in reversed(node.params):
-                self.emit(OpCode.STORE_VAR, p)
+        yield node.then_branch
 
-            # Compile body
-            for stmt in node.body.statements:
-                self.compile(stmt)
+        if node.else_branch:
+            jend = len(self.instructions)
+            self.emit(OpCode.JUMP, None)
 
-            # Default return 0 if no explicit return
-            self.emit(OpCode.PUSH_CONST, 0)
-            self.emit(OpCode.RETURN)
+            self.instructions[jfalse].operand = len(self.instructions)
+            yield node.else_branch
+            self.instructions[jend].operand = len(self.instructions)
+        else:
+            self.instructions[jfalse].operand = len(self.instructions)
 
-            # Patch FUNC_START operand → function end
-            self.instructions[func_start].operand = len(self.instructions)
+    # ================= WHILE =================
+    def visit_WhileStatement(self, node):
+        start = len(self.instructions)
 
-        # ================= RETURN =================
-        elif isinstance(node, ReturnStatement):
-            self.compile(node.value)
-            self.emit(OpCode.RETURN)
+        yield node.condition
+
+        jfalse = len(self.instructions)
+        self.emit(OpCode.JUMP_IF_FALSE, None)
 
-        # ================= FUNCTION CALL =================
-        elif isinstance(node, CallExpression):
-            for arg in node.args:
-                self.compile(arg)
+        yield node.body
+        self.emit(OpCode.JUMP, start)
 
-            if node.name not in self.functions:
-                raise Exception(f"Undefined function: {node.name}")
+        self.instructions[jfalse].operand = len(self.instructions)
 
-            func_addr, params = self.functions[node.name]
+    # ================= FUNCTION DEF =================
+    def visit_FunctionDef(self, node):
+        func_start = len(self.instructions)
 
-            # IMPORTANT → ONLY (addr, argc)
-            self.emit(OpCode.CALL, (func_addr, len(node.args)))
+        # Params occupy the first slots, then every local `let`
+        if self.symbols is not None:
+            scope = self.symbols.functions[node.name]
+            local_slots = {name: b.slot for name, b in scope.slots.items()}
+        else:
+            scope = None
+            local_slots = self.collect_locals(node.body, {p: i for i, p in enumerate(node.params)})
+
+        # Store function entry in table
+        self.functions[node.name] = (func_start, node.params, len(local_slots))
+
+        # FUNC_START placeholder → will patch end addr
+        self.emit(OpCode.FUNC_START, None)
+
+        # Compile body (CALL already placed the args in slots 0..argc-1)
+        outer_locals, outer_scope = self.locals, self.scope
+        self.locals, self.scope = local_slots, scope
+        for stmt in node.body.statements:
+            yield stmt
+
+        # Default return 0 if no explicit return
+        self.emit(OpCode.PUSH_CONST, 0)
+        self.emit(OpCode.RETURN)
+
+        # Patch FUNC_START operand → function end
+        self.instructions[func_start].operand = len(self.instructions)
+        self.locals, self.scope = outer_locals, outer_scope
+
+    # ================= RETURN =================
+    def visit_ReturnStatement(self, node):
+        if (
+            self.tail_calls
+            and isinstance(node.value, CallExpression)
+            and self.locals is not None
+        ):
+            # `return f(...)`: the callee's RETURN goes straight to our
+            # caller, so it can take over this frame
+            yield from self.compile_call(node.value, OpCode.TAIL_CALL)
+        else:
+            yield node.value
+            self.emit(OpCode.RETURN)
+
+    # ================= FUNCTION CALL =================
+    def visit_CallExpression(self, node):
+        return self.compile_call(node, OpCode.CALL)
 
+    # --------------------------------------------------
+    # Calls
+    # --------------------------------------------------
+    def compile_call(self, node, opcode):
+        for arg in node.args:
+            yield arg
+
+        if node.name not in self.functions:
+            self.pending.append((len(self.instructions), node.name, len(node.args)))
+            self.emit(opcode, None)
+            return
+
+        # (addr, argc, frame size)
+        self.emit(opcode, self.call_target(node.name, len(node.args)))
+
+    def call_target(self, name, argc):
+        if name in self.functions:
+            addr, params, nlocals = self.functions[name]
+            expected = len(params)
+        elif name in self.externs:
+            # The target stays symbolic and the frame size is the linker's
+            addr, expected, nlocals = name, self.externs[name], 0
         else:
-            raise Exception(f"Unknown AST node: {type(node)}")
+            raise Exception(f"Undefined function: {name}")
+
+        if argc != expected:
+            raise Exception(f"Function '{name}' expects {expected} arguments, got {argc}")
+        return addr, argc, nlocals
 
+    def resolve_calls(self):
+        # Calls made before the callee's definition
+        for index, name, argc in self.pending:
+            self.instructions[index].operand = self.call_target(name, argc)
+        self.pending = []
@@ -0,0 +1,448 @@
+import hashlib
+import re
+from array import array
+
+from minilang.lexer.regex_lexer import RegexLexer
+from minilang.lexer.token import TokenType
+from minilang.parser.ast import *
+from minilang.parser.parser import Parser
+from minilang.semantic.semantic_analyzer import SemanticAnalyzer
+from .bytecode import OpCode, CALLS
+from .compiler import Compiler
+from .optimizer import Optimizer, PASSES
+from .packed import PackedCode
+
+
+# Braces and the `fn` keyword are all the splitter needs to see. Plain
+# alternatives scan several times faster than a class or `\b`; whether
+# "fn" is a whole word is checked only for the few hits at depth 0.
+SCAN = re.compile(r"\{|\}|fn")
+
+# Opcodes the unoptimized compiler emits with an address operand
+ADDRESSES = {OpCode.JUMP, OpCode.JUMP_IF_FALSE, OpCode.FUNC_START}
+
+HALT = OpCode.HALT.value
+
+# The SemanticAnalyzer's errors for the checks a chunk leaves to the
+# rest of the program, by kind
+CHECKS = {
+    "use": "Semantic Error: Variable '{}' used before declaration",
+    "let": "Semantic Error: Variable '{}' already declared",
+    "call": "Semantic Error: Function '{}' not defined",
+}
+
+
+def split(source):
+    """
+    Cut `source` at top-level `fn` boundaries: every top-level function
+    definition is one chunk and so is the code between two of them.
+    A `fn` that is the body of an unbraced `if`/`else`/`while` stays in
+    its statement's chunk. Only braces are counted, so a malformed file
+    still splits somewhere and the parser reports the error.
+    """
+    return [text for _, text in spans(source)]
+
+
+def spans(source):
+    # The chunks of `split`, each with its offset in `source`
+    chunks = []
+    depth = 0
+    start = 0  # where the pending top-level code starts
+    function = None  # start of the top-level `fn` being scanned
+    for m in SCAN.finditer(source):
+        token = m.group()
+        if token == "{":
+            depth += 1
+        elif token == "}":
+            depth -= 1
+            if depth == 0 and function is not None:
+                chunks.append((function, source[function:m.end()]))
+                start, function = m.end(), None
+        elif depth == 0 and function is None and keyword_statement(source, m.start()):
+            if not source[start:m.start()].isspace() and m.start() > start:
+                chunks.append((start, source[start:m.start()]))
+            function = m.start()
+
+    start = start if function is None else function
+    rest = source[start:]
+    if rest and not rest.isspace():
+        chunks.append((start, rest))
+    return chunks
+
+
+def keyword_statement(source, pos):
+    # The word `fn` after `;`, `}` or nothing: a statement of its own
+    end = pos + 2
+    if end < len(source) and (source[end].isalnum() or source[end] == "_"):
+        return False
+    i = pos - 1
+    while i >= 0 and source[i].isspace():
+        i -= 1
+    return i < 0 or source[i] in ";}"
+
+
+def digest(text):
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+class ChunkAnalyzer(SemanticAnalyzer):
+    """
+    `SemanticAnalyzer` for one chunk. What depends on the other chunks
+    is not decided here but listed in `checks`, in analysis order:
+    ("use", name) for a global that must be declared by an earlier chunk,
+    ("let", name) for one that must not be, ("call", name) for a function
+    defined in another chunk.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.checks = {}  # (kind, name) -> None, in first-seen order
+
+    def check(self, kind, name):
+        self.checks.setdefault((kind, name))
+
+    def visit_LetStatement(self, node):
+        if not self.symbols.exists(node.name):
+            self.check("let", node.name)
+        return super().visit_LetStatement(node)
+
+    def visit_CallExpression(self, node):
+        if node.name not in self.functions:
+            self.check("call", node.name)
+            return node.args
+        return super().visit_CallExpression(node)
+
+    def access(self, name):
+        if self.symbols.lookup(name) is None:
+            self.check("use", name)
+            return
+        super().access(name)
+
+
+class Front:
+    """
+    Tokens of one chunk, the names it mentions, declares and assigns, and
+    its semantic analysis: the `checks` left to the rest of the program,
+    the globals it `declares`, the functions it `defines` at any depth and
+    the first `error` found within the chunk itself, if any.
+    """
+
+    __slots__ = ("tokens", "ast", "mentions", "lets", "assigned", "checks", "declares", "defines", "error")
+
+    def __init__(self, text, lexer, offset=0):
+        self.tokens = list(lexer(text).tokens())
+        # Positions in the whole file, for the parser's errors. Only a
+        # chunk that parses is cached, so later moves don't matter.
+        for token in self.tokens:
+            token.position += offset
+        self.ast = Parser(self.tokens).parse()
+        self.mentions = frozenset(t.value for t in self.tokens if t.type == TokenType.IDENT)
+
+        # Checks found before a local error still come first
+        analyzer = ChunkAnalyzer()
+        self.error = None
+        try:
+            analyzer.analyze(self.ast)
+        except Exception as e:
+            self.error = str(e)
+        self.checks = tuple(analyzer.checks)
+        self.declares = tuple(analyzer.symbols.globals.declared)
+
+        # Declarations at any depth, for the optimizer's constant candidates
+        self.lets = {}
+        self.assigned = set()
+        self.defines = []
+        work = [self.ast]
+        while work:
+            node = work.pop()
+            if isinstance(node, (Program, Block)):
+                work.extend(node.statements)
+            elif isinstance(node, LetStatement):
+                self.lets[node.name] = self.lets.get(node.name, 0) + 1
+            elif isinstance(node, AssignStatement):
+                self.assigned.add(node.name)
+            elif isinstance(node, IfStatement):
+                work.append(node.then_branch)
+                if node.else_branch is not None:
+                    work.append(node.else_branch)
+            elif isinstance(node, WhileStatement):
+                work.append(node.body)
+            elif isinstance(node, FunctionDef):
+                self.defines.append(node.name)
+                work.append(node.body)
+
+    def tree(self):
+        # The optimizer rewrites trees in place: the first compile gets the
+        # tree parsed above, later ones a new parse of the cached tokens
+        # (several times cheaper than a deepcopy)
+        ast, self.ast = self.ast, None
+        return ast if ast is not None else Parser(self.tokens).parse()
+
+
+class Unit:
+    """
+    Position-independent code of one chunk.
+
+    Global slots and constant indices are final (the IncrementalCompiler
+    never renumbers them), addresses are relative to the chunk start and
+    CALL operands are left for the linker: `calls` lists
+    (index, name, argc, local) where `local` is the position in `defs` of
+    a function defined earlier in the same chunk, else None. `defs` lists
+    (name, addr, argc, nlocals) in definition order and `exports` the
+    top-level constants the chunk adds for the optimizer. If the chunk
+    makes the program's first top-level call, `early` holds the exports
+    set before it (see Optimizer.settled), else it is None.
+    """
+
+    __slots__ = ("ops", "args", "jumps", "calls", "defs", "exports", "early", "linked")
+
+    def __init__(self, ops, args, jumps, calls, defs, exports, early=None):
+        self.ops = ops
+        self.args = args
+        self.jumps = jumps
+        self.calls = calls
+        self.defs = defs
+        self.exports = exports
+        self.early = early
+        self.linked = None  # (base, call targets, relocated args) of the last link
+
+
+class UnitCompiler(Compiler):
+    """`Compiler` for one chunk: globals from a shared table, calls left symbolic."""
+
+    def __init__(self, global_slots, tail_calls=True):
+        super().__init__(tail_calls)
+        self.globals = global_slots
+        self.defs = []
+        self.latest = {}  # function name -> index in defs
+        self.calls = []
+
+    def visit_FunctionDef(self, node):
+        slots = self.collect_locals(node.body, {p: i for i, p in enumerate(node.params)})
+        self.latest[node.name] = len(self.defs)
+        self.defs.append((node.name, len(self.instructions), len(node.params), len(slots)))
+        return super().visit_FunctionDef(node)
+
+    def compile_call(self, node, opcode):
+        for arg in node.args:
+            yield arg
+
+        local = self.latest.get(node.name)
+        if local is not None and len(node.args) != self.defs[local][2]:
+            raise Exception(
+                f"Function '{node.name}' expects {self.defs[local][2]} arguments, got {len(node.args)}"
+            )
+        self.calls.append((len(self.instructions), node.name, len(node.args), local))
+        self.emit(opcode, None)
+
+
+class IncrementalCompiler:
+    """
+    Recompiles a program after an edit by redoing only what changed.
+
+    The source is split at top-level `fn` boundaries and each chunk's
+    tokens and bytecode are cached under the sha256 of its text. A
+    chunk is compiled again when its text changes or when something it
+    depends on does: a constant it reads, or whether a name it mentions
+    is still a propagatable constant. Callers of a changed function are
+    only relinked, which re-resolves (and re-checks) their calls. Each
+    chunk is analyzed once, when parsed; every build only replays the
+    checks that depend on the other chunks, so it rejects the programs
+    the SemanticAnalyzer rejects, with the same errors.
+    Linking concatenates the chunks and patches the jump and call
+    operands of those that moved; the rest reuse their last link.
+
+    The code matches `compile_source(..., peephole=False, inline=0)`:
+    the peephole pass and the inliner work on the whole program, so they
+    are left to full builds. Global slots and the constant pool are kept
+    across builds, so a global keeps its slot for the whole session.
+    """
+
+    def __init__(self, optimize=True, lexer=RegexLexer):
+        self.optimize = optimize
+        self.lexer = lexer
+        self.fronts = {}  # digest -> Front
+        self.units = {}  # (digest, context) -> Unit
+        self.global_slots = {}
+        self.consts = []
+        self.const_index = {}
+        self.stats = {}
+
+    def compile(self, source):
+        """Compile `source` into a `PackedCode`, reusing earlier work."""
+        self.stats = {"chunks": 0, "parsed": 0, "compiled": 0, "relinked": 0}
+        chunks = [(digest(text), text, offset) for offset, text in spans(source)]
+        self.stats["chunks"] = len(chunks)
+
+        fronts = {}
+        for key, text, offset in chunks:
+            if key not in fronts:
+                fronts[key] = self.fronts.get(key)
+                if fronts[key] is None:
+                    fronts[key] = Front(text, self.lexer, offset)
+                    self.stats["parsed"] += 1
+        self.fronts = fronts
+        self.analyze([fronts[key] for key, _, _ in chunks])
+
+        candidates = self.candidates([fronts[key] for key, _, _ in chunks]) if self.optimize else set()
+        constants = {}
+        settled = None  # constants set before the first top-level call
+        units = {}
+        program = []
+        for key, _, _ in chunks:
+            front = fronts[key]
+            context = (
+                key,
+                tuple(sorted((n, constants[n]) for n in front.mentions if n in constants)),
+                tuple(sorted(front.mentions & candidates)),
+                None if settled is None else tuple(sorted(front.mentions & settled)),
+            )
+            unit = units.get(context) or self.units.get(context)
+            if unit is None:
+                unit = self.compile_unit(front, candidates, constants, settled)
+                self.stats["compiled"] += 1
+            units[context] = unit
+            if settled is None and unit.early is not None:
+                settled = set(constants) | unit.early
+            constants.update(unit.exports)
+            program.append(unit)
+        self.units = units
+        return self.link(program)
+
+    def candidates(self, fronts):
+        # Optimizer.propagatable over the whole program, from the chunk summaries
+        lets = {}
+        assigned = set()
+        for front in fronts:
+            for name, count in front.lets.items():
+                lets[name] = lets.get(name, 0) + count
+            assigned |= front.assigned
+        return {name for name, count in lets.items() if count == 1 and name not in assigned}
+
+    def analyze(self, fronts):
+        # SemanticAnalyzer.visit_Program collects every function first
+        functions = set()
+        for front in fronts:
+            for name in front.defines:
+                if name in functions:
+                    raise Exception(f"Semantic Error: Function '{name}' already defined")
+                functions.add(name)
+
+        declared = set()
+        for front in fronts:
+            for kind, name in front.checks:
+                if kind == "call":
+                    ok = name in functions
+                else:
+                    ok = (name in declared) == (kind == "use")
+                if not ok:
+                    raise Exception(CHECKS[kind].format(name))
+            if front.error is not None:
+                raise Exception(front.error)
+            declared.update(front.declares)
+
+    # --------------------------------------------------
+    # One chunk
+    # --------------------------------------------------
+    def compile_unit(self, front, candidates, constants, settled):
+        ast = front.tree()
+        for stmt in ast.statements:
+            if isinstance(stmt, ImportStatement):
+                raise Exception(f"Cannot import '{stmt.name}': incremental builds do not link modules")
+
+        exports = {}
+        early = None
+        if self.optimize:
+            optimizer = Optimizer()
+            optimizer.stats = {name: 0 for name in PASSES}
+            optimizer.candidates = candidates
+            optimizer.constants = dict(constants)
+            optimizer.settled = settled
+            ast = optimizer.visit(ast)
+            exports = {
+                name: value for name, value in optimizer.constants.items() if name not in constants
+            }
+            if settled is None and optimizer.settled is not None:
+                early = frozenset(optimizer.settled - constants.keys())
+
+        compiler = UnitCompiler(self.global_slots)
+        for stmt in ast.statements:
+            compiler.compile(stmt)
+
+        ops = array("B")
+        args = array("i")
+        jumps = []
+        for index, instr in enumerate(compiler.instructions):
+            op, arg = instr.opcode, instr.operand
+            if op == OpCode.PUSH_CONST:
+                if arg not in self.const_index:
+                    self.const_index[arg] = len(self.consts)
+                    self.consts.append(arg)
+                arg = self.const_index[arg]
+            elif op in ADDRESSES:
+                jumps.append(index)
+            elif op in CALLS or arg is None:
+                arg = 0
+            ops.append(op.value)
+            args.append(arg)
+        return Unit(ops, args, jumps, compiler.calls, compiler.defs, exports, early)
+
+    # --------------------------------------------------
+    # Linking
+    # --------------------------------------------------
+    def link(self, program):
+        ops = array("B")
+        args = array("i")
+        functions = []
+        function_names = []
+        defined = {}  # name -> index in functions of its latest definition
+
+        # A call before any definition goes to the last one further down
+        last = {}
+        arity = []
+        for unit in program:
+            for name, _, argc, _ in unit.defs:
+                last[name] = len(arity)
+                arity.append(argc)
+
+        for unit in program:
+            base = len(ops)
+            first = len(functions)
+            targets = tuple(
+                first + local if local is not None else self.resolve(name, argc, defined, last, arity)
+                for _, name, argc, local in unit.calls
+            )
+
+            if unit.linked is not None and unit.linked[:2] == (base, targets):
+                relocated = unit.linked[2]
+            else:
+                relocated = array("i", unit.args)
+                for index in unit.jumps:
+                    relocated[index] += base
+                for (index, _, _, _), target in zip(unit.calls, targets):
+                    relocated[index] = target
+                unit.linked = (base, targets, relocated)
+                self.stats["relinked"] += 1
+
+            ops += unit.ops
+            args += relocated
+            for name, addr, argc, nlocals in unit.defs:
+                defined[name] = len(functions)
+                functions.append((base + addr, argc, nlocals))
+                function_names.append(name)
+
+        ops.append(HALT)
+        args.append(0)
+        names = {
+            "functions": function_names,
+            "globals": sorted(self.global_slots, key=self.global_slots.get),
+        }
+        return PackedCode(ops, args, list(self.consts), functions, names, len(self.global_slots))
+
+    def resolve(self, name, argc, defined, last, arity):
+        index = defined.get(name, last.get(name))
+        if index is None:
+            raise Exception(f"Undefined function: {name}")
+        if arity[index] != argc:
+            raise Exception(f"Function '{name}' expects {arity[index]} arguments, got {argc}")
+        return index
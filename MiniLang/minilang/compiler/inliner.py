@@ -0,0 +1,225 @@
+from .bytecode import OpCode, Instruction, CALLS
+from .peephole import branch_target, set_branch_target, link, unlink
+
+
+# Largest function body (in instructions, FUNC_START excluded) to inline
+MAX_SIZE = 12
+
+# (load, store) for the callee's slots: inside a function they become
+# extra caller locals, in top-level code hidden global slots
+SCOPES = {
+    "local": (OpCode.LOAD_LOCAL, OpCode.STORE_LOCAL),
+    "global": (OpCode.LOAD_GLOBAL, OpCode.STORE_GLOBAL),
+}
+
+# Opcodes the inliner knows how to relocate; it runs before the peephole pass
+INLINABLE = {
+    OpCode.PUSH_CONST,
+    OpCode.LOAD_LOCAL,
+    OpCode.STORE_LOCAL,
+    OpCode.LOAD_GLOBAL,
+    OpCode.STORE_GLOBAL,
+    OpCode.ADD,
+    OpCode.SUB,
+    OpCode.MUL,
+    OpCode.DIV,
+    OpCode.LT,
+    OpCode.GT,
+    OpCode.EQ,
+    OpCode.JUMP,
+    OpCode.JUMP_IF_FALSE,
+    OpCode.PRINT,
+    OpCode.CALL,
+    OpCode.TAIL_CALL,
+    OpCode.RETURN,
+}
+
+MAIN = "<main>"
+
+
+class Inliner:
+    """
+    Replaces calls to small non-recursive functions by a copy of their body.
+
+    Works on the `(instructions, functions)` output of `Compiler.compile`,
+    before the peephole pass. At each call site the arguments, already on
+    the stack, are stored into fresh slots of the caller; the callee's
+    parameter and local slots are renamed to those, and its RETURNs jump
+    past the copy with the result on the stack. Sites are expanded one at a
+    time, so every site of a caller shares the same extra slots.
+
+    Functions stay in the program (and callable) even when every call to
+    them was inlined. `inlined` lists (caller, callee) per expanded site.
+    """
+
+    def __init__(self, max_size=MAX_SIZE):
+        self.max_size = max_size
+        self.inlined = []
+
+    def inline(self, instructions, functions, num_globals=None):
+        self.inlined = []
+        if num_globals is None:
+            num_globals = max(
+                (i.operand + 1 for i in instructions if i.opcode in (OpCode.LOAD_GLOBAL, OpCode.STORE_GLOBAL)),
+                default=0,
+            )
+
+        code = link(instructions)
+        position = {id(instr): i for i, instr in enumerate(code)}
+        self.entries = {name: code[addr] for name, (addr, _, _) in functions.items()}
+        self.names = {id(entry): name for name, entry in self.entries.items()}
+        self.signatures = {name: (len(params), nlocals) for name, (_, params, nlocals) in functions.items()}
+        # Pristine copies: the definitions themselves get rewritten below
+        self.bodies = {
+            name: self.copy(code[position[id(entry)] + 1:position[id(entry.operand)]])
+            for name, entry in self.entries.items()
+        }
+        self.candidates = self.select()
+
+        # Callee slots start past the caller's own frame (MAIN: the globals)
+        # and the frame grows to fit the deepest expansion
+        self.bases = {name: nlocals for name, (_, nlocals) in self.signatures.items()}
+        self.bases[MAIN] = num_globals
+        self.frames = dict(self.bases)
+
+        code = self.rewrite_program(code)
+
+        instructions = unlink(code)
+        addr = {id(instr): i for i, instr in enumerate(code)}
+        functions = {
+            name: (addr[id(self.entries[name])], params, self.frames[name])
+            for name, (_, params, _) in functions.items()
+        }
+        frame_at = {a: nlocals for a, _, nlocals in functions.values()}
+        for instr in instructions:
+            if instr.opcode in CALLS:
+                target, argc, _ = instr.operand
+                instr.operand = (target, argc, frame_at[target])
+        return instructions, functions
+
+    def report(self):
+        counts = {}
+        for site in self.inlined:
+            counts[site] = counts.get(site, 0) + 1
+        return [
+            f"inlined {callee} into {caller} ({n} site{'s' if n > 1 else ''})"
+            for (caller, callee), n in counts.items()
+        ]
+
+    # --------------------------------------------------
+    # Call graph
+    # --------------------------------------------------
+    def callee(self, instr):
+        if instr.opcode in CALLS:
+            return self.names[id(instr.operand[0])]
+        return None
+
+    def select(self):
+        graph = {
+            name: {self.callee(i) for i in body if i.opcode in CALLS}
+            for name, body in self.bodies.items()
+        }
+
+        def recursive(name):
+            seen = set()
+            work = list(graph[name])
+            while work:
+                current = work.pop()
+                if current == name:
+                    return True
+                if current not in seen:
+                    seen.add(current)
+                    work.extend(graph[current])
+            return False
+
+        return {
+            name
+            for name, body in self.bodies.items()
+            if len(body) <= self.max_size
+            and all(i.opcode in INLINABLE for i in body)
+            and not recursive(name)
+        }
+
+    # --------------------------------------------------
+    # Rewriting
+    # --------------------------------------------------
+    def rewrite_program(self, code):
+        result = []
+        scope = []  # (function, end instruction) of enclosing bodies
+        for i, instr in enumerate(code):
+            while scope and scope[-1][1] is instr:
+                scope.pop()
+            caller = scope[-1][0] if scope else MAIN
+
+            if instr.opcode == OpCode.FUNC_START:
+                scope.append((self.names[id(instr)], instr.operand))
+                result.append(instr)
+            elif self.callee(instr) in self.candidates:
+                kind = "global" if caller == MAIN else "local"
+                result += self.expand(instr, code[i + 1], caller, self.bases[caller], kind)
+            else:
+                result.append(instr)
+        return result
+
+    def rewrite(self, seq, caller, base, kind):
+        # Expand the calls inside an already inlined body
+        result = []
+        for j, instr in enumerate(seq):
+            if self.callee(instr) in self.candidates:
+                result += self.expand(instr, seq[j + 1] if j + 1 < len(seq) else None, caller, base, kind)
+            else:
+                result.append(instr)
+        return result
+
+    def expand(self, site, after, caller, base, kind):
+        callee = self.callee(site)
+        argc, nlocals = self.signatures[callee]
+        load, store = SCOPES[kind]
+        # `return g(...)`: g's RETURNs can return from the caller directly
+        tail = site.opcode == OpCode.TAIL_CALL
+
+        self.inlined.append((caller, callee))
+        self.frames[caller] = max(self.frames[caller], base + nlocals)
+
+        # Arguments are on the stack, last on top; other slots start at 0
+        out = [Instruction(store, base + slot) for slot in reversed(range(argc))]
+        for slot in range(argc, nlocals):
+            out += [Instruction(OpCode.PUSH_CONST, 0), Instruction(store, base + slot)]
+
+        for instr in self.copy(self.bodies[callee]):
+            if instr.opcode == OpCode.LOAD_LOCAL:
+                instr.opcode, instr.operand = load, base + instr.operand
+            elif instr.opcode == OpCode.STORE_LOCAL:
+                instr.opcode, instr.operand = store, base + instr.operand
+            elif instr.opcode == OpCode.RETURN and not tail:
+                instr.opcode, instr.operand = OpCode.JUMP, after
+            elif instr.opcode == OpCode.TAIL_CALL and not tail:
+                # Would replace the caller's frame: call, then leave the copy
+                instr.opcode = OpCode.CALL
+                out.append(instr)
+                out.append(Instruction(OpCode.JUMP, after))
+                continue
+            out.append(instr)
+
+        out = self.rewrite(out, caller, base + nlocals, kind)
+
+        # Jumps aimed at the call now land on the first instruction of the copy
+        first = out[0]
+        site.opcode, site.operand = first.opcode, first.operand
+        return [site] + self.retarget(out[1:], first, site)
+
+    def copy(self, body):
+        # Fresh instructions, with jumps inside the body kept inside the copy
+        clones = {id(b): Instruction(b.opcode, b.operand) for b in body}
+        for b in body:
+            target = branch_target(b)
+            if target is not None:
+                set_branch_target(clones[id(b)], clones[id(target)])
+        return [clones[id(b)] for b in body]
+
+    def retarget(self, seq, old, new):
+        for instr in seq:
+            target = branch_target(instr)
+            if target is old:
+                set_branch_target(instr, new)
+        return seq
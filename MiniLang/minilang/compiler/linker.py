@@ -0,0 +1,174 @@
+from array import array
+
+from .bytecode import OpCode, CALLS
+from .packed import PackedCode
+
+
+# Operands the linker rewrites, by relocation kind
+RELOCATIONS = {
+    OpCode.JUMP: "code",
+    OpCode.JUMP_IF_FALSE: "code",
+    OpCode.FUNC_START: "code",
+    OpCode.LOAD_GLOBAL: "global",
+    OpCode.STORE_GLOBAL: "global",
+    OpCode.PUSH_CONST: "const",
+}
+
+# Local slots are frame-relative and stay as they are
+PLAIN = {OpCode.LOAD_LOCAL, OpCode.STORE_LOCAL}
+
+HALT = OpCode.HALT.value
+
+
+class ObjectCode:
+    """
+    Relocatable code of one separately compiled module.
+
+    `ops` and `args` are numbered as if the module were the whole
+    program, without the final HALT: the linker places the module's
+    top-level code before the code of whatever imports it, so it runs
+    once, first. The tables say what linking changes:
+
+        relocations  {"code": [...], "global": [...], "const": [...]}:
+                     indices of operands that are an address in this
+                     object, a slot in `globals` or an index in `consts`
+        calls        (index, name, argc) of every CALL and TAIL_CALL,
+                     whose operand becomes the callee's function index
+        symbols      name -> (addr, params, nlocals) of the functions
+                     defined here, which every module may call
+        imports      modules the source imports, in order
+
+    `pure` lists the functions the SemanticAnalyzer found pure.
+    """
+
+    __slots__ = ("name", "ops", "args", "consts", "relocations", "calls", "symbols", "globals", "imports", "pure")
+
+    def __init__(self, name, ops, args, consts, relocations, calls, symbols, globals, imports, pure=()):
+        self.name = name
+        self.ops = ops  # array('B')
+        self.args = args  # array('i')
+        self.consts = consts
+        self.relocations = relocations
+        self.calls = calls
+        self.symbols = symbols
+        self.globals = globals  # names by slot
+        self.imports = imports
+        self.pure = list(pure)
+
+    def __len__(self):
+        return len(self.ops)
+
+    def exports(self):
+        # What an importer's analyzer and compiler need: name -> argc
+        return {name: len(params) for name, (_, params, _) in self.symbols.items()}
+
+
+def assemble(name, instructions, functions, global_slots, imports=(), pure=()):
+    """
+    Turn the `(instructions, functions)` output of `Compiler.compile` and
+    its `globals` table into an `ObjectCode`. Calls to imported functions
+    come with the callee's name in place of an address.
+    """
+    entry_names = {addr: fname for fname, (addr, _, _) in functions.items()}
+    ops = array("B")
+    args = array("i")
+    consts = []
+    const_index = {}
+    relocations = {"code": [], "global": [], "const": []}
+    calls = []
+
+    # The final HALT is the linker's to add
+    for index, instr in enumerate(instructions[:-1]):
+        op, arg = instr.opcode, instr.operand
+        kind = RELOCATIONS.get(op)
+        if kind == "const":
+            if arg not in const_index:
+                const_index[arg] = len(consts)
+                consts.append(arg)
+            arg = const_index[arg]
+        elif op in CALLS:
+            target, argc, _ = arg
+            calls.append((index, entry_names.get(target, target), argc))
+            arg = 0
+        elif kind is None and op not in PLAIN:
+            arg = 0
+        if kind is not None:
+            relocations[kind].append(index)
+        ops.append(op.value)
+        args.append(arg)
+
+    symbols = {fname: (addr, list(params), nlocals) for fname, (addr, params, nlocals) in functions.items()}
+    globals_ = sorted(global_slots, key=global_slots.get)
+    return ObjectCode(name, ops, args, consts, relocations, calls, symbols, globals_, list(imports), pure)
+
+
+def link(objects):
+    """
+    Link `objects` (every module a program uses, each after the modules
+    it imports, the program itself last) into one program. Returns
+    `(instructions, functions, globals)` like the compiler does for a
+    single source, ready for the inliner, the peephole pass and `pack`.
+    Globals stay private to their module: those of an imported module
+    are named `module.name`.
+    """
+    # The symbol table first: a call may go to a module linked later
+    defined = {}  # function name -> (index, module)
+    functions = {}
+    table = []
+    base = 0
+    for obj in objects:
+        for name, (addr, params, nlocals) in obj.symbols.items():
+            if name in defined:
+                owner = defined[name][1] or "the program"
+                raise Exception(f"Duplicate symbol: {name} (in {obj.name or 'the program'} and {owner})")
+            defined[name] = (len(table), obj.name)
+            table.append((base + addr, len(params), nlocals))
+            functions[name] = (base + addr, params, nlocals)
+        base += len(obj)
+
+    ops = array("B")
+    args = array("i")
+    consts = []
+    const_index = {}
+    global_slots = {}
+    for obj in objects:
+        base = len(ops)
+        global_base = len(global_slots)
+        for name in obj.globals:
+            global_slots[f"{obj.name}.{name}" if obj.name else name] = len(global_slots)
+
+        pool = []  # object const index -> program const index
+        for value in obj.consts:
+            if value not in const_index:
+                const_index[value] = len(consts)
+                consts.append(value)
+            pool.append(const_index[value])
+
+        relocated = array("i", obj.args)
+        for index in obj.relocations["code"]:
+            relocated[index] += base
+        for index in obj.relocations["global"]:
+            relocated[index] += global_base
+        for index in obj.relocations["const"]:
+            relocated[index] = pool[relocated[index]]
+        for index, name, argc in obj.calls:
+            relocated[index] = resolve(name, argc, defined, table)
+
+        ops += obj.ops
+        args += relocated
+
+    ops.append(HALT)
+    args.append(0)
+    # Decoded back into Instructions, CALL operands as (addr, argc, nlocals)
+    names = {"functions": list(functions), "globals": list(global_slots)}
+    code = PackedCode(ops, args, consts, table, names, len(global_slots))
+    return code.instructions(), functions, global_slots
+
+
+def resolve(name, argc, defined, table):
+    if name not in defined:
+        raise Exception(f"Undefined function: {name}")
+    index = defined[name][0]
+    if table[index][1] != argc:
+        raise Exception(f"Function '{name}' expects {table[index][1]} arguments, got {argc}")
+    return index
@@ -1,37 +1,296 @@
+import operator
+
 from minilang.parser.ast import *
+from minilang.parser.visitor import Visitor
+from minilang.lexer.token import TokenType
+
+
+FOLD = {
+    TokenType.PLUS: operator.add,
+    TokenType.MINUS: operator.sub,
+    TokenType.MUL: operator.mul,
+    TokenType.DIV: operator.floordiv,  # the VMs divide with //
+    TokenType.LT: lambda a, b: 1 if a < b else 0,
+    TokenType.GT: lambda a, b: 1 if a > b else 0,
+    TokenType.EQ: lambda a, b: 1 if a == b else 0,
+}
+
+PASSES = ("fold", "propagate", "prune_branches", "prune_loops", "simplify")
+
+
+def declares(node):
+    # True if a `let` appears anywhere under node. Scopes are flat, so
+    # dropping such a statement could change what later names resolve to.
+    if isinstance(node, LetStatement):
+        return True
+    if isinstance(node, Block):
+        return any(declares(s) for s in node.statements)
+    if isinstance(node, IfStatement):
+        return declares(node.then_branch) or (
+            node.else_branch is not None and declares(node.else_branch)
+        )
+    if isinstance(node, WhileStatement):
+        return declares(node.body)
+    return False
+
+
+def has_effect(node):
+    # True if evaluating node may print (a call) or fail (a division)
+    work = [node]
+    while work:
+        node = work.pop()
+        if isinstance(node, CallExpression):
+            return True
+        if isinstance(node, BinaryOp):
+            if node.op.type == TokenType.DIV:
+                return True
+            work += (node.left, node.right)
+    return False
+
+
+def same_variable(left, right):
+    return isinstance(left, Identifier) and isinstance(right, Identifier) and left.name == right.name
+
+
+class Optimizer(Visitor):
+    """
+    AST-level optimizer. Every pass can be switched off by name:
+
+        fold            evaluate operators on constant operands
+        propagate       replace reads of constant, never-reassigned `let`s
+        prune_branches  keep only the taken side of `if (constant)`
+        prune_loops     drop `while (constant false)`
+        simplify        algebraic identities such as x*1, x+0, x-x
 
+    `stats` counts the rewrites of the last `optimize` call.
+    """
 
-class Optimizer:
+    def __init__(self, fold=True, propagate=True, prune_branches=True, prune_loops=True, simplify=True):
+        self.fold = fold
+        self.propagate = propagate
+        self.prune_branches = prune_branches
+        self.prune_loops = prune_loops
+        self.simplify = simplify
+        self.stats = {}
+
+        self.candidates = set()
+        self.constants = {}  # propagated name -> value visible at this point
+        self.conditional = 0  # > 0 inside if/while bodies of the current scope
+        self.depth = 0  # function nesting
+        # Top-level constants set before the first top-level call: the only
+        # ones every function body can rely on, since a call may run a
+        # function defined further down
+        self.settled = None
+        # The top-level constants the outermost enclosing function sees
+        self.visible = {}
 
     def optimize(self, node):
         if isinstance(node, Program):
-            node.statements = [self.optimize(s) for s in node.statements]
-            return node
+            self.stats = {name: 0 for name in PASSES}
+            self.candidates = self.propagatable(node) if self.propagate else set()
+            self.constants = {}
+            self.conditional = 0
+            self.depth = 0
+            self.settled = None
+            self.visible = {}
+        return self.visit(node)
 
-        elif isinstance(node, BinaryOp):
-            left = self.optimize(node.left)
-            right = self.optimize(node.right)
-
-            if isinstance(left, Number) and isinstance(right, Number):
-                if node.op.type.name == "PLUS":
-                    return Number(left.value + right.value)
-                if node.op.type.name == "MINUS":
-                    return Number(left.value - right.value)
-                if node.op.type.name == "MUL":
-                    return Number(left.value * right.value)
-                if node.op.type.name == "DIV":
-                    return Number(left.value // right.value)
-
-            node.left = left
-            node.right = right
-            return node
+    # --------------------------------------------------
+    # Constant propagation bookkeeping
+    # --------------------------------------------------
+    def propagatable(self, program):
+        # Names declared by a single `let` in the whole program and never
+        # assigned: whatever scope that `let` is in, its value is final
+        lets = {}
+        assigned = set()
+        work = [program]
+        while work:
+            node = work.pop()
+            if isinstance(node, (Program, Block)):
+                work.extend(node.statements)
+            elif isinstance(node, LetStatement):
+                lets[node.name] = lets.get(node.name, 0) + 1
+            elif isinstance(node, AssignStatement):
+                assigned.add(node.name)
+            elif isinstance(node, IfStatement):
+                work.append(node.then_branch)
+                if node.else_branch is not None:
+                    work.append(node.else_branch)
+            elif isinstance(node, WhileStatement):
+                work.append(node.body)
+            elif isinstance(node, FunctionDef):
+                work.append(node.body)
+        return {name for name, count in lets.items() if count == 1 and name not in assigned}
 
-        elif isinstance(node, LetStatement):
-            node.value = self.optimize(node.value)
-            return node
+    # --------------------------------------------------
+    # Statements
+    # --------------------------------------------------
+    def statements(self, statements):
+        # A statement optimized away comes back as None
+        result = []
+        for stmt in statements:
+            stmt = yield stmt
+            if stmt is not None:
+                result.append(stmt)
+        return result
 
-        elif isinstance(node, PrintStatement):
-            node.expression = self.optimize(node.expression)
-            return node
+    def branch(self, node):
+        # if/while bodies may run zero times: lets in them are not constant
+        self.conditional += 1
+        node = yield node
+        self.conditional -= 1
+        return node if node is not None else Block([])
+
+    def generic_visit(self, node):
+        return node
+
+    # ---------------- PROGRAM / BLOCK ----------------
+    def visit_Program(self, node):
+        node.statements = yield from self.statements(node.statements)
+        return node
+
+    visit_Block = visit_Program
+
+    # ---------------- LET ----------------
+    def visit_LetStatement(self, node):
+        node.value = yield node.value
+        if (
+            node.name in self.candidates
+            and not self.conditional
+            and isinstance(node.value, Number)
+        ):
+            self.constants[node.name] = node.value.value
+        return node
 
+    # ---------------- ASSIGN / PRINT / RETURN ----------------
+    def visit_AssignStatement(self, node):
+        node.value = yield node.value
         return node
+
+    visit_ReturnStatement = visit_AssignStatement
+
+    def visit_PrintStatement(self, node):
+        node.expression = yield node.expression
+        return node
+
+    # ---------------- IF ----------------
+    def visit_IfStatement(self, node):
+        node.condition = yield node.condition
+
+        if self.prune_branches and isinstance(node.condition, Number):
+            taken = node.then_branch if node.condition.value != 0 else node.else_branch
+            dropped = node.else_branch if node.condition.value != 0 else node.then_branch
+            if dropped is None or not declares(dropped):
+                self.stats["prune_branches"] += 1
+                # Still inside any enclosing loop, so keep the nesting depth
+                return None if taken is None else (yield taken)
+
+        node.then_branch = yield from self.branch(node.then_branch)
+        if node.else_branch is not None:
+            node.else_branch = yield from self.branch(node.else_branch)
+        return node
+
+    # ---------------- WHILE ----------------
+    def visit_WhileStatement(self, node):
+        node.condition = yield node.condition
+
+        if (
+            self.prune_loops
+            and isinstance(node.condition, Number)
+            and node.condition.value == 0
+            and not declares(node.body)
+        ):
+            self.stats["prune_loops"] += 1
+            return None
+
+        node.body = yield from self.branch(node.body)
+        return node
+
+    # ---------------- FUNCTION DEF ----------------
+    def visit_FunctionDef(self, node):
+        # Parameters shadow outer constants; the function's own
+        # constants end with its body. No closures: a nested function
+        # reads an enclosing function's variables as globals, so it only
+        # sees the top-level constants
+        outer_constants, outer_conditional, outer_visible = self.constants, self.conditional, self.visible
+        if not self.depth:
+            self.visible = {
+                name: value for name, value in outer_constants.items()
+                if self.settled is None or name in self.settled
+            }
+        self.constants = {name: value for name, value in self.visible.items() if name not in node.params}
+        self.conditional = 0
+        self.depth += 1
+        node.body = yield node.body
+        self.depth -= 1
+        self.constants, self.conditional, self.visible = outer_constants, outer_conditional, outer_visible
+        return node
+
+    # ---------------- EXPRESSIONS ----------------
+    def visit_Identifier(self, node):
+        if node.name in self.constants:
+            self.stats["propagate"] += 1
+            return Number(self.constants[node.name])
+        return node
+
+    def visit_CallExpression(self, node):
+        if not self.depth and self.settled is None:
+            self.settled = set(self.constants)
+        args = []
+        for arg in node.args:
+            args.append((yield arg))
+        node.args = args
+        return node
+
+    def visit_BinaryOp(self, node):
+        node.left = yield node.left
+        node.right = yield node.right
+        return self.binary(node)
+
+    # --------------------------------------------------
+    # Expressions
+    # --------------------------------------------------
+    def binary(self, node):
+        left, right, op = node.left, node.right, node.op.type
+
+        if self.fold and isinstance(left, Number) and isinstance(right, Number):
+            # x / 0 is left for the VM to report at run time
+            if not (op == TokenType.DIV and right.value == 0):
+                self.stats["fold"] += 1
+                return Number(FOLD[op](left.value, right.value))
+
+        if not self.simplify:
+            return node
+
+        lvalue = left.value if isinstance(left, Number) else None
+        rvalue = right.value if isinstance(right, Number) else None
+        result = node
+
+        if op == TokenType.PLUS:
+            if lvalue == 0:
+                result = right
+            elif rvalue == 0:
+                result = left
+        elif op == TokenType.MINUS:
+            if rvalue == 0:
+                result = left
+            elif same_variable(left, right):
+                result = Number(0)
+        elif op == TokenType.MUL:
+            if lvalue == 1:
+                result = right
+            elif rvalue == 1:
+                result = left
+            elif (lvalue == 0 and not has_effect(right)) or (rvalue == 0 and not has_effect(left)):
+                # A call operand may print and a division may fail at
+                # run time, so those have to stay
+                result = Number(0)
+        elif op == TokenType.DIV:
+            if rvalue == 1:
+                result = left
+        elif same_variable(left, right):
+            result = Number(1 if op == TokenType.EQ else 0)
+
+        if result is not node:
+            self.stats["simplify"] += 1
+        return result
@@ -0,0 +1,142 @@
+from array import array
+
+from .bytecode import OpCode, Instruction, CALLS
+
+
+# Opcodes whose operand is already a plain integer (slot or address)
+INT_OPERANDS = {
+    OpCode.LOAD_LOCAL,
+    OpCode.STORE_LOCAL,
+    OpCode.LOAD_GLOBAL,
+    OpCode.STORE_GLOBAL,
+    OpCode.JUMP,
+    OpCode.JUMP_IF_FALSE,
+    OpCode.JUMP_IF_NOT_LT,
+    OpCode.JUMP_IF_NOT_GT,
+    OpCode.JUMP_IF_NOT_EQ,
+    OpCode.JUMP_IF_LT,
+    OpCode.JUMP_IF_GT,
+    OpCode.JUMP_IF_EQ,
+    OpCode.FUNC_START,
+}
+
+# Opcodes whose operand is a tuple kept in the constant pool
+POOLED_OPERANDS = {
+    OpCode.PUSH_CONST,
+    OpCode.INC_LOCAL,
+    OpCode.INC_GLOBAL,
+    OpCode.BRANCH_LOCAL,
+    OpCode.BRANCH_GLOBAL,
+}
+
+# BRANCH_x operands embed an opcode; the pool stores its int value
+VAR_BRANCHES = {OpCode.BRANCH_LOCAL, OpCode.BRANCH_GLOBAL}
+
+
+class PackedCode:
+    """
+    Compact executable form of a compiled program.
+
+    `ops` holds the int-coded opcodes and `args` the matching operands, one
+    entry per instruction. Operands are slots/addresses, an index into
+    `consts` for PUSH_CONST and the tuple operands of the superinstructions,
+    or an index into `functions` for CALL and TAIL_CALL. `names`
+    maps function names and global slots back to source names for debugging.
+    """
+
+    def __init__(self, ops, args, consts, functions, names, num_globals):
+        self.ops = ops  # array('B')
+        self.args = args  # array('i')
+        self.consts = consts  # constant pool
+        self.functions = functions  # [(addr, argc, nlocals)]
+        self.names = names  # {"functions": [...], "globals": [...]}
+        self.num_globals = num_globals
+
+    def __len__(self):
+        return len(self.ops)
+
+    def instructions(self):
+        # Debug view: rebuild the Instruction list the compiler emitted
+        result = []
+        for op, arg in zip(self.ops, self.args):
+            opcode = OpCode(op)
+            if opcode in VAR_BRANCHES:
+                slot, const, test, target = self.consts[arg]
+                operand = (slot, const, OpCode(test), target)
+            elif opcode in POOLED_OPERANDS:
+                operand = self.consts[arg]
+            elif opcode in CALLS:
+                operand = self.functions[arg]
+            elif opcode in INT_OPERANDS:
+                operand = arg
+            else:
+                operand = None
+            result.append(Instruction(opcode, operand))
+        return result
+
+    def disassemble(self):
+        globals_ = self.names["globals"]
+        funcs = self.names["functions"]
+        lines = []
+        for ip, instr in enumerate(self.instructions()):
+            note = ""
+            if instr.opcode in (OpCode.LOAD_GLOBAL, OpCode.STORE_GLOBAL, OpCode.INC_GLOBAL, OpCode.BRANCH_GLOBAL):
+                slot = instr.operand if instr.opcode in INT_OPERANDS else instr.operand[0]
+                if slot < len(globals_):
+                    note = f"  ; {globals_[slot]}"
+            elif instr.opcode in CALLS:
+                note = f"  ; {funcs[self.args[ip]]}"
+            lines.append(f"{ip}: {instr}{note}")
+        return "\n".join(lines)
+
+
+def pack(instructions, functions, global_names=None):
+    """
+    Pack the `(instructions, functions)` output of `Compiler.compile`.
+    `global_names` is the compiler's `globals` name -> slot table.
+    """
+    ops = array("B")
+    args = array("i")
+    consts = []
+    const_index = {}
+    num_globals = 0
+
+    func_table = []
+    func_names = []
+    func_index = {}
+    for name, (addr, params, nlocals) in functions.items():
+        func_index[addr] = len(func_table)
+        func_table.append((addr, len(params), nlocals))
+        func_names.append(name)
+
+    for instr in instructions:
+        op = instr.opcode
+        arg = instr.operand
+
+        if op in (OpCode.INC_GLOBAL, OpCode.BRANCH_GLOBAL):
+            num_globals = max(num_globals, arg[0] + 1)
+        if op in VAR_BRANCHES:
+            arg = arg[:2] + (arg[2].value,) + arg[3:]
+
+        if op in POOLED_OPERANDS:
+            if arg not in const_index:
+                const_index[arg] = len(consts)
+                consts.append(arg)
+            arg = const_index[arg]
+        elif op in CALLS:
+            arg = func_index[arg[0]]
+        elif op in (OpCode.LOAD_GLOBAL, OpCode.STORE_GLOBAL):
+            num_globals = max(num_globals, arg + 1)
+        elif op not in INT_OPERANDS:
+            arg = 0
+
+        ops.append(op.value)
+        args.append(arg)
+
+    names = {
+        "functions": func_names,
+        "globals": sorted(global_names or {}, key=lambda n: global_names[n]),
+    }
+    # A slot the optimized code never touches still exists
+    num_globals = max(num_globals, len(names["globals"]))
+    return PackedCode(ops, args, consts, func_table, names, num_globals)
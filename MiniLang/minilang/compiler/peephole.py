@@ -0,0 +1,324 @@
+from .bytecode import OpCode, Instruction, BRANCH_TESTS, CALLS
+
+
+# Opcodes whose operand is a jump target address
+BRANCHES = {
+    OpCode.JUMP,
+    OpCode.JUMP_IF_FALSE,
+    OpCode.JUMP_IF_NOT_LT,
+    OpCode.JUMP_IF_NOT_GT,
+    OpCode.JUMP_IF_NOT_EQ,
+    OpCode.JUMP_IF_LT,
+    OpCode.JUMP_IF_GT,
+    OpCode.JUMP_IF_EQ,
+}
+
+FUSED_BRANCH = {
+    OpCode.LT: OpCode.JUMP_IF_NOT_LT,
+    OpCode.GT: OpCode.JUMP_IF_NOT_GT,
+    OpCode.EQ: OpCode.JUMP_IF_NOT_EQ,
+}
+
+INVERTED = {
+    OpCode.JUMP_IF_NOT_LT: OpCode.JUMP_IF_LT,
+    OpCode.JUMP_IF_NOT_GT: OpCode.JUMP_IF_GT,
+    OpCode.JUMP_IF_NOT_EQ: OpCode.JUMP_IF_EQ,
+}
+
+INCREMENT = {
+    OpCode.LOAD_LOCAL: (OpCode.STORE_LOCAL, OpCode.INC_LOCAL),
+    OpCode.LOAD_GLOBAL: (OpCode.STORE_GLOBAL, OpCode.INC_GLOBAL),
+}
+
+# LOAD_x slot; PUSH_CONST k; JUMP_IF_<cmp> t  ->  BRANCH_x (slot, k, JUMP_IF_<cmp>, t)
+VAR_BRANCH = {
+    OpCode.LOAD_LOCAL: OpCode.BRANCH_LOCAL,
+    OpCode.LOAD_GLOBAL: OpCode.BRANCH_GLOBAL,
+}
+
+# Side-effect free instructions that may be duplicated
+PURE = {OpCode.LOAD_LOCAL, OpCode.LOAD_GLOBAL, OpCode.PUSH_CONST}
+
+# Longest loop condition copied to the bottom of a loop
+MAX_ROTATE = 3
+
+
+def branch_target(instr):
+    # Where a branch (or FUNC_START skipping a body) may transfer control
+    if instr.opcode in BRANCHES or instr.opcode == OpCode.FUNC_START:
+        return instr.operand
+    if instr.opcode in (OpCode.BRANCH_LOCAL, OpCode.BRANCH_GLOBAL):
+        return instr.operand[3]
+    return None
+
+
+def set_branch_target(instr, target):
+    if instr.opcode in (OpCode.BRANCH_LOCAL, OpCode.BRANCH_GLOBAL):
+        instr.operand = instr.operand[:3] + (target,)
+    else:
+        instr.operand = target
+
+
+# --------------------------------------------------
+# Addresses <-> instruction references
+# --------------------------------------------------
+def link(instructions):
+    # Copies with jump and CALL operands pointing at Instruction objects
+    code = [Instruction(i.opcode, i.operand) for i in instructions]
+    # HALT always ends the program, so every target below exists
+    for instr in code:
+        target = branch_target(instr)
+        if target is not None:
+            set_branch_target(instr, code[target])
+        elif instr.opcode in CALLS:
+            addr, argc, nlocals = instr.operand
+            instr.operand = (code[addr], argc, nlocals)
+    return code
+
+
+def unlink(code):
+    addr = {id(instr): i for i, instr in enumerate(code)}
+    result = []
+    for instr in code:
+        copy = Instruction(instr.opcode, instr.operand)
+        target = branch_target(instr)
+        if target is not None:
+            set_branch_target(copy, addr[id(target)])
+        elif instr.opcode in CALLS:
+            target, argc, nlocals = instr.operand
+            copy.operand = (addr[id(target)], argc, nlocals)
+        result.append(copy)
+    return result
+
+
+class PeepholeOptimizer:
+    """
+    Bytecode-level pass over the `(instructions, functions)` output of
+    `Compiler.compile`.
+
+    While it works, jump operands point at Instruction objects instead of
+    addresses, so instructions can be fused, dropped or duplicated freely;
+    addresses, CALL targets, FUNC_START ends and the function table are
+    recomputed once at the end.
+    """
+
+    def __init__(self):
+        self.stats = {}
+
+    def optimize(self, instructions, functions):
+        self.stats = {
+            "before": len(instructions),
+            "increments": 0,
+            "compare_branches": 0,
+            "var_branches": 0,
+            "threaded": 0,
+            "rotated": 0,
+            "unreachable": 0,
+        }
+
+        code = link(instructions)
+        entries = {name: code[addr] for name, (addr, _, _) in functions.items()}
+
+        code = self.fuse(code)
+        code = self.thread_jumps(code)
+        code = self.rotate_loops(code)
+        code = self.fuse_var_branches(code)
+        code = self.remove_unreachable(code, entries)
+        code = self.remove_jumps_to_next(code)
+
+        instructions = unlink(code)
+        addr = {id(instr): i for i, instr in enumerate(code)}
+        functions = {
+            name: (addr[id(entries[name])], params, nlocals)
+            for name, (_, params, nlocals) in functions.items()
+        }
+        self.stats["after"] = len(instructions)
+        return instructions, functions
+
+    def targets(self, code):
+        # Instructions that control flow can enter other than by falling through
+        result = set()
+        for instr in code:
+            target = branch_target(instr)
+            if target is not None:
+                result.add(id(target))
+            elif instr.opcode in CALLS:
+                result.add(id(instr.operand[0]))
+        for i, instr in enumerate(code[:-1]):
+            if instr.opcode == OpCode.FUNC_START:
+                result.add(id(code[i + 1]))
+        return result
+
+    # --------------------------------------------------
+    # Superinstructions
+    # --------------------------------------------------
+    def fuse(self, code):
+        targets = self.targets(code)
+
+        # Only the first instruction of a fused run may be a jump target
+        def free(window, n):
+            return len(window) >= n and all(id(w) not in targets for w in window[:n])
+
+        result = []
+        i = 0
+        while i < len(code):
+            instr = code[i]
+            window = code[i + 1:i + 4]
+
+            # x = x + k / x = x - k  ->  INC_x slot, ±k
+            if instr.opcode in INCREMENT and free(window, 3):
+                store, inc = INCREMENT[instr.opcode]
+                push, arith, save = window
+                if (
+                    push.opcode == OpCode.PUSH_CONST
+                    and arith.opcode in (OpCode.ADD, OpCode.SUB)
+                    and save.opcode == store
+                    and save.operand == instr.operand
+                ):
+                    amount = push.operand if arith.opcode == OpCode.ADD else -push.operand
+                    instr.opcode = inc
+                    instr.operand = (instr.operand, amount)
+                    result.append(instr)
+                    self.stats["increments"] += 1
+                    i += 4
+                    continue
+
+            # compare; JUMP_IF_FALSE t  ->  JUMP_IF_NOT_<cmp> t
+            if instr.opcode in FUSED_BRANCH and free(window, 1):
+                branch = window[0]
+                if branch.opcode == OpCode.JUMP_IF_FALSE:
+                    instr.opcode = FUSED_BRANCH[instr.opcode]
+                    instr.operand = branch.operand
+                    result.append(instr)
+                    self.stats["compare_branches"] += 1
+                    i += 2
+                    continue
+
+            result.append(instr)
+            i += 1
+        return result
+
+    # --------------------------------------------------
+    # Jump threading
+    # --------------------------------------------------
+    def thread_jumps(self, code):
+        for instr in code:
+            original = branch_target(instr)
+            if original is None or instr.opcode == OpCode.FUNC_START:
+                continue
+            target = original
+            seen = {id(instr)}
+            while target.opcode == OpCode.JUMP and id(target) not in seen:
+                seen.add(id(target))
+                target = target.operand
+            if target is not original:
+                set_branch_target(instr, target)
+                self.stats["threaded"] += 1
+        return code
+
+    def rotate_loops(self, code):
+        # JUMP back to `cond...; JUMP_IF_NOT_x exit` where exit is right
+        # after the JUMP: replace the JUMP by a copy of the condition that
+        # branches back into the body, saving one dispatch per iteration.
+        position = {id(instr): i for i, instr in enumerate(code)}
+        rotations = {}
+        for i, instr in enumerate(code[:-1]):
+            if instr.opcode != OpCode.JUMP:
+                continue
+            start = position[id(instr.operand)]
+            head = code[start:start + MAX_ROTATE + 1]
+            for n, branch in enumerate(head):
+                if branch.opcode in INVERTED:
+                    body = start + n + 1
+                    if branch.operand is code[i + 1] and body < len(code):
+                        rotated = [Instruction(h.opcode, h.operand) for h in head[:n]]
+                        rotated.append(Instruction(INVERTED[branch.opcode], code[body]))
+                        rotations[i] = rotated
+                    break
+                if branch.opcode not in PURE:
+                    break
+
+        result = []
+        for i, instr in enumerate(code):
+            if i not in rotations:
+                result.append(instr)
+                continue
+
+            # Reuse the JUMP object as the first copy so that anything
+            # targeting it lands on the rotated condition
+            first, *rest = rotations[i]
+            instr.opcode, instr.operand = first.opcode, first.operand
+            result.append(instr)
+            result.extend(rest)
+            self.stats["rotated"] += 1
+        return result
+
+    def fuse_var_branches(self, code):
+        # Runs after rotation so both copies of a loop condition collapse
+        targets = self.targets(code)
+        result = []
+        i = 0
+        while i < len(code):
+            instr = code[i]
+            window = code[i + 1:i + 3]
+            if (
+                instr.opcode in VAR_BRANCH
+                and len(window) == 2
+                and all(id(w) not in targets for w in window)
+                and window[0].opcode == OpCode.PUSH_CONST
+                and window[1].opcode in BRANCH_TESTS
+            ):
+                push, branch = window
+                instr.operand = (instr.operand, push.operand, branch.opcode, branch.operand)
+                instr.opcode = VAR_BRANCH[instr.opcode]
+                result.append(instr)
+                self.stats["var_branches"] += 1
+                i += 3
+                continue
+
+            result.append(instr)
+            i += 1
+        return result
+
+    # --------------------------------------------------
+    # Dead code
+    # --------------------------------------------------
+    def remove_unreachable(self, code, entries):
+        position = {id(instr): i for i, instr in enumerate(code)}
+        reachable = set()
+
+        # Every function stays callable, even if this program never calls it
+        work = [0]
+        for entry in entries.values():
+            work += [position[id(entry)], position[id(entry)] + 1]
+        while work:
+            i = work.pop()
+            if i >= len(code) or i in reachable:
+                continue
+            reachable.add(i)
+            instr = code[i]
+            op = instr.opcode
+
+            target = branch_target(instr)
+            if target is not None:
+                work.append(position[id(target)])
+            if op in (OpCode.JUMP, OpCode.FUNC_START, OpCode.RETURN, OpCode.TAIL_CALL, OpCode.HALT):
+                continue
+            work.append(i + 1)
+
+        self.stats["unreachable"] += len(code) - len(reachable)
+        return [instr for i, instr in enumerate(code) if i in reachable]
+
+    def remove_jumps_to_next(self, code):
+        targets = self.targets(code)
+        result = []
+        for i, instr in enumerate(code):
+            if (
+                instr.opcode == OpCode.JUMP
+                and i + 1 < len(code)
+                and instr.operand is code[i + 1]
+                and id(instr) not in targets
+            ):
+                continue
+            result.append(instr)
+        return result
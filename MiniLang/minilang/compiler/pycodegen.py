@@ -0,0 +1,309 @@
+import ast as pyast
+import builtins
+import sys
+
+from minilang.parser.ast import *
+from minilang.lexer.token import TokenType
+from .register import function_defs, shared_names
+
+
+# MiniLang names are prefixed so they never collide with Python keywords,
+# builtins or each other (functions and variables are separate namespaces)
+VARIABLE = "v_"
+FUNCTION = "f_"
+MAIN = "__minilang_main__"
+
+ARITHMETIC = {
+    TokenType.PLUS: pyast.Add,
+    TokenType.MINUS: pyast.Sub,
+    TokenType.MUL: pyast.Mult,
+    TokenType.DIV: pyast.FloorDiv,
+}
+
+COMPARE = {
+    TokenType.LT: pyast.Lt,
+    TokenType.GT: pyast.Gt,
+    TokenType.EQ: pyast.Eq,
+}
+
+# Python frames live on the heap since 3.11, so deep MiniLang recursion
+# only needs a higher limit, not a bigger C stack
+RECURSION_LIMIT = 200_000
+
+
+class Unsupported(Exception):
+    """The program can't be translated; run it on the VM instead."""
+
+
+def lets(node, names):
+    # Every `let` under node, at any block depth (scopes are flat)
+    if isinstance(node, LetStatement):
+        if node.name not in names:
+            names.append(node.name)
+    elif isinstance(node, (Program, Block)):
+        for stmt in node.statements:
+            lets(stmt, names)
+    elif isinstance(node, IfStatement):
+        lets(node.then_branch, names)
+        if node.else_branch:
+            lets(node.else_branch, names)
+    elif isinstance(node, WhileStatement):
+        lets(node.body, names)
+    return names
+
+
+def assigned(node, names):
+    # Targets of `x = ...` under node, not descending into nested functions
+    if isinstance(node, AssignStatement):
+        names.add(node.name)
+    elif isinstance(node, (Program, Block)):
+        for stmt in node.statements:
+            assigned(stmt, names)
+    elif isinstance(node, IfStatement):
+        assigned(node.then_branch, names)
+        if node.else_branch:
+            assigned(node.else_branch, names)
+    elif isinstance(node, WhileStatement):
+        assigned(node.body, names)
+    return names
+
+
+def name(identifier, ctx=pyast.Load):
+    return pyast.Name(id=identifier, ctx=ctx())
+
+
+def store(variable, value):
+    return pyast.Assign(targets=[name(VARIABLE + variable, pyast.Store)], value=value)
+
+
+def zero(variables):
+    return [store(v, pyast.Constant(0)) for v in variables]
+
+
+class PythonCompiler:
+    """
+    Translates the MiniLang AST into a Python `ast.Module`.
+
+    Every MiniLang function becomes a module-level Python function (nested
+    definitions are hoisted: MiniLang resolves functions globally) and the
+    top-level code becomes a `__minilang_main__` function. Semantics follow
+    `VirtualMachine`: `/` is floor division, comparisons produce 0 or 1,
+    variables start at 0 and names a function doesn't declare are globals.
+    Top-level variables no function mentions are locals of the main
+    function, which CPython accesses much faster than globals.
+
+    A function whose `return f(...)` calls itself outside any loop runs
+    as a `while True` loop that rebinds its parameters, like TAIL_CALL.
+    """
+
+    def __init__(self, tail_loops=True):
+        self.tail_loops = tail_loops
+        self.definitions = []  # hoisted Python FunctionDefs
+        self.arity = {}  # function name -> number of parameters
+
+        self.function = None  # MiniLang FunctionDef being translated
+        self.loop_depth = 0
+        self.looped = False
+
+    # --------------------------------------------------
+    # Entry
+    # --------------------------------------------------
+    def compile(self, program):
+        if not isinstance(program, Program):
+            raise Unsupported(f"Expected a Program, got {type(program).__name__}")
+
+        # Every definition is hoisted, so calls may come before it
+        for node in function_defs(program):
+            self.arity[node.name] = len(node.params)
+
+        shared = shared_names(program)
+        top_level = lets(program, [])
+        main_locals = [v for v in top_level if v not in shared]
+
+        body = []
+        if shared:
+            body.append(pyast.Global(names=sorted(VARIABLE + v for v in shared)))
+        body += zero(main_locals)
+        body += self.statements(program.statements)
+        main = self.define(MAIN, [], body)
+
+        module = [store(v, pyast.Constant(0)) for v in sorted(shared)]
+        module += self.definitions + [main]
+        return pyast.fix_missing_locations(pyast.Module(body=module, type_ignores=[]))
+
+    def define(self, function_name, params, body):
+        args = pyast.arguments(
+            posonlyargs=[],
+            args=[pyast.arg(arg=VARIABLE + p) for p in params],
+            kwonlyargs=[],
+            kw_defaults=[],
+            defaults=[],
+        )
+        return pyast.FunctionDef(
+            name=function_name, args=args, body=body or [pyast.Pass()], decorator_list=[]
+        )
+
+    # --------------------------------------------------
+    # Statements
+    # --------------------------------------------------
+    def statements(self, statements):
+        result = []
+        for stmt in statements:
+            result += self.statement(stmt)
+        return result
+
+    def block(self, node):
+        return self.statement(node) or [pyast.Pass()]
+
+    def statement(self, node):
+        if isinstance(node, Block):
+            return self.statements(node.statements)
+
+        if isinstance(node, (LetStatement, AssignStatement)):
+            return [store(node.name, self.expr(node.value))]
+
+        if isinstance(node, PrintStatement):
+            call = pyast.Call(func=name("print"), args=[self.expr(node.expression)], keywords=[])
+            return [pyast.Expr(call)]
+
+        if isinstance(node, IfStatement):
+            orelse = self.block(node.else_branch) if node.else_branch else []
+            return [pyast.If(test=self.test(node.condition), body=self.block(node.then_branch), orelse=orelse)]
+
+        if isinstance(node, WhileStatement):
+            self.loop_depth += 1
+            body = self.block(node.body)
+            self.loop_depth -= 1
+            return [pyast.While(test=self.test(node.condition), body=body, orelse=[])]
+
+        if isinstance(node, ReturnStatement):
+            if self.function is None:
+                # Top-level return stops the program
+                return [pyast.Expr(self.expr(node.value)), pyast.Return(value=None)]
+            if self.is_self_tail_call(node.value):
+                return self.tail_loop(node.value)
+            return [pyast.Return(value=self.expr(node.value))]
+
+        if isinstance(node, FunctionDef):
+            self.function_def(node)
+            return []
+
+        raise Unsupported(f"Unknown AST node: {type(node).__name__}")
+
+    def function_def(self, node):
+        outer = (self.function, self.loop_depth, self.looped)
+        self.function, self.loop_depth, self.looped = node, 0, False
+
+        local = [v for v in lets(node.body, []) if v not in node.params]
+        free = assigned(node.body, set()) - set(local) - set(node.params)
+
+        body = self.statements(node.body.statements)
+        # Default return 0 if no explicit return
+        body.append(pyast.Return(value=pyast.Constant(0)))
+        if self.looped:
+            body = [pyast.While(test=pyast.Constant(True), body=body, orelse=[])]
+
+        prologue = []
+        if free:
+            prologue.append(pyast.Global(names=sorted(VARIABLE + v for v in free)))
+        prologue += zero(local)
+        self.definitions.append(self.define(FUNCTION + node.name, node.params, prologue + body))
+
+        self.function, self.loop_depth, self.looped = outer
+
+    def is_self_tail_call(self, value):
+        return (
+            self.tail_loops
+            and isinstance(value, CallExpression)
+            and value.name == self.function.name
+            and self.loop_depth == 0
+        )
+
+    def tail_loop(self, call):
+        # `return f(args)` inside f: rebind the parameters, clear the other
+        # locals (a fresh frame starts at 0) and restart the body
+        self.check_call(call)
+        self.looped = True
+        params = self.function.params
+        result = []
+        if params:
+            targets = pyast.Tuple(elts=[name(VARIABLE + p, pyast.Store) for p in params], ctx=pyast.Store())
+            values = pyast.Tuple(elts=[self.expr(arg) for arg in call.args], ctx=pyast.Load())
+            result.append(pyast.Assign(targets=[targets], value=values))
+        result += zero(v for v in lets(self.function.body, []) if v not in params)
+        return result + [pyast.Continue()]
+
+    # --------------------------------------------------
+    # Expressions
+    # --------------------------------------------------
+    def expr(self, node):
+        if isinstance(node, Number):
+            return pyast.Constant(node.value)
+
+        if isinstance(node, Identifier):
+            return name(VARIABLE + node.name)
+
+        if isinstance(node, BinaryOp):
+            op_type = node.op.type
+            if op_type in ARITHMETIC:
+                return pyast.BinOp(left=self.expr(node.left), op=ARITHMETIC[op_type](), right=self.expr(node.right))
+            if op_type in COMPARE:
+                return pyast.IfExp(test=self.compare(node), body=pyast.Constant(1), orelse=pyast.Constant(0))
+            raise Unsupported(f"Unknown operator: {op_type}")
+
+        if isinstance(node, CallExpression):
+            self.check_call(node)
+            args = [self.expr(arg) for arg in node.args]
+            return pyast.Call(func=name(FUNCTION + node.name), args=args, keywords=[])
+
+        raise Unsupported(f"Unknown AST node: {type(node).__name__}")
+
+    def compare(self, node):
+        return pyast.Compare(
+            left=self.expr(node.left), ops=[COMPARE[node.op.type]()], comparators=[self.expr(node.right)]
+        )
+
+    def test(self, condition):
+        # Branches only need truthiness, which matches `!= 0` on ints
+        if isinstance(condition, BinaryOp) and condition.op.type in COMPARE:
+            return self.compare(condition)
+        return self.expr(condition)
+
+    def check_call(self, node):
+        if node.name not in self.arity:
+            raise Exception(f"Undefined function: {node.name}")
+        argc = self.arity[node.name]
+        if len(node.args) != argc:
+            raise Exception(
+                f"Function '{node.name}' expects {argc} arguments, got {len(node.args)}"
+            )
+
+
+def compile_program(program, filename="<minilang>", tail_loops=True):
+    """Translate and compile a MiniLang AST into a Python code object."""
+    try:
+        module = PythonCompiler(tail_loops).compile(program)
+        return compile(module, filename, "exec")
+    except (RecursionError, MemoryError) as error:
+        # Expressions nested too deeply for CPython's compiler
+        raise Unsupported(str(error) or type(error).__name__) from error
+
+
+def load(code, output=None):
+    """Execute the module code and return its main function."""
+    namespace = {"__builtins__": builtins}
+    if output is not None:
+        # Module globals shadow the builtin `print` the generated code calls
+        namespace["print"] = output.write
+    exec(code, namespace)
+    return namespace[MAIN]
+
+
+def execute(code, recursion_limit=RECURSION_LIMIT, output=None):
+    main = load(code, output)
+    previous = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(previous, recursion_limit))
+    try:
+        main()
+    finally:
+        sys.setrecursionlimit(previous)
@@ -0,0 +1,514 @@
+from enum import Enum, auto
+
+from minilang.parser.ast import *
+from minilang.parser.visitor import Visitor
+from minilang.lexer.token import TokenType
+
+
+class RegOp(Enum):
+    # ---------- Moves ----------
+    LOADK = auto()  # r[a] = k
+    MOVE = auto()  # r[a] = r[b]
+    GETGLOBAL = auto()  # r[a] = g[b]
+    SETGLOBAL = auto()  # g[a] = r[b]
+
+    # ---------- Arithmetic / compare: r[a] = r[b] op r[c] (K: op k) ----------
+    ADD = auto()
+    ADDK = auto()
+    SUB = auto()
+    SUBK = auto()
+    MUL = auto()
+    MULK = auto()
+    DIV = auto()
+    DIVK = auto()
+    LT = auto()
+    LTK = auto()
+    GT = auto()
+    GTK = auto()
+    EQ = auto()
+    EQK = auto()
+
+    # ---------- Control ----------
+    JUMP = auto()  # ip = a
+    JUMP_FALSE = auto()  # if r[a] == 0: ip = b
+    JUMP_NOT_LT = auto()  # unless r[a] < r[b]: ip = c
+    JUMP_NOT_LTK = auto()  # unless r[a] < k: ip = c
+    JUMP_NOT_GT = auto()
+    JUMP_NOT_GTK = auto()
+    JUMP_NOT_EQ = auto()
+    JUMP_NOT_EQK = auto()
+
+    # ---------- IO ----------
+    PRINT = auto()  # print r[a]
+
+    # ---------- Functions ----------
+    CALL = auto()  # r[a] = functions[b](r[c], ..., r[c + argc - 1])
+    TAIL_CALL = auto()  # return functions[a](r[b], ...), reusing the frame
+    RETURN = auto()  # return r[a]
+
+    # ---------- Program ----------
+    HALT = auto()
+
+
+# Operand kinds per opcode, for printing: r register, k constant, g global
+# slot, f function index, @ jump target
+SIGNATURES = {
+    RegOp.LOADK: "rk",
+    RegOp.MOVE: "rr",
+    RegOp.GETGLOBAL: "rg",
+    RegOp.SETGLOBAL: "gr",
+    RegOp.JUMP: "@",
+    RegOp.JUMP_FALSE: "r@",
+    RegOp.PRINT: "r",
+    RegOp.CALL: "rfr",
+    RegOp.TAIL_CALL: "fr",
+    RegOp.RETURN: "r",
+    RegOp.HALT: "",
+}
+for _op in RegOp:
+    if _op not in SIGNATURES:
+        branch = _op.name.startswith("JUMP_NOT")
+        constant = _op.name.endswith("K")
+        if branch:
+            SIGNATURES[_op] = "rk@" if constant else "rr@"
+        else:
+            SIGNATURES[_op] = "rrk" if constant else "rrr"
+
+BINARY = {
+    TokenType.PLUS: (RegOp.ADD, RegOp.ADDK),
+    TokenType.MINUS: (RegOp.SUB, RegOp.SUBK),
+    TokenType.MUL: (RegOp.MUL, RegOp.MULK),
+    TokenType.DIV: (RegOp.DIV, RegOp.DIVK),
+    TokenType.LT: (RegOp.LT, RegOp.LTK),
+    TokenType.GT: (RegOp.GT, RegOp.GTK),
+    TokenType.EQ: (RegOp.EQ, RegOp.EQK),
+}
+
+BRANCH = {
+    TokenType.LT: (RegOp.JUMP_NOT_LT, RegOp.JUMP_NOT_LTK),
+    TokenType.GT: (RegOp.JUMP_NOT_GT, RegOp.JUMP_NOT_GTK),
+    TokenType.EQ: (RegOp.JUMP_NOT_EQ, RegOp.JUMP_NOT_EQK),
+}
+
+# `k op r` rewritten as `r op' k`
+SWAPPED = {
+    TokenType.PLUS: TokenType.PLUS,
+    TokenType.MUL: TokenType.MUL,
+    TokenType.EQ: TokenType.EQ,
+    TokenType.LT: TokenType.GT,
+    TokenType.GT: TokenType.LT,
+}
+
+JUMPS = {op for op, sig in SIGNATURES.items() if sig.endswith("@")}
+
+
+def function_defs(program):
+    # Every FunctionDef, nested ones too, in source order
+    result = []
+    work = [program]
+    while work:
+        node = work.pop()
+        if isinstance(node, FunctionDef):
+            result.append(node)
+            work.append(node.body)
+        elif isinstance(node, (Program, Block)):
+            work.extend(reversed(node.statements))
+        elif isinstance(node, IfStatement):
+            if node.else_branch:
+                work.append(node.else_branch)
+            work.append(node.then_branch)
+        elif isinstance(node, WhileStatement):
+            work.append(node.body)
+    return result
+
+
+def shared_names(program):
+    # Every variable name mentioned inside a function body: at top level,
+    # these must stay globals so the functions can see them
+    names = set()
+    work = [(program, False)]
+    while work:
+        node, inside = work.pop()
+        if isinstance(node, (Program, Block)):
+            work.extend((s, inside) for s in node.statements)
+        elif isinstance(node, FunctionDef):
+            work.append((node.body, True))
+        elif isinstance(node, (LetStatement, AssignStatement)):
+            if inside:
+                names.add(node.name)
+            work.append((node.value, inside))
+        elif isinstance(node, Identifier):
+            if inside:
+                names.add(node.name)
+        elif isinstance(node, BinaryOp):
+            work += [(node.left, inside), (node.right, inside)]
+        elif isinstance(node, CallExpression):
+            work.extend((arg, inside) for arg in node.args)
+        elif isinstance(node, PrintStatement):
+            work.append((node.expression, inside))
+        elif isinstance(node, ReturnStatement):
+            work.append((node.value, inside))
+        elif isinstance(node, IfStatement):
+            work += [(node.condition, inside), (node.then_branch, inside)]
+            if node.else_branch is not None:
+                work.append((node.else_branch, inside))
+        elif isinstance(node, WhileStatement):
+            work += [(node.condition, inside), (node.body, inside)]
+    return names
+
+
+class Const:
+    """A constant operand, as opposed to a register number."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+
+class RegInstruction:
+    __slots__ = ("opcode", "a", "b", "c")
+
+    def __init__(self, opcode, a=None, b=None, c=None):
+        self.opcode = opcode
+        self.a = a
+        self.b = b
+        self.c = c
+
+    def operands(self):
+        return (self.a, self.b, self.c)[:len(SIGNATURES[self.opcode])]
+
+    def __repr__(self):
+        prefix = {"r": "r", "k": "#", "g": "g", "f": "f", "@": "@"}
+        parts = [
+            f"{prefix[kind]}{value}"
+            for kind, value in zip(SIGNATURES[self.opcode], self.operands())
+        ]
+        return f"{self.opcode.name} {', '.join(parts)}".rstrip()
+
+
+class RegisterProgram:
+    """
+    Output of `RegisterCompiler`: one flat instruction list (top-level code,
+    HALT, then every function body), the function table and global count.
+    """
+
+    def __init__(self, code, functions, names, num_globals, main_registers):
+        self.code = code
+        self.functions = functions  # [(addr, argc, nregs)]
+        self.names = names  # {"functions": [...], "globals": [...]}
+        self.num_globals = num_globals
+        self.main_registers = main_registers
+
+    def disassemble(self):
+        starts = {addr: name for (addr, _, _), name in zip(self.functions, self.names["functions"])}
+        lines = []
+        for ip, instr in enumerate(self.code):
+            if ip in starts:
+                lines.append(f"{starts[ip]}:")
+            lines.append(f"{ip}: {instr!r}")
+        return "\n".join(lines)
+
+
+class RegisterCompiler(Visitor):
+    """
+    Compiles the AST to three-address register code.
+
+    Inside a function, parameters and `let`s live in fixed registers
+    (parameters first); expression temporaries are allocated above them
+    and released after every statement. Top-level variables are globals
+    only if some function body mentions them; the others get registers
+    of the top-level frame. Values flow straight into their destination
+    register, so `i = i + 1` is a single ADDK and `while (i < n)` a single
+    JUMP_NOT_LT.
+
+    Expressions are compiled on the iterative `Visitor`, so their depth
+    is not limited by Python's recursion limit. A visit method reads its
+    destination register from `self.dst`, which is set right before each
+    child is yielded; `into`, `operands` and `arguments` are generators
+    that statements run to completion with `self.visit()`.
+    """
+
+    def __init__(self):
+        self.globals = {}  # name -> slot
+        self.function_index = {}  # name -> index into self.functions
+        self.arity = {}  # name -> number of parameters
+        self.functions = []  # [(code, argc, nregs)] while compiling
+        self.function_names = []
+
+        self.code = []
+        self.locals = {}  # name -> register of the current frame
+        self.in_function = False
+        self.top = 0  # first free register
+        self.nregs = 0
+        self.dst = None  # destination register of the expression being visited
+
+    # --------------------------------------------------
+    # Entry
+    # --------------------------------------------------
+    def compile(self, program):
+        shared = shared_names(program)
+        for name in self.collect_locals(program, {}):
+            if name not in shared:
+                self.locals[name] = len(self.locals)
+        self.top = self.nregs = len(self.locals)
+
+        # Registered up front: a call may come before the definition
+        for node in function_defs(program):
+            self.function_index[node.name] = len(self.functions)
+            self.arity[node.name] = len(node.params)
+            self.function_names.append(node.name)
+            self.functions.append(None)
+
+        self.statements(program.statements)
+        self.emit(RegOp.HALT)
+        main_code, main_registers = self.code, self.nregs
+
+        # Lay the function bodies out after the top-level code
+        code = list(main_code)
+        table = []
+        for body, argc, nregs in self.functions:
+            table.append((len(code), argc, nregs))
+            code += self.relocate(body, len(code))
+
+        names = {
+            "functions": list(self.function_names),
+            "globals": sorted(self.globals, key=self.globals.get),
+        }
+        return RegisterProgram(code, table, names, len(self.globals), main_registers)
+
+    def relocate(self, body, offset):
+        result = []
+        for instr in body:
+            instr = RegInstruction(instr.opcode, instr.a, instr.b, instr.c)
+            if instr.opcode == RegOp.JUMP:
+                instr.a += offset
+            elif instr.opcode == RegOp.JUMP_FALSE:
+                instr.b += offset
+            elif instr.opcode in JUMPS:
+                instr.c += offset
+            result.append(instr)
+        return result
+
+    # --------------------------------------------------
+    # Helpers
+    # --------------------------------------------------
+    def emit(self, opcode, a=None, b=None, c=None):
+        instr = RegInstruction(opcode, a, b, c)
+        self.code.append(instr)
+        return instr
+
+    def temp(self):
+        reg = self.top
+        self.top += 1
+        self.nregs = max(self.nregs, self.top)
+        return reg
+
+    def base(self):
+        # Registers permanently owned by variables
+        return len(self.locals)
+
+    def global_slot(self, name):
+        if name not in self.globals:
+            self.globals[name] = len(self.globals)
+        return self.globals[name]
+
+    def collect_locals(self, node, names):
+        if isinstance(node, LetStatement):
+            if node.name not in names:
+                names[node.name] = len(names)
+        elif isinstance(node, (Program, Block)):
+            for stmt in node.statements:
+                self.collect_locals(stmt, names)
+        elif isinstance(node, IfStatement):
+            self.collect_locals(node.then_branch, names)
+            if node.else_branch:
+                self.collect_locals(node.else_branch, names)
+        elif isinstance(node, WhileStatement):
+            self.collect_locals(node.body, names)
+        return names
+
+    # --------------------------------------------------
+    # Statements
+    # --------------------------------------------------
+    def statements(self, statements):
+        for stmt in statements:
+            self.statement(stmt)
+            self.top = self.base()
+
+    def statement(self, node):
+        if isinstance(node, Block):
+            self.statements(node.statements)
+
+        elif isinstance(node, (LetStatement, AssignStatement)):
+            if node.name in self.locals:
+                self.visit(self.into(node.value, self.locals[node.name]))
+            else:
+                slot = self.global_slot(node.name)
+                self.emit(RegOp.SETGLOBAL, slot, self.register(node.value))
+
+        elif isinstance(node, PrintStatement):
+            self.emit(RegOp.PRINT, self.register(node.expression))
+
+        elif isinstance(node, IfStatement):
+            skip = self.branch_unless(node.condition)
+            self.statement(node.then_branch)
+            if node.else_branch:
+                end = self.emit(RegOp.JUMP, None)
+                self.patch(skip, len(self.code))
+                self.statement(node.else_branch)
+                end.a = len(self.code)
+            else:
+                self.patch(skip, len(self.code))
+
+        elif isinstance(node, WhileStatement):
+            start = len(self.code)
+            exit_ = self.branch_unless(node.condition)
+            self.statement(node.body)
+            self.emit(RegOp.JUMP, start)
+            self.patch(exit_, len(self.code))
+
+        elif isinstance(node, ReturnStatement):
+            if self.in_function and isinstance(node.value, CallExpression):
+                func, base = self.visit(self.arguments(node.value))
+                self.emit(RegOp.TAIL_CALL, func, base)
+            else:
+                self.emit(RegOp.RETURN, self.register(node.value))
+
+        elif isinstance(node, FunctionDef):
+            self.function(node)
+
+        else:
+            raise Exception(f"Unknown AST node: {type(node)}")
+
+    def function(self, node):
+        index = self.function_index[node.name]
+
+        outer = (self.code, self.locals, self.in_function, self.top, self.nregs)
+        self.in_function = True
+        self.locals = {p: i for i, p in enumerate(node.params)}
+        self.collect_locals(node.body, self.locals)
+        self.code = []
+        self.top = self.nregs = len(self.locals)
+
+        self.statements(node.body.statements)
+        # Default return 0 if no explicit return
+        self.emit(RegOp.RETURN, self.register(Number(0)))
+
+        self.functions[index] = (self.code, len(node.params), max(self.nregs, 1))
+        self.code, self.locals, self.in_function, self.top, self.nregs = outer
+
+    # --------------------------------------------------
+    # Expressions
+    # --------------------------------------------------
+    def expr(self, node, dst=None):
+        """
+        Compile `node` and return where its value is: a register or a
+        `Const`. Only a computed result is written to `dst` (if given).
+        """
+        self.dst = dst
+        return self.visit(node)
+
+    def visit_Number(self, node):
+        return Const(node.value)
+
+    def visit_Identifier(self, node):
+        if node.name in self.locals:
+            return self.locals[node.name]
+        reg = self.temp() if self.dst is None else self.dst
+        self.emit(RegOp.GETGLOBAL, reg, self.global_slot(node.name))
+        return reg
+
+    def visit_BinaryOp(self, node):
+        dst = self.dst
+        mark = self.top
+        out = self.temp() if dst is None else dst
+        op_type, left, right = yield from self.operands(node)
+        plain, with_const = BINARY[op_type]
+        if isinstance(right, Const):
+            self.emit(with_const, out, left, right.value)
+        else:
+            self.emit(plain, out, left, right)
+        self.top = mark + (1 if dst is None else 0)
+        return out
+
+    def visit_CallExpression(self, node):
+        dst = self.dst
+        func, base = yield from self.arguments(node)
+        out = base if dst is None else dst
+        self.emit(RegOp.CALL, out, func, base)
+        self.top = base + (1 if dst is None else 0)
+        self.nregs = max(self.nregs, self.top)
+        return out
+
+    def operands(self, node):
+        # Left operand in a register, right one a register or a constant
+        op_type = node.op.type
+        self.dst = None
+        left = yield node.left
+        self.dst = None
+        right = yield node.right
+        if isinstance(left, Const):
+            if not isinstance(right, Const) and op_type in SWAPPED:
+                return SWAPPED[op_type], right, left
+            left = self.load(left)
+        return op_type, left, right
+
+    def arguments(self, node):
+        if node.name not in self.function_index:
+            raise Exception(f"Undefined function: {node.name}")
+        func = self.function_index[node.name]
+        argc = self.arity[node.name]
+        if len(node.args) != argc:
+            raise Exception(
+                f"Function '{node.name}' expects {argc} arguments, got {len(node.args)}"
+            )
+
+        # Arguments go to consecutive registers, the start of the new frame
+        base = self.top
+        for _ in node.args:
+            self.temp()
+        for i, arg in enumerate(node.args):
+            yield from self.into(arg, base + i)
+        return func, base
+
+    def into(self, node, reg):
+        self.dst = reg
+        value = yield node
+        if isinstance(value, Const):
+            self.emit(RegOp.LOADK, reg, value.value)
+        elif value != reg:
+            self.emit(RegOp.MOVE, reg, value)
+
+    def load(self, value):
+        reg = self.temp()
+        self.emit(RegOp.LOADK, reg, value.value)
+        return reg
+
+    def register(self, node):
+        value = self.expr(node)
+        return self.load(value) if isinstance(value, Const) else value
+
+    # --------------------------------------------------
+    # Conditions
+    # --------------------------------------------------
+    def branch_unless(self, condition):
+        # Jump (target patched later) when the condition is false
+        mark = self.top
+        if isinstance(condition, BinaryOp) and condition.op.type in BRANCH:
+            op_type, left, right = self.visit(self.operands(condition))
+            plain, with_const = BRANCH[op_type]
+            if isinstance(right, Const):
+                instr = self.emit(with_const, left, right.value, None)
+            else:
+                instr = self.emit(plain, left, right, None)
+        else:
+            instr = self.emit(RegOp.JUMP_FALSE, self.register(condition), None)
+        self.top = mark
+        return instr
+
+    def patch(self, instr, target):
+        if instr.opcode == RegOp.JUMP_FALSE:
+            instr.b = target
+        else:
+            instr.c = target
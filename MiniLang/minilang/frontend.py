@@ -0,0 +1,38 @@
+from minilang.lexer.lexer import Lexer
+from minilang.lexer.regex_lexer import RegexLexer
+from minilang.lexer.stream_lexer import StreamLexer
+from minilang.parser.parser import Parser
+from minilang.parser.arena import AstArena
+from minilang.parser.ast import ImportStatement
+from minilang.compiler.optimizer import Optimizer
+from minilang.semantic.semantic_analyzer import SemanticAnalyzer
+
+
+LEXERS = {
+    "char": Lexer,
+    "regex": RegexLexer,
+    "stream": StreamLexer,
+}
+
+
+def parse(code, lexer="regex", ast="tree"):
+    lexer = LEXERS[lexer](code)
+    parser = Parser(lexer, nodes=AstArena() if ast == "arena" else None)
+    return parser.parse()
+
+
+def imported(ast):
+    return [stmt.name for stmt in ast.statements if isinstance(stmt, ImportStatement)]
+
+
+def front_end(code, lexer, ast, optimize, modules):
+    # Parsed, analyzed and optimized AST, its analyzer and the functions
+    # of the modules it imports (name -> argc), loaded through `modules`
+    ast = parse(code, lexer, ast)
+    imports = imported(ast)
+    externs = modules.exports(imports) if imports else {}
+    analyzer = SemanticAnalyzer(externs)
+    analyzer.analyze(ast)
+    if optimize:
+        ast = Optimizer().optimize(ast)
+    return ast, analyzer, externs
@@ -9,6 +9,7 @@ KEYWORDS = {
     "while": TokenType.WHILE,
     "fn": TokenType.FN,
     "return": TokenType.RETURN,
+    "import": TokenType.IMPORT,
 }
 
 
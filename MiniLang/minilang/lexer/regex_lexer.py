@@ -0,0 +1,79 @@
+import re
+
+from .token import Token, TokenType
+from .lexer import KEYWORDS
+
+
+SYMBOLS = {
+    "==": TokenType.EQ,
+    "=": TokenType.ASSIGN,
+    "+": TokenType.PLUS,
+    "-": TokenType.MINUS,
+    "*": TokenType.MUL,
+    "/": TokenType.DIV,
+    "(": TokenType.LPAREN,
+    ")": TokenType.RPAREN,
+    "{": TokenType.LBRACE,
+    "}": TokenType.RBRACE,
+    ";": TokenType.SEMICOLON,
+    "<": TokenType.LT,
+    ">": TokenType.GT,
+    ",": TokenType.COMMA,
+}
+
+# Group numbers of the master pattern, read back through m.lastindex
+NUMBER, IDENT, SYMBOL, ERROR = 1, 2, 3, 4
+
+# One match per token: leading whitespace is swallowed by the same match.
+# Longer symbols come first so "==" wins over "=". The trailing catch-all
+# turns any other character into an error instead of letting finditer
+# silently skip it; trailing whitespace simply ends the scan.
+MASTER = re.compile(
+    r"\s*(?:"
+    r"(\d+)"
+    r"|([^\W\d]\w*)"
+    r"|(" + "|".join(re.escape(s) for s in sorted(SYMBOLS, key=len, reverse=True)) + ")"
+    r"|(\S)"
+    r")"
+)
+
+
+class RegexLexer:
+    """
+    Drop-in replacement for `Lexer` driven by one compiled master pattern.
+
+    Produces the same tokens and positions: identifiers and numbers report
+    their start offset, symbols report the offset just past the symbol.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self._tokens = self.tokens()
+        self._eof = Token(TokenType.EOF, None, len(text))
+
+    def tokens(self):
+        text = self.text
+        keywords = KEYWORDS
+        symbols = SYMBOLS
+        ident = TokenType.IDENT
+        number = TokenType.NUMBER
+
+        for m in MASTER.finditer(text):
+            kind = m.lastindex
+
+            if kind == IDENT:
+                value = m.group(IDENT)
+                yield Token(keywords.get(value, ident), value, m.start(IDENT))
+            elif kind == SYMBOL:
+                value = m.group(SYMBOL)
+                yield Token(symbols[value], value, m.end())
+            elif kind == NUMBER:
+                yield Token(number, int(m.group(NUMBER)), m.start(NUMBER))
+            else:
+                raise Exception(f"Illegal character: {m.group(ERROR)}")
+
+        yield self._eof
+
+    def next_token(self):
+        # Like Lexer, keep answering EOF once the input is exhausted
+        return next(self._tokens, self._eof)
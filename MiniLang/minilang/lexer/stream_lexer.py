@@ -0,0 +1,121 @@
+import codecs
+import io
+from collections import deque
+
+from .token import Token, TokenType
+from .lexer import KEYWORDS
+from .regex_lexer import MASTER, SYMBOLS, NUMBER, IDENT, SYMBOL, ERROR
+
+
+class StreamLexer:
+    """
+    Scans a file object, mmap, str or bytes in fixed-size chunks and yields
+    tokens lazily, so neither the whole text nor the whole token list has
+    to be in memory. Tokens and positions match `Lexer` (positions are
+    character offsets, also for byte sources, which are decoded as UTF-8).
+    """
+
+    def __init__(self, source, chunk_size=1 << 16):
+        if isinstance(source, str):
+            source = io.StringIO(source)
+        elif isinstance(source, (bytes, bytearray)):
+            source = io.BytesIO(source)
+        self.source = source
+        self.chunk_size = chunk_size
+        self._tokens = self.tokens()
+        self._eof = None
+
+    def chunks(self):
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        while True:
+            raw = self.source.read(self.chunk_size)
+            if isinstance(raw, str):
+                text = raw
+            else:
+                # A chunk may end inside a multi-byte character
+                text = decoder.decode(raw, final=not raw)
+            if text:
+                yield text
+            if not raw:
+                return
+
+    def tokens(self):
+        keywords = KEYWORDS
+        symbols = SYMBOLS
+        ident = TokenType.IDENT
+        number = TokenType.NUMBER
+
+        buffer = ""
+        base = 0  # stream offset of buffer[0]
+        chunks = self.chunks()
+        at_end = False
+
+        while not at_end:
+            chunk = next(chunks, None)
+            if chunk is None:
+                at_end = True
+            else:
+                buffer += chunk
+
+            consumed = 0
+            end = len(buffer)
+            for m in MASTER.finditer(buffer):
+                # A token touching the end of the buffer may continue in
+                # the next chunk ("ab|c", "=|="): hold it back until then
+                if m.end() == end and not at_end:
+                    break
+                consumed = m.end()
+                kind = m.lastindex
+
+                if kind == IDENT:
+                    value = m.group(IDENT)
+                    yield Token(keywords.get(value, ident), value, base + m.start(IDENT))
+                elif kind == SYMBOL:
+                    value = m.group(SYMBOL)
+                    yield Token(symbols[value], value, base + m.end())
+                elif kind == NUMBER:
+                    yield Token(number, int(m.group(NUMBER)), base + m.start(NUMBER))
+                else:
+                    raise Exception(f"Illegal character: {m.group(ERROR)}")
+
+            buffer = buffer[consumed:]
+            base += consumed
+
+        self._eof = Token(TokenType.EOF, None, base + len(buffer))
+        yield self._eof
+
+    def next_token(self):
+        tok = next(self._tokens, None)
+        return tok if tok is not None else self._eof
+
+
+class TokenStream:
+    """
+    Adapts any iterable of tokens to the `next_token()` interface the
+    parser uses, with a small lookahead buffer for `peek()`.
+    """
+
+    def __init__(self, tokens):
+        self._tokens = iter(tokens)
+        self._lookahead = deque()
+        self._last = Token(TokenType.EOF, None, 0)
+
+    def _pull(self):
+        tok = next(self._tokens, None)
+        if tok is None:
+            # Exhausted (or never produced EOF): keep answering EOF
+            if self._last.type != TokenType.EOF:
+                self._last = Token(TokenType.EOF, None, self._last.position)
+            return self._last
+        self._last = tok
+        return tok
+
+    def peek(self, n=1):
+        while len(self._lookahead) < n:
+            self._lookahead.append(self._pull())
+        return self._lookahead[n - 1]
+
+    def next_token(self):
+        if self._lookahead:
+            return self._lookahead.popleft()
+        return self._pull()
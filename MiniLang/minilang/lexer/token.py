@@ -35,11 +35,14 @@ class TokenType(Enum):
     
     FN = "FN"
     RETURN = "RETURN"
+    IMPORT = "IMPORT"
     COMMA = "COMMA"
 
 
 
 class Token:
+    __slots__ = ("type", "value", "position")
+
     def __init__(self, type_, value, position):
         self.type = type_
         self.value = value
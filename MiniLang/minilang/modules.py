@@ -0,0 +1,119 @@
+import os
+
+from minilang.frontend import front_end
+from minilang.compiler.compiler import Compiler
+from minilang.compiler.linker import assemble
+from minilang.compiler import cache
+
+
+SUFFIX = ".ml"
+
+
+def compile_module(code, name, lexer="regex", ast="tree", optimize=True, modules=None):
+    """
+    Compile the source of module `name` into a relocatable `ObjectCode`.
+    The inliner and the peephole pass run after linking, over the
+    whole program. The modules it imports are loaded through `modules`
+    (by default a new ModuleLoader for the current directory).
+    """
+    if modules is None:
+        modules = ModuleLoader()
+    ast, analyzer, externs = front_end(code, lexer, ast, optimize, modules)
+    compiler = Compiler(symbols=analyzer.symbols, externs=externs)
+    bytecode, functions = compiler.compile(ast)
+    return assemble(name, bytecode, functions, compiler.globals, analyzer.imports, analyzer.pure_functions())
+
+
+class ModuleLoader:
+    """
+    Finds, compiles and caches the modules that programs import.
+
+    `import name;` loads `name.ml` from the first directory in `path`
+    that has it (by default the current directory). Each module is
+    compiled once into an `ObjectCode`. The loader keeps it for its own
+    lifetime, and with `use_cache` also in a `.mlo` file next to the
+    source or in `cache_dir`. Programs that share a library then only
+    link it. The object depends on its own source and on `optimize`,
+    nothing else: the linker re-checks every call into other modules.
+    """
+
+    def __init__(self, path=None, use_cache=True, cache_dir=None, lexer="regex", ast="tree", optimize=True):
+        self.path = [os.getcwd()] if path is None else list(path)
+        self.use_cache = use_cache
+        self.cache_dir = cache_dir
+        self.lexer = lexer
+        self.ast = ast
+        self.optimize = optimize
+        self.objects = {}  # module name -> ObjectCode
+        self.sources = {}  # module name -> (file, sha256 of its source)
+        self.loading = []  # modules being compiled, innermost last
+
+    def find(self, name):
+        for directory in self.path:
+            path = os.path.join(directory, name + SUFFIX)
+            if os.path.isfile(path):
+                return path
+        raise Exception(f"Module not found: {name}")
+
+    def load(self, name):
+        """The `ObjectCode` of module `name`, compiled if needed."""
+        if name in self.objects:
+            return self.objects[name]
+        if name in self.loading:
+            raise Exception(f"Circular import: {' -> '.join(self.loading[self.loading.index(name):] + [name])}")
+
+        path = self.find(name)
+        with open(path, "rb") as f:
+            data = f.read()
+        digest = cache.source_hash(data, options=(self.optimize,))
+        obj_path = cache.cache_path(path, self.cache_dir, ".mlo")
+
+        obj = cache.read_object(obj_path, digest) if self.use_cache else None
+        if obj is None:
+            code = data if self.lexer == "stream" else data.decode("utf-8")
+            self.loading.append(name)
+            try:
+                obj = compile_module(code, name, self.lexer, self.ast, self.optimize, self)
+            finally:
+                self.loading.pop()
+            if self.use_cache:
+                cache.write_object(obj_path, obj, digest)
+
+        self.objects[name] = obj
+        self.sources[name] = (path, cache.source_hash(data))
+        return obj
+
+    def exports(self, imports):
+        """Functions the imported modules define: name -> argc."""
+        externs = {}
+        for name in imports:
+            externs.update(self.load(name).exports())
+        return externs
+
+    def link_order(self, imports):
+        """Every module `imports` needs, each after the ones it imports."""
+        order = []
+        placed = {}  # module name -> False while its imports are visited
+        chain = []
+
+        def visit(name):
+            if placed.get(name):
+                return
+            if name in placed:
+                raise Exception(f"Circular import: {' -> '.join(chain[chain.index(name):] + [name])}")
+            placed[name] = False
+            chain.append(name)
+            obj = self.load(name)
+            for dependency in obj.imports:
+                visit(dependency)
+            chain.pop()
+            placed[name] = True
+            order.append(obj)
+
+        for name in imports:
+            visit(name)
+        return order
+
+    def dependencies(self, objects):
+        # (file, source hash) of each module, for cache.modules_unchanged
+        return [self.sources[obj.name] for obj in objects]
@@ -0,0 +1,246 @@
+from array import array
+
+from minilang.lexer.token import Token, TokenType
+from .ast import *
+
+
+# ------------------------------------------------------------
+# Struct-of-arrays AST.
+#
+# Every node is an integer index into parallel typed arrays:
+#   kind[i]   node kind (index into SPEC)
+#   op[i]     operator code of a BinaryOp (index into OPERATORS)
+#   a/b/c[i]  up to three fields: child index, name id, literal value,
+#             list offset or operator position, depending on the kind
+#
+# Variable-length children (statements, args, params) live in `lists`
+# as a length prefix followed by the items. Names are interned once in
+# `names`. `node(i)` returns a lightweight view that subclasses the
+# regular AST class, so every pass that works on the object AST works
+# on the arena unchanged; views are created on access and never stored.
+# ------------------------------------------------------------
+
+NODE = 0  # child node, -1 = None
+NAME = 1  # interned name
+VALUE = 2  # integer literal
+NODE_LIST = 3
+NAME_LIST = 4
+OP = 5  # operator token (code in `op`, position in the field)
+
+# kind -> (AST class, [(attribute, field, field type)]) in constructor order
+SPEC = [
+    (Program, [("statements", "a", NODE_LIST)]),
+    (Block, [("statements", "a", NODE_LIST)]),
+    (LetStatement, [("name", "a", NAME), ("value", "b", NODE)]),
+    (PrintStatement, [("expression", "a", NODE)]),
+    (IfStatement, [("condition", "a", NODE), ("then_branch", "b", NODE), ("else_branch", "c", NODE)]),
+    (WhileStatement, [("condition", "a", NODE), ("body", "b", NODE)]),
+    (Number, [("value", "a", VALUE)]),
+    (Identifier, [("name", "a", NAME)]),
+    (BinaryOp, [("left", "a", NODE), ("op", "c", OP), ("right", "b", NODE)]),
+    (AssignStatement, [("name", "a", NAME), ("value", "b", NODE)]),
+    (FunctionDef, [("name", "a", NAME), ("params", "b", NAME_LIST), ("body", "c", NODE)]),
+    (ReturnStatement, [("value", "a", NODE)]),
+    (CallExpression, [("name", "a", NAME), ("args", "b", NODE_LIST)]),
+    (ImportStatement, [("name", "a", NAME)]),
+]
+
+KIND = {cls: kind for kind, (cls, _) in enumerate(SPEC)}
+
+OPERATORS = [
+    TokenType.PLUS, TokenType.MINUS, TokenType.MUL, TokenType.DIV,
+    TokenType.LT, TokenType.GT, TokenType.EQ,
+]
+OPERATOR_CODE = {t: code for code, t in enumerate(OPERATORS)}
+
+INT32_MIN, INT32_MAX = -(1 << 31), (1 << 31) - 1
+
+
+def field_property(field, ftype):
+    def get(self):
+        return self.arena.read(self.index, field, ftype)
+
+    def set(self, value):
+        self.arena.write(self.index, field, ftype, value)
+
+    return property(get, set)
+
+
+def make_view(cls, fields):
+    namespace = {"__slots__": ("arena", "index")}
+    for attr, field, ftype in fields:
+        namespace[attr] = field_property(field, ftype)
+    return type(f"{cls.__name__}View", (cls,), namespace)
+
+
+VIEWS = [make_view(cls, fields) for cls, fields in SPEC]
+KIND.update({view: kind for kind, view in enumerate(VIEWS)})
+
+
+class AstArena:
+    def __init__(self):
+        self.kind = array("B")
+        self.op = array("B")
+        self.a = array("i")
+        self.b = array("i")
+        self.c = array("i")
+        self.lists = array("i")
+        self.names = []
+        self.name_ids = {}
+        self.big = {}  # node index -> literal too large for int32
+        self.root = -1
+
+    def __len__(self):
+        return len(self.kind)
+
+    def nbytes(self):
+        arrays = (self.kind, self.op, self.a, self.b, self.c, self.lists)
+        return sum(arr.itemsize * len(arr) for arr in arrays)
+
+    # --------------------------------------------------
+    # Views
+    # --------------------------------------------------
+    def node(self, index):
+        view = VIEWS[self.kind[index]].__new__(VIEWS[self.kind[index]])
+        view.arena = self
+        view.index = index
+        return view
+
+    def program(self):
+        return self.node(self.root)
+
+    # --------------------------------------------------
+    # Field access
+    # --------------------------------------------------
+    def intern(self, name):
+        name_id = self.name_ids.get(name)
+        if name_id is None:
+            name_id = self.name_ids[name] = len(self.names)
+            self.names.append(name)
+        return name_id
+
+    def read(self, index, field, ftype):
+        raw = getattr(self, field)[index]
+        if ftype == NODE:
+            return None if raw < 0 else self.node(raw)
+        if ftype == NAME:
+            return self.names[raw]
+        if ftype == VALUE:
+            return self.big.get(index, raw) if raw == 0 else raw
+        if ftype == OP:
+            kind = OPERATORS[self.op[index]]
+            return Token(kind, kind.value, raw)
+
+        count = self.lists[raw]
+        items = self.lists[raw + 1:raw + 1 + count]
+        if ftype == NODE_LIST:
+            return [self.node(i) for i in items]
+        return [self.names[i] for i in items]
+
+    def write(self, index, field, ftype, value):
+        if ftype == NODE:
+            raw = self.ref(value)
+        elif ftype == NAME:
+            raw = self.intern(value)
+        elif ftype == VALUE:
+            self.big.pop(index, None)
+            if INT32_MIN <= value <= INT32_MAX:
+                raw = value
+            else:
+                self.big[index] = value
+                raw = 0
+        elif ftype == OP:
+            self.op[index] = OPERATOR_CODE[value.type]
+            raw = value.position
+        else:
+            # Lists are append-only: a rewrite leaves the old slice behind
+            ref = self.ref if ftype == NODE_LIST else self.intern
+            items = [ref(v) for v in value]
+            raw = len(self.lists)
+            self.lists.append(len(items))
+            self.lists.extend(items)
+        getattr(self, field)[index] = raw
+
+    def ref(self, value):
+        # Child given as an index (parser), a view of this arena, or a
+        # regular AST object (e.g. a node created by the optimizer)
+        if value is None:
+            return -1
+        if isinstance(value, int):
+            return value
+        if getattr(value, "arena", None) is self:
+            return value.index
+        return self.add(value)
+
+    # --------------------------------------------------
+    # Construction
+    # --------------------------------------------------
+    def new(self, kind, *values):
+        index = len(self.kind)
+        self.kind.append(kind)
+        self.op.append(0)
+        self.a.append(0)
+        self.b.append(0)
+        self.c.append(-1)
+        for (attr, field, ftype), value in zip(SPEC[kind][1], values):
+            self.write(index, field, ftype, value)
+        return index
+
+    def add(self, node):
+        # Flatten an object AST (sub)tree into the arena
+        kind = KIND[type(node)]
+        values = [getattr(node, attr) for attr, _, _ in SPEC[kind][1]]
+        return self.new(kind, *values)
+
+    @classmethod
+    def from_tree(cls, program):
+        arena = cls()
+        arena.root = arena.add(program)
+        return arena
+
+    # --------------------------------------------------
+    # Parser node constructors (see Parser(nodes=...)):
+    # children arrive as indices, the result is an index
+    # --------------------------------------------------
+    def Program(self, statements):
+        self.root = self.new(KIND[Program], statements)
+        return self.program()
+
+    def Block(self, statements):
+        return self.new(KIND[Block], statements)
+
+    def LetStatement(self, name, value):
+        return self.new(KIND[LetStatement], name, value)
+
+    def PrintStatement(self, expression):
+        return self.new(KIND[PrintStatement], expression)
+
+    def IfStatement(self, condition, then_branch, else_branch=None):
+        return self.new(KIND[IfStatement], condition, then_branch, else_branch)
+
+    def WhileStatement(self, condition, body):
+        return self.new(KIND[WhileStatement], condition, body)
+
+    def Number(self, value):
+        return self.new(KIND[Number], value)
+
+    def Identifier(self, name):
+        return self.new(KIND[Identifier], name)
+
+    def BinaryOp(self, left, op, right):
+        return self.new(KIND[BinaryOp], left, op, right)
+
+    def AssignStatement(self, name, value):
+        return self.new(KIND[AssignStatement], name, value)
+
+    def FunctionDef(self, name, params, body):
+        return self.new(KIND[FunctionDef], name, params, body)
+
+    def ReturnStatement(self, value):
+        return self.new(KIND[ReturnStatement], value)
+
+    def CallExpression(self, name, args):
+        return self.new(KIND[CallExpression], name, args)
+
+    def ImportStatement(self, name):
+        return self.new(KIND[ImportStatement], name)
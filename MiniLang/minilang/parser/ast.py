@@ -1,25 +1,35 @@
 class Program:
+    __slots__ = ("statements",)
+
     def __init__(self, statements):
         self.statements = statements
 
 
 class Block:
+    __slots__ = ("statements",)
+
     def __init__(self, statements):
         self.statements = statements
 
 
 class LetStatement:
+    __slots__ = ("name", "value")
+
     def __init__(self, name, value):
         self.name = name
         self.value = value
 
 
 class PrintStatement:
+    __slots__ = ("expression",)
+
     def __init__(self, expression):
         self.expression = expression
 
 
 class IfStatement:
+    __slots__ = ("condition", "then_branch", "else_branch")
+
     def __init__(self, condition, then_branch, else_branch=None):
         self.condition = condition
         self.then_branch = then_branch
@@ -27,33 +37,45 @@ class IfStatement:
 
 
 class WhileStatement:
+    __slots__ = ("condition", "body")
+
     def __init__(self, condition, body):
         self.condition = condition
         self.body = body
 
 
 class Number:
+    __slots__ = ("value",)
+
     def __init__(self, value):
         self.value = value
 
 
 class Identifier:
+    __slots__ = ("name",)
+
     def __init__(self, name):
         self.name = name
 
 
 class BinaryOp:
+    __slots__ = ("left", "op", "right")
+
     def __init__(self, left, op, right):
         self.left = left
         self.op = op
         self.right = right
 
 class AssignStatement:
+    __slots__ = ("name", "value")
+
     def __init__(self, name, value):
         self.name = name
         self.value = value
 
 class FunctionDef:
+    __slots__ = ("name", "params", "body")
+
     def __init__(self, name, params, body):
         self.name = name
         self.params = params
@@ -61,11 +83,22 @@ class FunctionDef:
 
 
 class ReturnStatement:
+    __slots__ = ("value",)
+
     def __init__(self, value):
         self.value = value
 
 
+class ImportStatement:
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        self.name = name
+
+
 class CallExpression:
+    __slots__ = ("name", "args")
+
     def __init__(self, name, args):
         self.name = name
         self.args = args
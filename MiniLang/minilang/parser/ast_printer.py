@@ -1,82 +1,91 @@
 from .ast import *
+from .visitor import Visitor
 
 
-class ASTPrinter:
+class ASTPrinter(Visitor):
     def print(self, node, indent=0):
-        space = "  " * indent
-
-        # ================= PROGRAM =================
-        if isinstance(node, Program):
-            print(f"{space}Program")
-            for stmt in node.statements:
-                self.print(stmt, indent + 1)
-
-        # ================= LET =================
-        elif isinstance(node, LetStatement):
-            print(f"{space}LetStatement: {node.name}")
-            self.print(node.value, indent + 1)
-
-        # ================= ASSIGN =================
-        elif isinstance(node, AssignStatement):
-            print(f"{space}AssignStatement: {node.name}")
-            self.print(node.value, indent + 1)
-
-        # ================= PRINT =================
-        elif isinstance(node, PrintStatement):
-            print(f"{space}PrintStatement")
-            self.print(node.expression, indent + 1)
-
-        # ================= NUMBER =================
-        elif isinstance(node, Number):
-            print(f"{space}Number: {node.value}")
-
-        # ================= IDENTIFIER =================
-        elif isinstance(node, Identifier):
-            print(f"{space}Identifier: {node.name}")
-
-        # ================= BINARY =================
-        elif isinstance(node, BinaryOp):
-            print(f"{space}BinaryOp: {node.op.type.name}")
-            self.print(node.left, indent + 1)
-            self.print(node.right, indent + 1)
-
-        # ================= BLOCK =================
-        elif isinstance(node, Block):
-            print(f"{space}Block")
-            for stmt in node.statements:
-                self.print(stmt, indent + 1)
-
-        # ================= IF =================
-        elif isinstance(node, IfStatement):
-            print(f"{space}If")
-            self.print(node.condition, indent + 1)
-            self.print(node.then_branch, indent + 1)
-            if node.else_branch:
-                self.print(node.else_branch, indent + 1)
-
-        # ================= WHILE =================
-        elif isinstance(node, WhileStatement):
-            print(f"{space}While")
-            self.print(node.condition, indent + 1)
-            self.print(node.body, indent + 1)
-
-        # ================= FUNCTION DEF =================
-        elif isinstance(node, FunctionDef):
-            params = ", ".join(node.params)
-            print(f"{space}FunctionDef: {node.name}({params})")
-            self.print(node.body, indent + 1)
-
-        # ================= RETURN =================
-        elif isinstance(node, ReturnStatement):
-            print(f"{space}Return")
-            self.print(node.value, indent + 1)
-
-        # ================= CALL =================
-        elif isinstance(node, CallExpression):
-            print(f"{space}Call: {node.name}")
-            for arg in node.args:
-                self.print(arg, indent + 1)
-
-        # ================= UNKNOWN =================
-        else:
-            print(f"{space}Unknown node: {type(node)}")
+        self.indent = indent
+        self.visit(node)
+
+    def line(self, text):
+        print(f"{'  ' * self.indent}{text}")
+
+    def children(self, *nodes):
+        # Visit nodes one level deeper
+        self.indent += 1
+        for child in nodes:
+            yield child
+        self.indent -= 1
+
+    # ================= PROGRAM =================
+    def visit_Program(self, node):
+        self.line("Program")
+        return self.children(*node.statements)
+
+    # ================= LET =================
+    def visit_LetStatement(self, node):
+        self.line(f"LetStatement: {node.name}")
+        return self.children(node.value)
+
+    # ================= ASSIGN =================
+    def visit_AssignStatement(self, node):
+        self.line(f"AssignStatement: {node.name}")
+        return self.children(node.value)
+
+    # ================= PRINT =================
+    def visit_PrintStatement(self, node):
+        self.line("PrintStatement")
+        return self.children(node.expression)
+
+    # ================= NUMBER =================
+    def visit_Number(self, node):
+        self.line(f"Number: {node.value}")
+
+    # ================= IDENTIFIER =================
+    def visit_Identifier(self, node):
+        self.line(f"Identifier: {node.name}")
+
+    # ================= BINARY =================
+    def visit_BinaryOp(self, node):
+        self.line(f"BinaryOp: {node.op.type.name}")
+        return self.children(node.left, node.right)
+
+    # ================= BLOCK =================
+    def visit_Block(self, node):
+        self.line("Block")
+        return self.children(*node.statements)
+
+    # ================= IF =================
+    def visit_IfStatement(self, node):
+        self.line("If")
+        branches = (node.then_branch, node.else_branch) if node.else_branch else (node.then_branch,)
+        return self.children(node.condition, *branches)
+
+    # ================= WHILE =================
+    def visit_WhileStatement(self, node):
+        self.line("While")
+        return self.children(node.condition, node.body)
+
+    # ================= FUNCTION DEF =================
+    def visit_FunctionDef(self, node):
+        params = ", ".join(node.params)
+        self.line(f"FunctionDef: {node.name}({params})")
+        return self.children(node.body)
+
+    # ================= RETURN =================
+    def visit_ReturnStatement(self, node):
+        self.line("Return")
+        return self.children(node.value)
+
+    # ================= CALL =================
+    def visit_CallExpression(self, node):
+        self.line(f"Call: {node.name}")
+        return self.children(*node.args)
+
+    # ================= IMPORT =================
+    def visit_ImportStatement(self, node):
+        self.line(f"Import: {node.name}")
+
+    # ================= UNKNOWN =================
+    def generic_visit(self, node):
+        self.line(f"Unknown node: {type(node)}")
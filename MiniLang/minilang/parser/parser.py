@@ -1,10 +1,31 @@
 from minilang.lexer.token import TokenType
-from .ast import *
+from minilang.lexer.stream_lexer import TokenStream
+from . import ast
+
+
+# Infix operators and how tightly they bind: higher binds tighter, equal
+# powers group to the left. Comparisons share the additive level, so
+# `a < b + c` parses as `(a < b) + c`, as it always has in MiniLang.
+BINDING_POWER = {
+    TokenType.PLUS: 10,
+    TokenType.MINUS: 10,
+    TokenType.LT: 10,
+    TokenType.GT: 10,
+    TokenType.EQ: 10,
+    TokenType.MUL: 20,
+    TokenType.DIV: 20,
+}
 
 
 class Parser:
-    def __init__(self, lexer):
+    def __init__(self, lexer, nodes=None):
+        # Accept a lexer or any iterable/generator of tokens
+        if not hasattr(lexer, "next_token"):
+            lexer = TokenStream(lexer)
         self.lexer = lexer
+        self.next_token = lexer.next_token
+        # Node constructors: the ast module, or an AstArena to build flat
+        self.nodes = nodes if nodes is not None else ast
         self.current = self.lexer.next_token()
 
     # --------------------------------------------------
@@ -28,8 +49,12 @@ class Parser:
     def parse(self):
         statements = []
         while self.current.type != TokenType.EOF:
-            statements.append(self.statement())
-        return Program(statements)
+            if self.current.type == TokenType.IMPORT:
+                # Only at the top level of a file
+                statements.append(self.import_statement())
+            else:
+                statements.append(self.statement())
+        return self.nodes.Program(statements)
 
     # --------------------------------------------------
     # Statements
@@ -61,7 +86,7 @@ class Parser:
                self.eat(TokenType.ASSIGN)
                expr = self.expression()
                self.eat(TokenType.SEMICOLON)
-               return AssignStatement(name, expr)
+               return self.nodes.AssignStatement(name, expr)
 
         raise Exception(f"Invalid statement near {self.current}")
 
@@ -72,7 +97,7 @@ class Parser:
         while self.current.type != TokenType.RBRACE:
             statements.append(self.statement())
         self.eat(TokenType.RBRACE)
-        return Block(statements)
+        return self.nodes.Block(statements)
         
     def let_statement(self):
         self.eat(TokenType.LET)
@@ -87,8 +112,15 @@ class Parser:
 
         self.eat(TokenType.SEMICOLON)
 
-        return LetStatement(name, expr)
+        return self.nodes.LetStatement(name, expr)
+
 
+    def import_statement(self):
+        self.eat(TokenType.IMPORT)
+        name = self.current.value
+        self.eat(TokenType.IDENT)
+        self.eat(TokenType.SEMICOLON)
+        return self.nodes.ImportStatement(name)
 
     def print_statement(self):
         self.eat(TokenType.PRINT)
@@ -97,60 +129,41 @@ class Parser:
         self.eat(TokenType.RPAREN)
         self.eat(TokenType.SEMICOLON)
 
-        return PrintStatement(expr)
+        return self.nodes.PrintStatement(expr)
 
     def if_statement(self):
         self.eat(TokenType.LPAREN)
-        condition = self.comparison()
+        condition = self.expression()
         self.eat(TokenType.RPAREN)
         then_branch = self.block() if self.current.type == TokenType.LBRACE else self.statement()
         else_branch = None
         if self.match(TokenType.ELSE):
             else_branch = self.block() if self.current.type == TokenType.LBRACE else self.statement()
-        return IfStatement(condition, then_branch, else_branch)
+        return self.nodes.IfStatement(condition, then_branch, else_branch)
 
     def while_statement(self):
         self.eat(TokenType.LPAREN)
-        condition = self.comparison()
+        condition = self.expression()
         self.eat(TokenType.RPAREN)
         body = self.block() if self.current.type == TokenType.LBRACE else self.statement()
-        return WhileStatement(condition, body)
+        return self.nodes.WhileStatement(condition, body)
 
 
     # --------------------------------------------------
     # Expressions
     # --------------------------------------------------
-    def comparison(self):
-        node = self.expression()
-        while self.current.type in (TokenType.LT, TokenType.GT, TokenType.EQ):
-            op = self.current
-            self.eat(op.type)
-            node = BinaryOp(node, op, self.expression())
-        return node
-
-    def term(self):
-       node = self.factor()
-
-       while self.current.type in (TokenType.MUL, TokenType.DIV):
-          op = self.current
-          self.eat(op.type)
-          node = BinaryOp(node, op, self.factor())
-
-       return node
-
-
-    def expression(self):
-        node = self.term()
-
-        while self.current.type in (
-            TokenType.PLUS, TokenType.MINUS,
-            TokenType.LT, TokenType.GT, TokenType.EQ
-    ):
+    def expression(self, power=0):
+        # Precedence climbing: parse an operand, then fold in every
+        # operator that binds tighter than `power`
+        node = self.factor()
+        binding = BINDING_POWER.get
+        while True:
             op = self.current
-            self.eat(op.type)
-            node = BinaryOp(node, op, self.term())
-
-        return node
+            left = binding(op.type, 0)
+            if left <= power:
+                return node
+            self.current = self.next_token()
+            node = self.nodes.BinaryOp(node, op, self.expression(left))
 
     
     def function_def(self):
@@ -175,23 +188,23 @@ class Parser:
 
         body = self.block()
 
-        return FunctionDef(name, params, body)
+        return self.nodes.FunctionDef(name, params, body)
     
     def return_statement(self):
         self.eat(TokenType.RETURN)
         expr = self.expression()
         self.eat(TokenType.SEMICOLON)
-        return ReturnStatement(expr)
+        return self.nodes.ReturnStatement(expr)
 
 
     def factor(self):
         token = self.current
         if token.type == TokenType.NUMBER:
-            self.eat(TokenType.NUMBER)
-            return Number(token.value)
+            self.current = self.next_token()
+            return self.nodes.Number(token.value)
         elif token.type == TokenType.IDENT:
             name = token.value
-            self.eat(TokenType.IDENT)
+            self.current = self.next_token()
             if self.current.type == TokenType.LPAREN:
                 self.eat(TokenType.LPAREN)
                 args = []
@@ -201,8 +214,8 @@ class Parser:
                         self.eat(TokenType.COMMA)
                         args.append(self.expression())
                 self.eat(TokenType.RPAREN)
-                return CallExpression(name, args)
-            return Identifier(name)
+                return self.nodes.CallExpression(name, args)
+            return self.nodes.Identifier(name)
         
     # (expression)
         elif token.type == TokenType.LPAREN:
@@ -0,0 +1,88 @@
+from types import GeneratorType
+
+from . import ast
+
+
+# AST classes by name, for the `visit_<ClassName>` methods
+NODE_CLASSES = {
+    name: cls for name, cls in vars(ast).items()
+    if isinstance(cls, type) and cls.__module__ == ast.__name__
+}
+
+
+# Pushed under a child list whose node's result is awaited: resets it to None
+DONE = object()
+
+
+class Visitor:
+    """
+    Base class for AST passes: type-keyed dispatch, no recursion.
+
+    A pass defines `visit_<ClassName>(self, node)` methods, collected
+    into a per-class table keyed by node type (subclasses such as the
+    arena views find their base's method on first use). A method
+    returns one of:
+
+        a list      children to visit in order, when there is nothing
+                    left to do after them; the node's result is None
+        a generator for work between or after children: `value = yield
+                    child` visits `child` and sends back its result, and
+                    the generator's `return` value is the node's result
+        anything    else is the node's result (leaves)
+
+    `visit()` keeps pending children and suspended generators on an
+    explicit stack, so tree depth is limited by memory, not by Python's
+    recursion limit.
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.dispatch = {
+            node_class: getattr(cls, f"visit_{name}")
+            for name, node_class in NODE_CLASSES.items()
+            if hasattr(cls, f"visit_{name}")
+        }
+
+    def method(self, node):
+        table = type(self).dispatch
+        node_class = type(node)
+        for base in node_class.__mro__:
+            if base in table:
+                table[node_class] = table[base]
+                return table[base]
+        return type(self).generic_visit
+
+    def generic_visit(self, node):
+        raise Exception(f"Unknown AST node: {type(node)}")
+
+    def visit(self, node):
+        lookup = type(self).dispatch.get
+        generator = GeneratorType
+        stack = [node]  # nodes still to visit and suspended generators
+        pop = stack.pop
+        push = stack.append
+        value = None
+        while stack:
+            child = pop()
+            if child is DONE:
+                value = None
+                continue
+            if type(child) is generator:
+                try:
+                    item, child = child, child.send(value)
+                except StopIteration as done:
+                    value = done.value
+                    continue
+                push(item)
+
+            value = (lookup(type(child)) or self.method(child))(self, child)
+            kind = type(value)
+            if kind is generator:
+                push(value)
+                value = None
+            elif kind is list:
+                if not stack or type(stack[-1]) is generator:
+                    push(DONE)  # someone uses this node's result
+                stack += value[::-1]
+                value = None
+        return value
@@ -0,0 +1,82 @@
+from minilang.build import compile_source
+from minilang.vm.packed_vm import PackedVM
+
+
+class Program:
+    """
+    A compiled MiniLang program, safe to share and reuse.
+
+    The packed code is built once and only ever read: `run()` and
+    `call()` each execute on a fresh `PackedVM` (its own stack, frames
+    and globals), so any number of executions, in any number of threads,
+    can use the same `Program`. Globals start at 0 unless seeded with
+    `globals={"name": value}`; note that the optimizer may already have
+    folded a `let` that is never reassigned into the code that reads it.
+    PRINT goes to stdout, or to `output` (a sink from `minilang.vm.output`,
+    which the caller flushes).
+    """
+
+    __slots__ = ("_code", "_functions", "_global_slots")
+
+    def __init__(self, code):
+        set_ = object.__setattr__
+        set_(self, "_code", code)
+        set_(self, "_functions", dict(zip(code.names["functions"], code.functions)))
+        set_(self, "_global_slots", {name: slot for slot, name in enumerate(code.names["globals"])})
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Program is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("Program is immutable")
+
+    @property
+    def functions(self):
+        return tuple(self._functions)
+
+    @property
+    def globals(self):
+        return tuple(self._global_slots)
+
+    def disassemble(self):
+        return self._code.disassemble()
+
+    # --------------------------------------------------
+    # Execution
+    # --------------------------------------------------
+    def run(self, globals=None, output=None):
+        """Run the top-level code; returns the final globals by name."""
+        vm = self.vm(globals, output)
+        vm.run()
+        return {name: vm.globals[slot] for name, slot in self._global_slots.items()}
+
+    def call(self, name, *args, globals=None, output=None):
+        """Call function `name` without running the top-level code."""
+        if name not in self._functions:
+            raise Exception(f"Undefined function: {name}")
+        addr, argc, nlocals = self._functions[name]
+        if len(args) != argc:
+            raise Exception(f"Function '{name}' expects {argc} arguments, got {len(args)}")
+
+        vm = self.vm(globals, output)
+        vm.locals = list(args) + [0] * (nlocals - argc)
+        vm.ip = addr + 1
+        # RETURN with no caller stops the VM, leaving the result on top
+        vm.run()
+        return vm.stack[-1]
+
+    def vm(self, globals=None, output=None):
+        vm = PackedVM(self._code, output=output)
+        for name, value in (globals or {}).items():
+            if name not in self._global_slots:
+                raise Exception(f"Unknown global: {name}")
+            vm.globals[self._global_slots[name]] = value
+        return vm
+
+
+def compile(source, **options):
+    """
+    Compile MiniLang `source` into a reusable `Program`. `options` are
+    those of `build.compile_source` (lexer, optimize, peephole, inline).
+    """
+    return Program(compile_source(source, **options))
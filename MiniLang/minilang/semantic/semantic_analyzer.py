@@ -1,97 +1,142 @@
 from minilang.parser.ast import *
+from minilang.parser.visitor import Visitor
+from .symbol_table import SymbolTable
 
 
-class SemanticAnalyzer:
-    def __init__(self):
-        self.symbols = {}
+class SemanticAnalyzer(Visitor):
+    """
+    Checks declarations and resolves every variable use into a Binding
+    (scope depth, slot) of `self.symbols`, one chained scope per
+    function; `Compiler(symbols=...)` emits straight from those records.
+    """
+
+    def __init__(self, externs=None):
+        self.symbols = SymbolTable()
         self.functions = {}
+        # Functions of imported modules: name -> number of parameters
+        self.externs = externs or {}
+        self.imports = []
 
-    def analyze(self, node):
+        # Purity: a pure function doesn't print, reads and writes only its
+        # own params and locals, and calls only pure functions, so its
+        # result depends on its arguments alone
+        self.pure = {}  # function name -> bool, once its body is analyzed
 
-        # ---------------- PROGRAM ----------------
-        if isinstance(node, Program):
-            for stmt in node.statements:
-                self.analyze(stmt)
-
-        # ---------------- LET ----------------
-        elif isinstance(node, LetStatement):
-            if node.name in self.symbols:
-                raise Exception(f"Semantic Error: Variable '{node.name}' already declared")
-            self.analyze(node.value)
-            self.symbols[node.name] = True
-
-        # ---------------- ASSIGN ----------------
-        elif isinstance(node, AssignStatement):
-            if node.name not in self.symbols:
-                raise Exception(f"Semantic Error: Variable '{node.name}' used before declaration")
-            self.analyze(node.value)
-
-        # ---------------- IDENT ----------------
-        elif isinstance(node, Identifier):
-            if node.name not in self.symbols:
-                raise Exception(f"Semantic Error: Variable '{node.name}' used before declaration")
-
-        # ---------------- NUMBER ----------------
-        elif isinstance(node, Number):
-            pass
-
-        # ---------------- BINARY ----------------
-        elif isinstance(node, BinaryOp):
-            self.analyze(node.left)
-            self.analyze(node.right)
-
-        # ---------------- PRINT ----------------
-        elif isinstance(node, PrintStatement):
-            self.analyze(node.expression)
-
-        # ---------------- IF ----------------
-        elif isinstance(node, IfStatement):
-            self.analyze(node.condition)
-            self.analyze(node.then_branch)
-            if node.else_branch:
-                self.analyze(node.else_branch)
-
-        # ---------------- WHILE ----------------
-        elif isinstance(node, WhileStatement):
-            self.analyze(node.condition)
-            self.analyze(node.body)
-
-        # ---------------- BLOCK ----------------
-        elif isinstance(node, Block):
-            for stmt in node.statements:
-                self.analyze(stmt)
-
-        # ================= FUNCTION SUPPORT =================
-
-        # ---------- FUNCTION DEF ----------
-        elif isinstance(node, FunctionDef):
-            if node.name in self.functions:
-                raise Exception(f"Semantic Error: Function '{node.name}' already defined")
-
-            self.functions[node.name] = node
-
-            # New local scope for parameters
-            old_symbols = self.symbols.copy()
-
-            for param in node.params:
-                self.symbols[param] = True
-
-            self.analyze(node.body)
-
-            # Restore scope
-            self.symbols = old_symbols
-
-        # ---------- FUNCTION CALL ----------
-        elif isinstance(node, CallExpression):
-            if node.name not in self.functions:
-                raise Exception(f"Semantic Error: Function '{node.name}' not defined")
-
-            for arg in node.args:
-                self.analyze(arg)
-
-        # ---------- RETURN ----------
-        elif isinstance(node, ReturnStatement):
-            self.analyze(node.value)
-
-        else:
-            raise Exception(f"Semantic Error: Unknown node in semantic analysis: {type(node)}")
+    def analyze(self, node):
+        return self.visit(node)
+
+    def generic_visit(self, node):
+        raise Exception(f"Semantic Error: Unknown node in semantic analysis: {type(node)}")
+
+    # ---------------- PROGRAM / BLOCK ----------------
+    def visit_Program(self, node):
+        # Every function is callable from anywhere, before its definition too
+        work = list(node.statements)
+        while work:
+            stmt = work.pop()
+            if isinstance(stmt, FunctionDef):
+                if stmt.name in self.functions:
+                    raise Exception(f"Semantic Error: Function '{stmt.name}' already defined")
+                self.functions[stmt.name] = stmt
+                work.append(stmt.body)
+            elif isinstance(stmt, Block):
+                work.extend(stmt.statements)
+            elif isinstance(stmt, IfStatement):
+                work.append(stmt.then_branch)
+                if stmt.else_branch is not None:
+                    work.append(stmt.else_branch)
+            elif isinstance(stmt, WhileStatement):
+                work.append(stmt.body)
+        return node.statements
+
+    def visit_Block(self, node):
+        return node.statements
+
+    # ---------------- IMPORT ----------------
+    def visit_ImportStatement(self, node):
+        if node.name in self.imports:
+            raise Exception(f"Semantic Error: Module '{node.name}' already imported")
+        self.imports.append(node.name)
+
+    # ---------------- LET ----------------
+    def visit_LetStatement(self, node):
+        if self.symbols.exists(node.name):
+            raise Exception(f"Semantic Error: Variable '{node.name}' already declared")
+        yield node.value
+        self.symbols.define(node.name)
+
+    # ---------------- ASSIGN ----------------
+    def visit_AssignStatement(self, node):
+        self.access(node.name)
+        return [node.value]
+
+    # ---------------- IDENT ----------------
+    def visit_Identifier(self, node):
+        self.access(node.name)
+
+    # ---------------- NUMBER ----------------
+    def visit_Number(self, node):
+        pass
+
+    # ---------------- BINARY ----------------
+    def visit_BinaryOp(self, node):
+        return [node.left, node.right]
+
+    # ---------------- PRINT ----------------
+    def visit_PrintStatement(self, node):
+        self.impure()
+        return [node.expression]
+
+    # ---------------- IF ----------------
+    def visit_IfStatement(self, node):
+        if node.else_branch:
+            return [node.condition, node.then_branch, node.else_branch]
+        return [node.condition, node.then_branch]
+
+    # ---------------- WHILE ----------------
+    def visit_WhileStatement(self, node):
+        return [node.condition, node.body]
+
+    # ================= FUNCTION SUPPORT =================
+
+    # ---------- FUNCTION DEF ----------
+    def visit_FunctionDef(self, node):
+        # New local scope: parameters first, then the body's lets
+        self.symbols.push_scope(node.name)
+        for param in node.params:
+            self.symbols.declare(param)
+        yield node.body
+        self.pure[node.name] = self.symbols.pop_scope().pure
+
+    # ---------- FUNCTION CALL ----------
+    def visit_CallExpression(self, node):
+        if node.name not in self.functions and node.name not in self.externs:
+            raise Exception(f"Semantic Error: Function '{node.name}' not defined")
+
+        # Recursion is fine; a call to an enclosing function still being
+        # analyzed, to one defined further down or to another module is
+        # conservatively impure
+        current = self.symbols.current
+        if current.depth and not self.pure.get(node.name, self.symbols.functions.get(node.name) is current):
+            self.impure()
+
+        return node.args
+
+    # ---------- RETURN ----------
+    def visit_ReturnStatement(self, node):
+        return [node.value]
+
+    # ---------------- PURITY ----------------
+    def access(self, name):
+        binding = self.symbols.resolve(name)
+        if binding is None:
+            raise Exception(f"Semantic Error: Variable '{name}' used before declaration")
+        # Reading or writing anything but the function's own variables
+        if binding.depth != self.symbols.current.depth:
+            self.impure()
+
+    def impure(self):
+        self.symbols.current.pure = False
+
+    def pure_functions(self):
+        return [name for name, pure in self.pure.items() if pure]
@@ -1,17 +1,99 @@
+class Binding:
+    """
+    Where a variable lives: `depth` 0 is the globals, depth n the frame
+    of a function nested n deep; `slot` indexes that storage.
+    """
+
+    __slots__ = ("name", "depth", "slot")
+
+    def __init__(self, name, depth, slot):
+        self.name = name
+        self.depth = depth
+        self.slot = slot
+
+    def __repr__(self):
+        return f"Binding({self.name!r}, depth={self.depth}, slot={self.slot})"
+
+
+class Scope:
+    """
+    The variables of one function (or the globals), chained to the
+    enclosing scope. `declared` holds the names visible to inner scopes;
+    `resolved` maps every name used in this scope to its Binding.
+    """
+
+    __slots__ = ("parent", "depth", "declared", "resolved", "slots", "pure")
+
+    def __init__(self, parent=None):
+        self.parent = parent
+        self.depth = 0 if parent is None else parent.depth + 1
+        self.declared = {}
+        self.resolved = {}
+        self.slots = {}  # name -> Binding for every slot of this scope
+        self.pure = True
+
+
 class SymbolTable:
     def __init__(self):
-        self.scopes = [{}]  # stack of scopes
+        self.globals = Scope()
+        self.current = self.globals
+        self.functions = {}  # function name -> Scope of its body
 
-    def push_scope(self):
-        self.scopes.append({})
+    def push_scope(self, function=None):
+        self.current = Scope(self.current)
+        if function is not None:
+            self.functions[function] = self.current
+        return self.current
 
     def pop_scope(self):
-        self.scopes.pop()
+        scope = self.current
+        self.current = scope.parent
+        return scope
+
+    def lookup(self, name):
+        # Innermost declaration of name, or None
+        scope = self.current
+        while scope is not None:
+            if name in scope.declared:
+                return scope.declared[name]
+            scope = scope.parent
+        return None
+
+    def exists(self, name):
+        return self.lookup(name) is not None
 
     def define(self, name):
-        if name in self.scopes[-1]:
+        if self.exists(name):
             raise Exception(f"Semantic Error: Variable '{name}' already declared")
-        self.scopes[-1][name] = True
+        return self.declare(name)
 
-    def exists(self, name):
-        return any(name in scope for scope in self.scopes)
+    def declare(self, name):
+        # Parameters may shadow outer names
+        binding = self.slot(self.current, name)
+        self.current.declared[name] = binding
+        self.current.resolved[name] = binding
+        return binding
+
+    def resolve(self, name):
+        # The Binding of a use of name in the current scope, or None
+        scope = self.current
+        if name in scope.resolved:
+            return scope.resolved[name]
+        binding = self.lookup(name)
+        if binding is None:
+            return None
+        if 0 < binding.depth < scope.depth:
+            # No closures: a nested function reads and writes an
+            # enclosing function's variable as the global of that name,
+            # like every backend always has
+            binding = self.slot(self.globals, name)
+        scope.resolved[name] = binding
+        return binding
+
+    def slot(self, scope, name):
+        if name not in scope.slots:
+            scope.slots[name] = Binding(name, scope.depth, len(scope.slots))
+        return scope.slots[name]
+
+    def global_slots(self):
+        return {name: binding.slot for name, binding in self.globals.slots.items()}
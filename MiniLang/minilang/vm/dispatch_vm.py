@@ -0,0 +1,343 @@
+import operator
+
+from minilang.compiler.bytecode import OpCode, BRANCH_TESTS
+from .vm import count_globals
+from .memo import MISSING
+from .output import writer
+
+
+class DispatchVM:
+    """
+    Table-dispatched engine.
+
+    Before running, every instruction is decoded once into a closure that
+    performs the operation and returns the next instruction pointer, so the
+    hot loop is just `ip = code[ip]()` with no opcode comparisons.
+    """
+
+    def __init__(self, bytecode, num_globals=None, memo=None, output=None):
+        self.bytecode = bytecode
+        self.stack = []
+        if num_globals is None:
+            num_globals = count_globals(bytecode)
+        self.globals = [0] * num_globals
+        self.locals = []  # slots of the active frame
+        self.call_stack = []  # saved (return_ip, locals) frames
+        self.ip = 0
+        self.memo = memo  # MemoCache for pure calls, or None
+        self.output = output  # PRINT sink, or None for print()
+        self.code = self.decode()
+
+    # -----------------------------------------------------
+    # DECODE
+    # -----------------------------------------------------
+    def decode(self):
+        builders = {
+            OpCode.PUSH_CONST: self._push_const,
+            OpCode.LOAD_LOCAL: self._load_local,
+            OpCode.STORE_LOCAL: self._store_local,
+            OpCode.LOAD_GLOBAL: self._load_global,
+            OpCode.STORE_GLOBAL: self._store_global,
+            OpCode.ADD: self._arith(operator.add),
+            OpCode.SUB: self._arith(operator.sub),
+            OpCode.MUL: self._arith(operator.mul),
+            OpCode.DIV: self._arith(operator.floordiv),
+            OpCode.LT: self._lt,
+            OpCode.GT: self._gt,
+            OpCode.EQ: self._eq,
+            OpCode.PRINT: self._print,
+            OpCode.JUMP: self._jump,
+            OpCode.JUMP_IF_FALSE: self._jump_if_false,
+            OpCode.INC_LOCAL: self._inc_local,
+            OpCode.INC_GLOBAL: self._inc_global,
+            OpCode.JUMP_IF_NOT_LT: self._compare_branch(operator.lt, False),
+            OpCode.JUMP_IF_NOT_GT: self._compare_branch(operator.gt, False),
+            OpCode.JUMP_IF_NOT_EQ: self._compare_branch(operator.eq, False),
+            OpCode.JUMP_IF_LT: self._compare_branch(operator.lt, True),
+            OpCode.JUMP_IF_GT: self._compare_branch(operator.gt, True),
+            OpCode.JUMP_IF_EQ: self._compare_branch(operator.eq, True),
+            OpCode.BRANCH_LOCAL: self._branch_local,
+            OpCode.BRANCH_GLOBAL: self._branch_global,
+            OpCode.FUNC_START: self._jump,
+            OpCode.CALL: self._call,
+            OpCode.TAIL_CALL: self._tail_call,
+            OpCode.RETURN: self._return,
+            OpCode.HALT: self._halt,
+        }
+
+        code = []
+        for ip, instr in enumerate(self.bytecode):
+            builder = builders.get(instr.opcode)
+            if builder is None:
+                raise RuntimeError(f"Unknown opcode {instr.opcode}")
+            code.append(builder(ip, instr.operand))
+        return code
+
+    # -----------------------------------------------------
+    # RUN
+    # -----------------------------------------------------
+    def run(self):
+        code = self.code
+        end = len(code)
+        ip = self.ip
+        while ip < end:
+            ip = code[ip]()
+        self.ip = ip
+
+    # -----------------------------------------------------
+    # HANDLER BUILDERS
+    # -----------------------------------------------------
+    def _push_const(self, ip, arg):
+        push = self.stack.append
+        nxt = ip + 1
+
+        def push_const():
+            push(arg)
+            return nxt
+        return push_const
+
+    def _load_local(self, ip, arg):
+        push = self.stack.append
+        vm = self
+        nxt = ip + 1
+
+        def load_local():
+            push(vm.locals[arg])
+            return nxt
+        return load_local
+
+    def _store_local(self, ip, arg):
+        stack = self.stack
+        vm = self
+        nxt = ip + 1
+
+        def store_local():
+            if not stack:
+                raise RuntimeError("Stack underflow on STORE_LOCAL")
+            vm.locals[arg] = stack.pop()
+            return nxt
+        return store_local
+
+    def _load_global(self, ip, arg):
+        push = self.stack.append
+        globals_ = self.globals
+        nxt = ip + 1
+
+        def load_global():
+            push(globals_[arg])
+            return nxt
+        return load_global
+
+    def _store_global(self, ip, arg):
+        stack = self.stack
+        globals_ = self.globals
+        nxt = ip + 1
+
+        def store_global():
+            if not stack:
+                raise RuntimeError("Stack underflow on STORE_GLOBAL")
+            globals_[arg] = stack.pop()
+            return nxt
+        return store_global
+
+    def _arith(self, fn):
+        def build(ip, arg):
+            stack = self.stack
+            pop = stack.pop
+            nxt = ip + 1
+
+            def arith():
+                b = pop()
+                stack[-1] = fn(stack[-1], b)
+                return nxt
+            return arith
+        return build
+
+    def _lt(self, ip, arg):
+        stack = self.stack
+        pop = stack.pop
+        nxt = ip + 1
+
+        def lt():
+            b = pop()
+            stack[-1] = 1 if stack[-1] < b else 0
+            return nxt
+        return lt
+
+    def _gt(self, ip, arg):
+        stack = self.stack
+        pop = stack.pop
+        nxt = ip + 1
+
+        def gt():
+            b = pop()
+            stack[-1] = 1 if stack[-1] > b else 0
+            return nxt
+        return gt
+
+    def _eq(self, ip, arg):
+        stack = self.stack
+        pop = stack.pop
+        nxt = ip + 1
+
+        def eq():
+            b = pop()
+            stack[-1] = 1 if stack[-1] == b else 0
+            return nxt
+        return eq
+
+    def _print(self, ip, arg):
+        pop = self.stack.pop
+        write = writer(self.output)
+        nxt = ip + 1
+
+        def print_():
+            write(pop())
+            return nxt
+        return print_
+
+    def _jump(self, ip, arg):
+        def jump():
+            return arg
+        return jump
+
+    def _jump_if_false(self, ip, arg):
+        pop = self.stack.pop
+        nxt = ip + 1
+
+        def jump_if_false():
+            return arg if pop() == 0 else nxt
+        return jump_if_false
+
+    def _inc_local(self, ip, arg):
+        slot, amount = arg
+        vm = self
+        nxt = ip + 1
+
+        def inc_local():
+            vm.locals[slot] += amount
+            return nxt
+        return inc_local
+
+    def _inc_global(self, ip, arg):
+        slot, amount = arg
+        globals_ = self.globals
+        nxt = ip + 1
+
+        def inc_global():
+            globals_[slot] += amount
+            return nxt
+        return inc_global
+
+    def _compare_branch(self, compare, when):
+        def build(ip, arg):
+            pop = self.stack.pop
+            nxt = ip + 1
+
+            if when:
+                def branch():
+                    b = pop()
+                    return arg if compare(pop(), b) else nxt
+            else:
+                def branch():
+                    b = pop()
+                    return nxt if compare(pop(), b) else arg
+            return branch
+        return build
+
+    def _branch_local(self, ip, arg):
+        slot, const, test, target = arg
+        test = BRANCH_TESTS[test]
+        vm = self
+        nxt = ip + 1
+
+        def branch_local():
+            return target if test(vm.locals[slot], const) else nxt
+        return branch_local
+
+    def _branch_global(self, ip, arg):
+        slot, const, test, target = arg
+        test = BRANCH_TESTS[test]
+        globals_ = self.globals
+        nxt = ip + 1
+
+        def branch_global():
+            return target if test(globals_[slot], const) else nxt
+        return branch_global
+
+    def _call(self, ip, arg):
+        func_addr, argc, nlocals = arg
+        stack = self.stack
+        call_stack = self.call_stack
+        vm = self
+        nxt = ip + 1
+        target = func_addr + 1
+        padding = [0] * (nlocals - argc)
+        memo = self.memo
+
+        def call():
+            base = len(stack) - argc
+            frame = stack[base:]
+            del stack[base:]
+            frame.extend(padding)
+            call_stack.append((nxt, vm.locals))
+            vm.locals = frame
+            return target
+
+        if memo is None or func_addr not in memo.functions:
+            return call
+
+        def memo_call():
+            key = (func_addr, tuple(stack[len(stack) - argc:]))
+            value = memo.get(key)
+            if value is MISSING:
+                memo.pending.append((len(call_stack) + 1, key))
+                return call()
+            del stack[len(stack) - argc:]
+            stack.append(value)
+            return nxt
+        return memo_call
+
+    def _tail_call(self, ip, arg):
+        func_addr, argc, nlocals = arg
+        stack = self.stack
+        vm = self
+        target = func_addr + 1
+        padding = [0] * (nlocals - argc)
+
+        def tail_call():
+            base = len(stack) - argc
+            frame = stack[base:]
+            del stack[base:]
+            frame.extend(padding)
+            vm.locals = frame
+            return target
+        return tail_call
+
+    def _return(self, ip, arg):
+        call_stack = self.call_stack
+        vm = self
+        end = len(self.bytecode)
+        memo = self.memo
+        stack = self.stack
+
+        def return_():
+            if not call_stack:
+                return end
+            ret, vm.locals = call_stack.pop()
+            return ret
+
+        if memo is None:
+            return return_
+
+        def memo_return():
+            memo.returned(len(call_stack), stack[-1])
+            return return_()
+        return memo_return
+
+    def _halt(self, ip, arg):
+        end = len(self.bytecode)
+
+        def halt():
+            return end
+        return halt
@@ -0,0 +1,74 @@
+from collections import OrderedDict
+
+
+DEFAULT_SIZE = 1024
+
+MISSING = object()
+
+
+class MemoCache:
+    """
+    Bounded LRU cache for the results of pure function calls.
+
+    `functions` holds the entry addresses (FUNC_START) of the functions
+    `SemanticAnalyzer` found pure; keys are (address, argument tuple).
+    Engines check the cache on CALL; on a miss they note the key in
+    `pending` with the call depth and store the result when that frame
+    returns. A TAIL_CALL keeps the pending key, since the tail callee's
+    result is the original call's result, but is not looked up itself.
+    """
+
+    def __init__(self, functions, size=DEFAULT_SIZE):
+        self.functions = frozenset(functions)
+        self.size = size
+        self.entries = OrderedDict()
+        self.pending = []  # (call depth, key) of calls awaiting their result
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        value = self.entries.get(key, MISSING)
+        if value is MISSING:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        if self.size <= 0:
+            return
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+    def returned(self, depth, value):
+        # Called on RETURN with the call depth before the frame is popped
+        pending = self.pending
+        if pending and pending[-1][0] == depth:
+            self.put(pending.pop()[1], value)
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self.entries),
+            "size": self.size,
+        }
+
+    def format(self):
+        calls = self.hits + self.misses
+        rate = self.hits / calls * 100 if calls else 0.0
+        return (
+            f"memo: {self.hits} hits, {self.misses} misses ({rate:.1f}% hit rate), "
+            f"{len(self.entries)}/{self.size} entries"
+        )
+
+
+def for_program(functions, pure, size=DEFAULT_SIZE):
+    """
+    Build a cache from a `name -> (addr, ...)` function table and the names
+    of the pure functions.
+    """
+    return MemoCache((functions[name][0] for name in pure if name in functions), size)
@@ -0,0 +1,120 @@
+import io
+import sys
+
+
+# When a StreamSink hands its buffer to the stream:
+#   size  whenever `buffer_size` characters are pending (and at flush)
+#   line  after every value, like a line-buffered terminal
+#   exit  only on flush()/close(); the buffer grows as needed
+FLUSH_POLICIES = ("size", "line", "exit")
+
+DEFAULT_BUFFER_SIZE = 64 * 1024
+
+
+class StreamSink:
+    """
+    Buffered PRINT output to a text or binary stream (sys.stdout by
+    default, a file, a `StringIO`, a socket file, ...). Values are
+    formatted like `print()` and collected; the stream sees one write
+    per buffer. Whoever creates the sink flushes or closes it after the
+    run (it is a context manager).
+    """
+
+    def __init__(self, stream=None, buffer_size=DEFAULT_BUFFER_SIZE, flush="size", encoding="utf-8"):
+        if flush not in FLUSH_POLICIES:
+            raise ValueError(f"Unknown flush policy: {flush}")
+        self.stream = sys.stdout if stream is None else stream
+        self.binary = is_binary(self.stream)
+        self.encoding = encoding
+        self.policy = flush
+        self.limit = {"size": buffer_size, "line": 0, "exit": float("inf")}[flush]
+        self.parts = []
+        self.pending = 0
+        self.owns_stream = False
+
+    @classmethod
+    def open(cls, path, **options):
+        sink = cls(open(path, "wb"), **options)
+        sink.owns_stream = True
+        return sink
+
+    def write(self, value):
+        text = f"{value}\n"
+        self.parts.append(text)
+        self.pending += len(text)
+        if self.pending >= self.limit:
+            self.flush()
+
+    def flush(self):
+        if self.parts:
+            text = "".join(self.parts)
+            self.parts = []
+            self.pending = 0
+            self.stream.write(text.encode(self.encoding) if self.binary else text)
+        self.stream.flush()
+
+    def close(self):
+        self.flush()
+        if self.owns_stream:
+            self.stream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ListSink:
+    """Collects the printed values themselves, for capture and tests."""
+
+    def __init__(self, values=None):
+        self.values = [] if values is None else values
+        self.write = self.values.append
+
+    def text(self):
+        return "".join(f"{value}\n" for value in self.values)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CallbackSink:
+    """Hands every printed value to `callback(value)` as it is produced."""
+
+    def __init__(self, callback):
+        self.write = callback
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def is_binary(stream):
+    if isinstance(stream, (io.RawIOBase, io.BufferedIOBase)):
+        return True
+    if isinstance(stream, io.TextIOBase):
+        return False
+    return "b" in getattr(stream, "mode", "")
+
+
+def writer(output):
+    # What PRINT calls: the sink's write, or the built-in print
+    return print if output is None else output.write
@@ -0,0 +1,235 @@
+from minilang.compiler.bytecode import OpCode, BRANCH_TESTS
+from .memo import MISSING
+from .output import writer
+
+
+# Int opcodes bound once so the hot loop compares small ints, not Enums
+PUSH_CONST = OpCode.PUSH_CONST.value
+LOAD_LOCAL = OpCode.LOAD_LOCAL.value
+STORE_LOCAL = OpCode.STORE_LOCAL.value
+LOAD_GLOBAL = OpCode.LOAD_GLOBAL.value
+STORE_GLOBAL = OpCode.STORE_GLOBAL.value
+ADD = OpCode.ADD.value
+SUB = OpCode.SUB.value
+MUL = OpCode.MUL.value
+DIV = OpCode.DIV.value
+LT = OpCode.LT.value
+GT = OpCode.GT.value
+EQ = OpCode.EQ.value
+JUMP = OpCode.JUMP.value
+JUMP_IF_FALSE = OpCode.JUMP_IF_FALSE.value
+INC_LOCAL = OpCode.INC_LOCAL.value
+INC_GLOBAL = OpCode.INC_GLOBAL.value
+JUMP_IF_NOT_LT = OpCode.JUMP_IF_NOT_LT.value
+JUMP_IF_NOT_GT = OpCode.JUMP_IF_NOT_GT.value
+JUMP_IF_NOT_EQ = OpCode.JUMP_IF_NOT_EQ.value
+JUMP_IF_LT = OpCode.JUMP_IF_LT.value
+JUMP_IF_GT = OpCode.JUMP_IF_GT.value
+JUMP_IF_EQ = OpCode.JUMP_IF_EQ.value
+BRANCH_LOCAL = OpCode.BRANCH_LOCAL.value
+BRANCH_GLOBAL = OpCode.BRANCH_GLOBAL.value
+PRINT = OpCode.PRINT.value
+CALL = OpCode.CALL.value
+TAIL_CALL = OpCode.TAIL_CALL.value
+RETURN = OpCode.RETURN.value
+FUNC_START = OpCode.FUNC_START.value
+HALT = OpCode.HALT.value
+
+
+# Pooled BRANCH_x operands carry the int value of their compare opcode
+TESTS = {op.value: test for op, test in BRANCH_TESTS.items()}
+
+
+class PackedVM:
+    """Executes a `PackedCode` stream directly from its arrays."""
+
+    def __init__(self, code, memo=None, output=None):
+        self.code = code
+        self.stack = []
+        self.globals = [0] * code.num_globals
+        self.locals = []  # slots of the active frame
+        self.call_stack = []  # saved (return_ip, locals) frames
+        self.ip = 0
+        self.memo = memo  # MemoCache for pure calls, or None
+        self.output = output  # PRINT sink, or None for print()
+
+    # -----------------------------------------------------
+    # RUN
+    # -----------------------------------------------------
+    def run(self):
+        ops = self.code.ops
+        args = self.code.args
+        consts = self.code.consts
+        functions = self.code.functions
+
+        stack = self.stack
+        push = stack.append
+        pop = stack.pop
+        globals_ = self.globals
+        locals_ = self.locals
+        call_stack = self.call_stack
+        memo = self.memo
+        write = writer(self.output)
+        pure = memo.functions if memo is not None else ()
+
+        ip = self.ip
+        end = len(ops)
+
+        while ip < end:
+            op = ops[ip]
+            arg = args[ip]
+            ip += 1
+
+            # ---------------- VARIABLES ----------------
+            if op == LOAD_LOCAL:
+                push(locals_[arg])
+
+            elif op == LOAD_GLOBAL:
+                push(globals_[arg])
+
+            elif op == PUSH_CONST:
+                push(consts[arg])
+
+            elif op == STORE_LOCAL:
+                if not stack:
+                    raise RuntimeError("Stack underflow on STORE_LOCAL")
+                locals_[arg] = pop()
+
+            elif op == STORE_GLOBAL:
+                if not stack:
+                    raise RuntimeError("Stack underflow on STORE_GLOBAL")
+                globals_[arg] = pop()
+
+            elif op == INC_LOCAL:
+                slot, amount = consts[arg]
+                locals_[slot] += amount
+
+            elif op == INC_GLOBAL:
+                slot, amount = consts[arg]
+                globals_[slot] += amount
+
+            # ---------------- ARITH ----------------
+            elif op == ADD:
+                b = pop()
+                stack[-1] = stack[-1] + b
+
+            elif op == SUB:
+                b = pop()
+                stack[-1] = stack[-1] - b
+
+            elif op == MUL:
+                b = pop()
+                stack[-1] = stack[-1] * b
+
+            elif op == DIV:
+                b = pop()
+                stack[-1] = stack[-1] // b
+
+            # ---------------- COMPARE ----------------
+            elif op == LT:
+                b = pop()
+                stack[-1] = 1 if stack[-1] < b else 0
+
+            elif op == GT:
+                b = pop()
+                stack[-1] = 1 if stack[-1] > b else 0
+
+            elif op == EQ:
+                b = pop()
+                stack[-1] = 1 if stack[-1] == b else 0
+
+            # ---------------- CONTROL ----------------
+            elif op == JUMP_IF_FALSE:
+                if pop() == 0:
+                    ip = arg
+
+            elif op == JUMP or op == FUNC_START:
+                ip = arg
+
+            elif op == BRANCH_LOCAL:
+                slot, const, test, target = consts[arg]
+                if TESTS[test](locals_[slot], const):
+                    ip = target
+
+            elif op == BRANCH_GLOBAL:
+                slot, const, test, target = consts[arg]
+                if TESTS[test](globals_[slot], const):
+                    ip = target
+
+            elif op == JUMP_IF_NOT_LT:
+                b = pop()
+                if not pop() < b:
+                    ip = arg
+
+            elif op == JUMP_IF_LT:
+                b = pop()
+                if pop() < b:
+                    ip = arg
+
+            elif op == JUMP_IF_NOT_GT:
+                b = pop()
+                if not pop() > b:
+                    ip = arg
+
+            elif op == JUMP_IF_GT:
+                b = pop()
+                if pop() > b:
+                    ip = arg
+
+            elif op == JUMP_IF_NOT_EQ:
+                b = pop()
+                if not pop() == b:
+                    ip = arg
+
+            elif op == JUMP_IF_EQ:
+                b = pop()
+                if pop() == b:
+                    ip = arg
+
+            # ---------------- FUNCTIONS ----------------
+            elif op == CALL:
+                func_addr, argc, nlocals = functions[arg]
+                base = len(stack) - argc
+                if func_addr in pure:
+                    key = (func_addr, tuple(stack[base:]))
+                    value = memo.get(key)
+                    if value is not MISSING:
+                        del stack[base:]
+                        push(value)
+                        continue
+                    memo.pending.append((len(call_stack) + 1, key))
+                frame = stack[base:]
+                del stack[base:]
+                frame.extend([0] * (nlocals - argc))
+                call_stack.append((ip, locals_))
+                locals_ = frame
+                ip = func_addr + 1
+
+            elif op == TAIL_CALL:
+                func_addr, argc, nlocals = functions[arg]
+                base = len(stack) - argc
+                locals_ = stack[base:]
+                del stack[base:]
+                locals_.extend([0] * (nlocals - argc))
+                ip = func_addr + 1
+
+            elif op == RETURN:
+                if memo is not None:
+                    memo.returned(len(call_stack), stack[-1])
+                if not call_stack:
+                    break
+                ip, locals_ = call_stack.pop()
+
+            # ---------------- IO ----------------
+            elif op == PRINT:
+                write(pop())
+
+            # ---------------- HALT ----------------
+            elif op == HALT:
+                break
+
+            else:
+                raise RuntimeError(f"Unknown opcode {op}")
+
+        self.ip = ip
+        self.locals = locals_
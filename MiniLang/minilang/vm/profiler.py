@@ -0,0 +1,175 @@
+import json
+import time
+
+from minilang.compiler.bytecode import OpCode
+from .dispatch_vm import DispatchVM
+
+
+MAIN = "<main>"
+
+
+class Profile:
+    """
+    Result of a profiled run.
+
+    `addresses[ip]` counts how often the instruction at `ip` ran and
+    `seconds[ip]` the time spent in it. `functions` maps each function
+    (plus "<main>" for top-level code) to its call count, inclusive time
+    (including callees, counted once for recursive activations) and
+    exclusive time.
+    """
+
+    def __init__(self, bytecode, addresses, seconds, functions, total_seconds):
+        self.bytecode = bytecode
+        self.addresses = addresses
+        self.seconds = seconds
+        self.functions = functions
+        self.total_seconds = total_seconds
+
+    @property
+    def instructions(self):
+        return sum(self.addresses)
+
+    def opcodes(self):
+        # opcode name -> {"count", "seconds"}, aggregated from the addresses
+        result = {}
+        for instr, count, seconds in zip(self.bytecode, self.addresses, self.seconds):
+            if count:
+                entry = result.setdefault(instr.opcode.name, {"count": 0, "seconds": 0.0})
+                entry["count"] += count
+                entry["seconds"] += seconds
+        return result
+
+    def hot_addresses(self, limit=None):
+        hot = sorted(
+            (ip for ip, count in enumerate(self.addresses) if count),
+            key=lambda ip: (-self.addresses[ip], ip),
+        )
+        return hot[:limit]
+
+    def to_dict(self):
+        return {
+            "total_seconds": self.total_seconds,
+            "instructions": self.instructions,
+            "opcodes": self.opcodes(),
+            "addresses": [
+                {
+                    "address": ip,
+                    "instruction": repr(self.bytecode[ip]),
+                    "count": self.addresses[ip],
+                    "seconds": self.seconds[ip],
+                }
+                for ip in self.hot_addresses()
+            ],
+            "functions": self.functions,
+        }
+
+    def to_json(self, indent=2):
+        return json.dumps(self.to_dict(), indent=indent)
+
+    def format(self, limit=15):
+        total = self.total_seconds or 1e-12
+        lines = [
+            f"{self.instructions} instructions in {self.total_seconds * 1000:.3f} ms",
+            "",
+            f"{'opcode':<18}{'count':>12}{'ms':>12}{'%':>8}",
+        ]
+        opcodes = sorted(self.opcodes().items(), key=lambda item: -item[1]["seconds"])
+        for name, entry in opcodes:
+            lines.append(
+                f"{name:<18}{entry['count']:>12}{entry['seconds'] * 1000:>12.3f}"
+                f"{entry['seconds'] / total * 100:>8.1f}"
+            )
+
+        lines += ["", f"{'address':<8}{'instruction':<40}{'count':>12}{'ms':>12}"]
+        for ip in self.hot_addresses(limit):
+            lines.append(
+                f"{ip:<8}{repr(self.bytecode[ip]):<40}{self.addresses[ip]:>12}"
+                f"{self.seconds[ip] * 1000:>12.3f}"
+            )
+
+        lines += ["", f"{'function':<18}{'calls':>10}{'incl ms':>12}{'excl ms':>12}"]
+        functions = sorted(self.functions.items(), key=lambda item: -item[1]["exclusive"])
+        for name, entry in functions:
+            lines.append(
+                f"{name:<18}{entry['calls']:>10}{entry['inclusive'] * 1000:>12.3f}"
+                f"{entry['exclusive'] * 1000:>12.3f}"
+            )
+        return "\n".join(lines)
+
+
+class ProfilingVM(DispatchVM):
+    """
+    Instrumented engine. It executes the same per-instruction handlers as
+    `DispatchVM`, but times every step and follows CALL/RETURN to attribute
+    time to functions. The plain engines are untouched, so profiling
+    costs nothing unless this class is used.
+
+    `functions` is the compiler's name -> (addr, ...) table; without it,
+    functions are reported by address.
+    """
+
+    def __init__(self, bytecode, functions=None, num_globals=None, output=None):
+        super().__init__(bytecode, num_globals, output=output)
+        self.entries = {addr: name for name, (addr, *_) in (functions or {}).items()}
+        self.profile = None
+
+    def run(self):
+        code = self.code
+        ops = [instr.opcode for instr in self.bytecode]
+        end = len(code)
+        entries = self.entries
+        call_op = OpCode.CALL
+        tail_call_op = OpCode.TAIL_CALL
+        return_op = OpCode.RETURN
+
+        hits = [0] * end
+        seconds = [0.0] * end
+        stats = {MAIN: {"calls": 1, "inclusive": 0.0, "exclusive": 0.0}}
+        active = {}  # open activations per function, for recursion
+
+        clock = time.perf_counter
+        started = clock()
+        frames = [[MAIN, started, 0.0]]  # [name, entered_at, time spent in callees]
+        ip = self.ip
+        while ip < end:
+            op = ops[ip]
+            before = clock()
+            nxt = code[ip]()
+            after = clock()
+            hits[ip] += 1
+            seconds[ip] += after - before
+
+            # A tail call ends the current activation and starts the next
+            if (op is return_op or op is tail_call_op) and len(frames) > 1:
+                name, entered, children = frames.pop()
+                inclusive = after - entered
+                entry = stats[name]
+                entry["exclusive"] += inclusive - children
+                active[name] -= 1
+                if not active[name]:
+                    entry["inclusive"] += inclusive
+                frames[-1][2] += inclusive
+
+            if op is call_op or op is tail_call_op:
+                name = entries.get(nxt - 1) or f"fn@{nxt - 1}"
+                entry = stats.get(name)
+                if entry is None:
+                    entry = stats[name] = {"calls": 0, "inclusive": 0.0, "exclusive": 0.0}
+                entry["calls"] += 1
+                active[name] = active.get(name, 0) + 1
+                frames.append([name, after, 0.0])
+
+            ip = nxt
+        self.ip = ip
+
+        total = clock() - started
+        stats[MAIN]["inclusive"] = total
+        stats[MAIN]["exclusive"] = total - frames[0][2]
+        self.profile = Profile(self.bytecode, hits, seconds, stats, total)
+        return self.profile
+
+
+def profile(bytecode, functions=None, num_globals=None):
+    """Run `bytecode` under the profiler and return its `Profile`."""
+    return ProfilingVM(bytecode, functions, num_globals).run()
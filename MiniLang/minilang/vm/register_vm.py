@@ -0,0 +1,208 @@
+from minilang.compiler.register import RegOp
+from .output import writer
+
+
+# Int opcodes bound once so the hot loop compares small ints, not Enums
+LOADK = RegOp.LOADK.value
+MOVE = RegOp.MOVE.value
+GETGLOBAL = RegOp.GETGLOBAL.value
+SETGLOBAL = RegOp.SETGLOBAL.value
+ADD = RegOp.ADD.value
+ADDK = RegOp.ADDK.value
+SUB = RegOp.SUB.value
+SUBK = RegOp.SUBK.value
+MUL = RegOp.MUL.value
+MULK = RegOp.MULK.value
+DIV = RegOp.DIV.value
+DIVK = RegOp.DIVK.value
+LT = RegOp.LT.value
+LTK = RegOp.LTK.value
+GT = RegOp.GT.value
+GTK = RegOp.GTK.value
+EQ = RegOp.EQ.value
+EQK = RegOp.EQK.value
+JUMP = RegOp.JUMP.value
+JUMP_FALSE = RegOp.JUMP_FALSE.value
+JUMP_NOT_LT = RegOp.JUMP_NOT_LT.value
+JUMP_NOT_LTK = RegOp.JUMP_NOT_LTK.value
+JUMP_NOT_GT = RegOp.JUMP_NOT_GT.value
+JUMP_NOT_GTK = RegOp.JUMP_NOT_GTK.value
+JUMP_NOT_EQ = RegOp.JUMP_NOT_EQ.value
+JUMP_NOT_EQK = RegOp.JUMP_NOT_EQK.value
+PRINT = RegOp.PRINT.value
+CALL = RegOp.CALL.value
+TAIL_CALL = RegOp.TAIL_CALL.value
+RETURN = RegOp.RETURN.value
+HALT = RegOp.HALT.value
+
+
+class RegisterVM:
+    """
+    Executes a `RegisterProgram`.
+
+    Each activation owns a flat list of registers; operands name registers
+    directly, so there is no operand stack to push to and pop from. A call
+    copies the argument registers into the callee's fresh register list and
+    RETURN writes the result into the caller's destination register.
+    """
+
+    def __init__(self, program, output=None):
+        self.program = program
+        self.output = output  # PRINT sink, or None for print()
+        self.globals = [0] * program.num_globals
+        self.registers = [0] * program.main_registers
+        self.call_stack = []  # saved (return_ip, registers, destination)
+        self.ip = 0
+        # Flat parallel arrays: one index per instruction, no attribute lookups
+        self.ops = [instr.opcode.value for instr in program.code]
+        self.a = [instr.a for instr in program.code]
+        self.b = [instr.b for instr in program.code]
+        self.c = [instr.c for instr in program.code]
+
+    # -----------------------------------------------------
+    # RUN
+    # -----------------------------------------------------
+    def run(self):
+        ops, A, B, C = self.ops, self.a, self.b, self.c
+        functions = self.program.functions
+        globals_ = self.globals
+        regs = self.registers
+        call_stack = self.call_stack
+        write = writer(self.output)
+
+        ip = self.ip
+        end = len(ops)
+
+        while ip < end:
+            op = ops[ip]
+            a = A[ip]
+            ip += 1
+
+            # ---------------- ARITHMETIC ----------------
+            if op == ADDK:
+                regs[a] = regs[B[ip - 1]] + C[ip - 1]
+
+            elif op == ADD:
+                regs[a] = regs[B[ip - 1]] + regs[C[ip - 1]]
+
+            elif op == SUBK:
+                regs[a] = regs[B[ip - 1]] - C[ip - 1]
+
+            elif op == SUB:
+                regs[a] = regs[B[ip - 1]] - regs[C[ip - 1]]
+
+            elif op == MULK:
+                regs[a] = regs[B[ip - 1]] * C[ip - 1]
+
+            elif op == MUL:
+                regs[a] = regs[B[ip - 1]] * regs[C[ip - 1]]
+
+            elif op == DIVK:
+                regs[a] = regs[B[ip - 1]] // C[ip - 1]
+
+            elif op == DIV:
+                regs[a] = regs[B[ip - 1]] // regs[C[ip - 1]]
+
+            # ---------------- COMPARE AND BRANCH ----------------
+            elif op == JUMP_NOT_LTK:
+                if not regs[a] < B[ip - 1]:
+                    ip = C[ip - 1]
+
+            elif op == JUMP_NOT_LT:
+                if not regs[a] < regs[B[ip - 1]]:
+                    ip = C[ip - 1]
+
+            elif op == JUMP_NOT_GTK:
+                if not regs[a] > B[ip - 1]:
+                    ip = C[ip - 1]
+
+            elif op == JUMP_NOT_GT:
+                if not regs[a] > regs[B[ip - 1]]:
+                    ip = C[ip - 1]
+
+            elif op == JUMP_NOT_EQK:
+                if regs[a] != B[ip - 1]:
+                    ip = C[ip - 1]
+
+            elif op == JUMP_NOT_EQ:
+                if regs[a] != regs[B[ip - 1]]:
+                    ip = C[ip - 1]
+
+            elif op == JUMP:
+                ip = a
+
+            elif op == JUMP_FALSE:
+                if regs[a] == 0:
+                    ip = B[ip - 1]
+
+            # ---------------- MOVES ----------------
+            elif op == MOVE:
+                regs[a] = regs[B[ip - 1]]
+
+            elif op == LOADK:
+                regs[a] = B[ip - 1]
+
+            elif op == GETGLOBAL:
+                regs[a] = globals_[B[ip - 1]]
+
+            elif op == SETGLOBAL:
+                globals_[a] = regs[B[ip - 1]]
+
+            # ---------------- FUNCTIONS ----------------
+            elif op == CALL:
+                target, argc, nregs = functions[B[ip - 1]]
+                base = C[ip - 1]
+                frame = regs[base:base + argc]
+                frame.extend([0] * (nregs - argc))
+                call_stack.append((ip, regs, a))
+                regs = frame
+                ip = target
+
+            elif op == TAIL_CALL:
+                target, argc, nregs = functions[a]
+                base = B[ip - 1]
+                frame = regs[base:base + argc]
+                frame.extend([0] * (nregs - argc))
+                regs = frame
+                ip = target
+
+            elif op == RETURN:
+                value = regs[a]
+                if not call_stack:
+                    ip = end
+                    break
+                ip, regs, dst = call_stack.pop()
+                regs[dst] = value
+
+            # ---------------- COMPARE ----------------
+            elif op == LTK:
+                regs[a] = 1 if regs[B[ip - 1]] < C[ip - 1] else 0
+
+            elif op == LT:
+                regs[a] = 1 if regs[B[ip - 1]] < regs[C[ip - 1]] else 0
+
+            elif op == GTK:
+                regs[a] = 1 if regs[B[ip - 1]] > C[ip - 1] else 0
+
+            elif op == GT:
+                regs[a] = 1 if regs[B[ip - 1]] > regs[C[ip - 1]] else 0
+
+            elif op == EQK:
+                regs[a] = 1 if regs[B[ip - 1]] == C[ip - 1] else 0
+
+            elif op == EQ:
+                regs[a] = 1 if regs[B[ip - 1]] == regs[C[ip - 1]] else 0
+
+            # ---------------- IO ----------------
+            elif op == PRINT:
+                write(regs[a])
+
+            elif op == HALT:
+                ip = end
+                break
+
+            else:
+                raise RuntimeError(f"Unknown opcode {RegOp(op)}")
+
+        self.ip = ip
+        self.registers = regs
@@ -0,0 +1,334 @@
+try:
+    import numpy as np
+except ImportError:  # optional dependency, only needed for batch evaluation
+    np = None
+
+from minilang.build import compile_source
+from minilang.compiler.bytecode import OpCode, BRANCH_TESTS, CALLS
+from .vm import VirtualMachine
+
+
+# Lane values are kept below this magnitude, so ADD/SUB can't wrap int64
+# and MUL overflow shows up in a float64 estimate; bigger lanes (MiniLang
+# ints are unbounded) are recomputed by the scalar VM
+LIMIT = 2 ** 62
+
+# A loop back edge taken by fewer lanes than this finishes them one by one
+SCALAR_LANES = 16
+
+# Opcodes with effects that depend on the order rows are evaluated in
+SIDE_EFFECTS = {OpCode.PRINT, OpCode.STORE_GLOBAL, OpCode.INC_GLOBAL}
+
+ARITHMETIC = {OpCode.ADD, OpCode.SUB, OpCode.MUL, OpCode.DIV}
+COMPARE = {OpCode.LT, OpCode.GT, OpCode.EQ}
+
+
+class VectorEvaluator:
+    """
+    Evaluates one MiniLang function over whole NumPy arrays of arguments.
+
+    The function's bytecode runs once for all rows ("lanes"): every stack
+    slot and local is an int64 array, and each instruction is applied to
+    the lanes whose instruction pointer is at it. Lanes that branch apart
+    are kept in groups by ip; the lowest ip always runs next, so groups
+    meet again after an `if` and a `while` keeps looping while any lane
+    is inside it.
+
+    Lanes the vector path can't handle are recomputed by the scalar
+    `VirtualMachine`, from the start of the function, which is safe
+    because only functions without side effects are vectorized:
+
+      * values that would leave the int64 range, division by zero
+      * loop iterations left to fewer than `scalar_lanes` lanes
+
+    Calls to non-recursive functions are vectorized over the calling
+    lanes; recursive callees run per lane. A function that prints or
+    writes globals (itself or through a callee) is evaluated row by row,
+    in order, exactly like calling the VM once per row.
+    """
+
+    def __init__(self, program, run_main=True, scalar_lanes=SCALAR_LANES):
+        if np is None:
+            raise ImportError("vectorized evaluation requires NumPy")
+        self.program = program
+        self.code = program.instructions()
+        self.functions = dict(zip(program.names["functions"], program.functions))
+        self.frames = {addr: (argc, nlocals) for addr, argc, nlocals in program.functions}
+        self.scalar_lanes = scalar_lanes
+
+        # One scalar VM shares the globals with every fallback call
+        self.vm = VirtualMachine(self.code, program.num_globals)
+        if run_main:
+            # Top-level code sets the globals the function may read
+            self.vm.run()
+
+        self.calls = {addr: self.callees(addr) for addr in self.frames}
+        self.recursive = {addr for addr in self.frames if self.reaches(addr, addr)}
+        self.effects = {addr for addr in self.frames if self.has_side_effects(addr)}
+
+    @classmethod
+    def from_source(cls, code, **options):
+        # Inlining is left on: inlined calls vectorize with their caller
+        return cls(compile_source(code), **options)
+
+    # --------------------------------------------------
+    # Entry
+    # --------------------------------------------------
+    def evaluate(self, name, *columns, size=None):
+        """
+        Call `name` once per row of `columns` (one array per parameter)
+        and return the results as an array. `size` is the row count of a
+        function without parameters.
+        """
+        if name not in self.functions:
+            raise Exception(f"Undefined function: {name}")
+        addr, argc, _ = self.functions[name]
+        if len(columns) != argc:
+            raise Exception(f"Function '{name}' expects {argc} arguments, got {len(columns)}")
+
+        columns = [np.asarray(column) for column in columns]
+        for column in columns:
+            if column.dtype.kind not in "iub":
+                raise TypeError(f"MiniLang values are integers, got an array of {column.dtype}")
+        size = len(columns[0]) if columns else size
+        if size is None:
+            raise ValueError("size is required for a function without parameters")
+        if any(len(column) != size for column in columns):
+            raise ValueError("all argument arrays must have the same length")
+
+        if addr in self.effects:
+            result = np.zeros(size, dtype=np.int64)
+            for lane in range(size):
+                result = self.store(result, lane, self.call_scalar(addr, [int(c[lane]) for c in columns]))
+            return result
+        return self.run(addr, [column.astype(np.int64) for column in columns], size)
+
+    # --------------------------------------------------
+    # Analysis
+    # --------------------------------------------------
+    def body(self, addr):
+        # Instructions from FUNC_START up to the end it points to
+        return self.code[addr:self.code[addr].operand]
+
+    def callees(self, addr):
+        return {instr.operand[0] for instr in self.body(addr) if instr.opcode in CALLS}
+
+    def reaches(self, start, target):
+        seen = set()
+        work = list(self.calls[start])
+        while work:
+            addr = work.pop()
+            if addr == target:
+                return True
+            if addr not in seen:
+                seen.add(addr)
+                work.extend(self.calls[addr])
+        return False
+
+    def has_side_effects(self, addr):
+        reachable = {addr} | {a for a in self.frames if self.reaches(addr, a)}
+        return any(
+            instr.opcode in SIDE_EFFECTS for a in reachable for instr in self.body(a)
+        )
+
+    # --------------------------------------------------
+    # Scalar fallback
+    # --------------------------------------------------
+    def call_scalar(self, addr, args):
+        argc, nlocals = self.frames[addr]
+        vm = self.vm
+        vm.stack = []
+        vm.call_stack = []
+        vm.locals = list(args) + [0] * (nlocals - argc)
+        vm.ip = addr + 1
+        # RETURN with an empty call stack stops the VM, result on top
+        vm.run()
+        return vm.stack[-1]
+
+    def store(self, result, lane, value):
+        if result.dtype != object and not -LIMIT < value < LIMIT:
+            result = result.astype(object)
+        result[lane] = value
+        return result
+
+    # --------------------------------------------------
+    # Vector execution
+    # --------------------------------------------------
+    def run(self, addr, args, size):
+        argc, nlocals = self.frames[addr]
+        code = self.code
+        locals_ = [arg.copy() for arg in args]
+        locals_ += [np.zeros(size, dtype=np.int64) for _ in range(nlocals - argc)]
+        stack = []  # one array per stack depth
+        result = np.zeros(size, dtype=np.int64)
+        bailed = np.zeros(size, dtype=bool)
+        for arg in args:
+            bailed |= (arg >= LIMIT) | (arg <= -LIMIT)
+
+        groups = {}  # ip -> [lane mask, stack depth]
+
+        def go(target, mask, depth):
+            if not mask.any():
+                return
+            if target <= ip and np.count_nonzero(mask) < self.scalar_lanes:
+                # Loop back edge with only a few lanes left: not worth it
+                bailed[mask] = True
+                return
+            if target in groups:
+                groups[target][0] |= mask
+            else:
+                groups[target] = [mask, depth]
+
+        def push(value, mask, depth):
+            if depth == len(stack):
+                stack.append(np.zeros(size, dtype=np.int64))
+            np.copyto(stack[depth], value, where=mask)
+
+        def checked(value, mask, estimate=None):
+            # Lanes leaving the safe range are handed to the scalar VM
+            out = (estimate if estimate is not None else value)
+            out = mask & ((out >= LIMIT) | (out <= -LIMIT))
+            if out.any():
+                bailed[out] = True
+                mask &= ~out
+            return mask
+
+        ip = addr
+        go(addr + 1, ~bailed, 0)
+        with np.errstate(all="ignore"):
+            while groups:
+                ip = min(groups)
+                mask, depth = groups.pop(ip)
+                instr = code[ip]
+                op, arg = instr.opcode, instr.operand
+                nxt = ip + 1
+
+                if op == OpCode.PUSH_CONST:
+                    if not -LIMIT < arg < LIMIT:
+                        bailed |= mask
+                        continue
+                    push(arg, mask, depth)
+                    go(nxt, mask, depth + 1)
+
+                elif op == OpCode.LOAD_LOCAL:
+                    push(locals_[arg], mask, depth)
+                    go(nxt, mask, depth + 1)
+
+                elif op == OpCode.STORE_LOCAL:
+                    np.copyto(locals_[arg], stack[depth - 1], where=mask)
+                    go(nxt, mask, depth - 1)
+
+                elif op == OpCode.LOAD_GLOBAL:
+                    value = self.vm.globals[arg]
+                    if not -LIMIT < value < LIMIT:
+                        bailed |= mask
+                        continue
+                    push(value, mask, depth)
+                    go(nxt, mask, depth + 1)
+
+                elif op == OpCode.INC_LOCAL:
+                    slot, amount = arg
+                    value = locals_[slot] + amount
+                    mask = checked(value, mask)
+                    np.copyto(locals_[slot], value, where=mask)
+                    go(nxt, mask, depth)
+
+                elif op in ARITHMETIC:
+                    a, b = stack[depth - 2], stack[depth - 1]
+                    if op == OpCode.ADD:
+                        value = a + b
+                        mask = checked(value, mask)
+                    elif op == OpCode.SUB:
+                        value = a - b
+                        mask = checked(value, mask)
+                    elif op == OpCode.MUL:
+                        value = a * b
+                        mask = checked(value, mask, a.astype(np.float64) * b)
+                    else:
+                        zero = mask & (b == 0)
+                        if zero.any():
+                            # Let the scalar VM raise ZeroDivisionError
+                            bailed[zero] = True
+                            mask &= ~zero
+                        value = a // np.where(b == 0, 1, b)
+                    push(value, mask, depth - 2)
+                    go(nxt, mask, depth - 1)
+
+                elif op in COMPARE:
+                    a, b = stack[depth - 2], stack[depth - 1]
+                    if op == OpCode.LT:
+                        value = a < b
+                    elif op == OpCode.GT:
+                        value = a > b
+                    else:
+                        value = a == b
+                    push(value, mask, depth - 2)
+                    go(nxt, mask, depth - 1)
+
+                elif op in (OpCode.JUMP, OpCode.FUNC_START):
+                    go(arg, mask, depth)
+
+                elif op == OpCode.JUMP_IF_FALSE:
+                    taken = mask & (stack[depth - 1] == 0)
+                    go(arg, taken, depth - 1)
+                    go(nxt, mask & ~taken, depth - 1)
+
+                elif op in BRANCH_TESTS:
+                    taken = mask & BRANCH_TESTS[op](stack[depth - 2], stack[depth - 1])
+                    go(arg, taken, depth - 2)
+                    go(nxt, mask & ~taken, depth - 2)
+
+                elif op == OpCode.BRANCH_LOCAL:
+                    slot, const, test, target = arg
+                    taken = mask & BRANCH_TESTS[test](locals_[slot], const)
+                    go(target, taken, depth)
+                    go(nxt, mask & ~taken, depth)
+
+                elif op == OpCode.BRANCH_GLOBAL:
+                    slot, const, test, target = arg
+                    value = self.vm.globals[slot]
+                    if not -LIMIT < value < LIMIT:
+                        bailed |= mask
+                        continue
+                    # The same global for every lane: all of them go one way
+                    go(target if BRANCH_TESTS[test](value, const) else nxt, mask, depth)
+
+                elif op in CALLS:
+                    callee, argc, _ = arg
+                    lanes = np.flatnonzero(mask)
+                    call_args = [column[lanes] for column in stack[depth - argc:depth]]
+                    if callee in self.recursive:
+                        values = np.zeros(len(lanes), dtype=np.int64)
+                        for i, lane in enumerate(lanes):
+                            values = self.store(values, i, self.call_scalar(callee, [int(c[i]) for c in call_args]))
+                    else:
+                        values = self.run(callee, call_args, len(lanes))
+                    # Unbounded results can't continue on the vector path
+                    if values.dtype == object:
+                        big = np.array([not -LIMIT < v < LIMIT for v in values])
+                        bailed[lanes[big]] = True
+                        mask[lanes[big]] = False
+                        values = np.where(big, 0, values).astype(np.int64)
+                    full = np.zeros(size, dtype=np.int64)
+                    full[lanes] = values
+                    push(full, mask, depth - argc)
+                    if op == OpCode.TAIL_CALL:
+                        result[mask] = full[mask]
+                    else:
+                        go(nxt, mask, depth - argc + 1)
+
+                elif op == OpCode.RETURN:
+                    result[mask] = stack[depth - 1][mask]
+
+                else:
+                    # No vector form: the scalar VM runs these lanes
+                    bailed |= mask
+
+        for lane in np.flatnonzero(bailed):
+            result = self.store(result, lane, self.call_scalar(addr, [int(arg[lane]) for arg in args]))
+        return result
+
+
+def evaluate(code, name, *columns, size=None, **options):
+    """Compile `code` and evaluate function `name` over `columns`."""
+    return VectorEvaluator.from_source(code, **options).evaluate(name, *columns, size=size)
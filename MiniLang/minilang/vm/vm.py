@@ -1,18 +1,36 @@
-from minilang.compiler.bytecode import OpCode
+from minilang.compiler.bytecode import OpCode, BRANCH_TESTS
+from .memo import MISSING
+from .output import writer
+
+
+def count_globals(bytecode):
+    slots = []
+    for instr in bytecode:
+        if instr.opcode in (OpCode.LOAD_GLOBAL, OpCode.STORE_GLOBAL):
+            slots.append(instr.operand)
+        elif instr.opcode in (OpCode.INC_GLOBAL, OpCode.BRANCH_GLOBAL):
+            slots.append(instr.operand[0])
+    return max(slots) + 1 if slots else 0
 
 
 class VirtualMachine:
-    def __init__(self, bytecode):
+    def __init__(self, bytecode, num_globals=None, memo=None, output=None):
         self.bytecode = bytecode
         self.stack = []
-        self.vars = {}
-        self.call_stack = []
+        if num_globals is None:
+            num_globals = count_globals(bytecode)
+        self.globals = [0] * num_globals
+        self.locals = []  # slots of the active frame
+        self.call_stack = []  # saved (return_ip, locals) frames
         self.ip = 0  # instruction pointer
+        self.memo = memo  # MemoCache for pure calls, or None
+        self.output = output  # PRINT sink, or None for print()
 
     # -----------------------------------------------------
     # RUN
     # -----------------------------------------------------
     def run(self):
+        write = writer(self.output)
         while self.ip < len(self.bytecode):
             instr = self.bytecode[self.ip]
             op = instr.opcode
@@ -22,15 +40,32 @@ class VirtualMachine:
             if op == OpCode.PUSH_CONST:
                 self.stack.append(arg)
 
-            # ---------------- LOAD VAR ----------------
-            elif op == OpCode.LOAD_VAR:
-                self.stack.append(self.vars.get(arg, 0))
+            # ---------------- LOCALS ----------------
+            elif op == OpCode.LOAD_LOCAL:
+                self.stack.append(self.locals[arg])
+
+            elif op == OpCode.STORE_LOCAL:
+                if not self.stack:
+                    raise RuntimeError("Stack underflow on STORE_LOCAL")
+                self.locals[arg] = self.stack.pop()
+
+            # ---------------- GLOBALS ----------------
+            elif op == OpCode.LOAD_GLOBAL:
+                self.stack.append(self.globals[arg])
 
-            # ---------------- STORE VAR ----------------
-            elif op == OpCode.STORE_VAR:
+            elif op == OpCode.STORE_GLOBAL:
                 if not self.stack:
-                    raise RuntimeError("Stack underflow on STORE_VAR")
-                self.vars[arg] = self.stack.pop()
+                    raise RuntimeError("Stack underflow on STORE_GLOBAL")
+                self.globals[arg] = self.stack.pop()
+
+            # ---------------- INCREMENT ----------------
+            elif op == OpCode.INC_LOCAL:
+                slot, amount = arg
+                self.locals[slot] += amount
+
+            elif op == OpCode.INC_GLOBAL:
+                slot, amount = arg
+                self.globals[slot] += amount
 
             # ---------------- ARITH ----------------
             elif op == OpCode.ADD:
@@ -71,7 +106,7 @@ class VirtualMachine:
 
             # ---------------- PRINT ----------------
             elif op == OpCode.PRINT:
-                print(self.stack.pop())
+                write(self.stack.pop())
 
             # ---------------- JUMP ----------------
             elif op == OpCode.JUMP:
@@ -85,6 +120,61 @@ class VirtualMachine:
                     self.ip = arg
                     continue
 
+            # ---------------- COMPARE AND BRANCH ----------------
+            elif op == OpCode.JUMP_IF_NOT_LT:
+                b = self.stack.pop()
+                a = self.stack.pop()
+                if not a < b:
+                    self.ip = arg
+                    continue
+
+            elif op == OpCode.JUMP_IF_NOT_GT:
+                b = self.stack.pop()
+                a = self.stack.pop()
+                if not a > b:
+                    self.ip = arg
+                    continue
+
+            elif op == OpCode.JUMP_IF_NOT_EQ:
+                b = self.stack.pop()
+                a = self.stack.pop()
+                if not a == b:
+                    self.ip = arg
+                    continue
+
+            elif op == OpCode.JUMP_IF_LT:
+                b = self.stack.pop()
+                a = self.stack.pop()
+                if a < b:
+                    self.ip = arg
+                    continue
+
+            elif op == OpCode.JUMP_IF_GT:
+                b = self.stack.pop()
+                a = self.stack.pop()
+                if a > b:
+                    self.ip = arg
+                    continue
+
+            elif op == OpCode.JUMP_IF_EQ:
+                b = self.stack.pop()
+                a = self.stack.pop()
+                if a == b:
+                    self.ip = arg
+                    continue
+
+            elif op == OpCode.BRANCH_LOCAL:
+                slot, const, test, target = arg
+                if BRANCH_TESTS[test](self.locals[slot], const):
+                    self.ip = target
+                    continue
+
+            elif op == OpCode.BRANCH_GLOBAL:
+                slot, const, test, target = arg
+                if BRANCH_TESTS[test](self.globals[slot], const):
+                    self.ip = target
+                    continue
+
             # ---------------- FUNCTION START ----------------
             elif op == OpCode.FUNC_START:
                 # Skip function body during normal execution
@@ -93,27 +183,54 @@ class VirtualMachine:
 
             # ---------------- CALL ----------------
             elif op == OpCode.CALL:
-                func_addr, argc = arg
+                func_addr, argc, nlocals = arg
+
+                # args become the first slots of the new frame
+                base = len(self.stack) - argc
 
-                # collect args
-                args = [self.stack.pop() for _ in range(argc)][::-1]
+                if self.memo is not None and func_addr in self.memo.functions:
+                    key = (func_addr, tuple(self.stack[base:]))
+                    value = self.memo.get(key)
+                    if value is not MISSING:
+                        del self.stack[base:]
+                        self.stack.append(value)
+                        self.ip += 1
+                        continue
+                    self.memo.pending.append((len(self.call_stack) + 1, key))
 
-                # save return address
-                self.call_stack.append(self.ip + 1)
+                frame = self.stack[base:]
+                del self.stack[base:]
+                frame.extend([0] * (nlocals - argc))
 
-                # push args back for STORE_VAR in function
-                for v in args:
-                    self.stack.append(v)
+                # save return address and caller frame
+                self.call_stack.append((self.ip + 1, self.locals))
+                self.locals = frame
 
                 # jump to function
                 self.ip = func_addr + 1
                 continue
 
+            # ---------------- TAIL CALL ----------------
+            elif op == OpCode.TAIL_CALL:
+                func_addr, argc, nlocals = arg
+
+                # the callee's frame replaces ours; call_stack does not grow
+                base = len(self.stack) - argc
+                frame = self.stack[base:]
+                del self.stack[base:]
+                frame.extend([0] * (nlocals - argc))
+                self.locals = frame
+
+                self.ip = func_addr + 1
+                continue
+
             # ---------------- RETURN ----------------
             elif op == OpCode.RETURN:
+                if self.memo is not None:
+                    self.memo.returned(len(self.call_stack), self.stack[-1])
                 if not self.call_stack:
                     return
-                self.ip = self.call_stack.pop()
+                self.ip, self.locals = self.call_stack.pop()
                 continue
 
             # ---------------- HALT ----------------
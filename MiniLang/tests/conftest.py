@@ -0,0 +1,45 @@
+import contextlib
+import io
+
+import pytest
+
+from minilang.lexer.regex_lexer import RegexLexer
+from minilang.parser.parser import Parser
+from minilang.compiler.compiler import Compiler
+from minilang.compiler.packed import pack
+from minilang.vm.vm import VirtualMachine
+from minilang.vm.dispatch_vm import DispatchVM
+from minilang.vm.packed_vm import PackedVM
+
+
+# The engines that run stack bytecode, built from (bytecode, functions)
+ENGINES = {
+    "switch": lambda bytecode, functions: VirtualMachine(bytecode),
+    "dispatch": lambda bytecode, functions: DispatchVM(bytecode),
+    "packed": lambda bytecode, functions: PackedVM(pack(bytecode, functions)),
+}
+
+
+@pytest.fixture
+def compile_bytecode():
+    # (bytecode, functions, number of globals) straight from the Compiler:
+    # no analyzer, optimizer, inliner or peephole pass
+    def compile_code(code):
+        compiler = Compiler()
+        bytecode, functions = compiler.compile(Parser(RegexLexer(code)).parse())
+        return bytecode, functions, len(compiler.globals)
+    return compile_code
+
+
+@pytest.fixture
+def run_engines():
+    # What each engine prints for (bytecode, functions), in ENGINES order
+    def run(bytecode, functions):
+        outputs = []
+        for make_vm in ENGINES.values():
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                make_vm(bytecode, functions).run()
+            outputs.append(out.getvalue())
+        return outputs
+    return run
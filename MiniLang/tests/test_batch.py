@@ -0,0 +1,49 @@
+import pytest
+
+from minilang.batch import collect, run_batch
+from minilang.cli import main
+
+
+@pytest.fixture
+def scripts(tmp_path):
+    (tmp_path / "nested").mkdir()
+    sources = {
+        "b.ml": "print(2);",
+        "a.ml": "fn sq(x) { return x * x; } print(sq(9));",
+        "nested/c.ml": "print(1 / 0);",
+        "nested/d.ml": "let i = 0; while (i < 3) { print(i); i = i + 1; }",
+        "notes.txt": "not a script",
+    }
+    for name, code in sources.items():
+        (tmp_path / name).write_text(code)
+    return tmp_path
+
+
+def test_collect_expands_directories_in_order(scripts):
+    files = collect([str(scripts / "b.ml"), str(scripts)])
+    names = [f[len(str(scripts)) + 1:] for f in files]
+    assert names == ["b.ml", "a.ml", "b.ml", "nested/c.ml", "nested/d.ml"]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_results_in_order_with_failures_isolated(scripts, workers):
+    results = run_batch([str(scripts)], workers=workers, use_cache=False)
+    assert [r.output for r in results] == ["81\n", "2\n", "", "0\n1\n2\n"]
+    assert [r.ok for r in results] == [True, True, False, True]
+    assert results[2].error.startswith("ZeroDivisionError")
+    assert all(r.seconds >= 0 for r in results)
+
+
+def test_cli_batch(scripts, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        main([str(scripts), "--workers", "1", "--no-cache", "--engine", "packed"])
+    assert exit_info.value.code == 1
+
+    captured = capsys.readouterr()
+    assert captured.out == (
+        f"==> {scripts / 'a.ml'} <==\n81\n"
+        f"==> {scripts / 'b.ml'} <==\n2\n"
+        f"==> {scripts / 'nested' / 'c.ml'} <==\n"
+        f"==> {scripts / 'nested' / 'd.ml'} <==\n0\n1\n2\n"
+    )
+    assert "4 scripts, 1 failed" in captured.err
@@ -0,0 +1,33 @@
+from benchmarks import harness
+from benchmarks.workloads import WORKLOADS
+from minilang.build import compile_source
+
+
+def test_pipeline_builds_what_the_cli_builds():
+    for code in WORKLOADS.values():
+        result = None
+        for phase, step in harness.pipeline(code)[:-1]:
+            result = step(result)
+        assert result.disassemble() == compile_source(code).disassemble()
+
+
+def test_bench_reports_every_phase():
+    result = harness.bench("let x = 1; print(x + 2);", repeat=2)
+    assert set(result["seconds"]) == set(harness.PHASES)
+    assert set(result["peak_bytes"]) == set(harness.PHASES)
+    assert result["max_peak_bytes"] > 0
+
+
+def test_compare_flags_only_real_slowdowns():
+    def report(**seconds):
+        phases = dict.fromkeys(harness.PHASES, 0.010)
+        phases.update(seconds)
+        return {"workloads": {"loops": {"seconds": phases}}}
+
+    baseline = report()
+    assert harness.compare(report(), baseline) == []
+    # 2.5x slower, but only by 0.9 ms: timer noise
+    assert harness.compare(report(Lexer=0.0015), report(Lexer=0.0006)) == []
+    assert harness.compare(report(Parser=0.020), baseline) == [("loops", "Parser", 0.010, 0.020)]
+    # Workloads missing from the baseline are skipped
+    assert harness.compare(report(Parser=0.020), {"workloads": {}}) == []
@@ -0,0 +1,41 @@
+from minilang.build import compile_source, load_program
+from minilang.compiler import cache
+
+
+SOURCE = """
+fn add(a, b) { return a + b; }
+let x = add(5, 7);
+print(x);
+"""
+
+
+def test_round_trip():
+    code = compile_source(SOURCE)
+    digest = cache.source_hash(SOURCE)
+    loaded = cache.loads(cache.dumps(code, digest), digest)
+
+    assert repr(loaded.instructions()) == repr(code.instructions())
+    assert loaded.functions == code.functions
+    assert loaded.names == code.names
+
+
+def test_stale_entries_are_rejected(monkeypatch):
+    code = compile_source(SOURCE)
+    data = cache.dumps(code, cache.source_hash(SOURCE))
+
+    assert cache.loads(data, cache.source_hash(SOURCE + "\n")) is None
+    assert cache.loads(data[:10], cache.source_hash(SOURCE)) is None
+
+    monkeypatch.setattr(cache, "COMPILER_VERSION", cache.COMPILER_VERSION + 1)
+    assert cache.loads(data, cache.source_hash(SOURCE)) is None
+
+
+def test_load_program_writes_cache(tmp_path):
+    src = tmp_path / "prog.ml"
+    src.write_text(SOURCE)
+
+    load_program(str(src))
+    assert (tmp_path / "prog.mlc").exists()
+
+    load_program(str(src), cache_dir=str(tmp_path / "cache"))
+    assert len(list((tmp_path / "cache").iterdir())) == 1
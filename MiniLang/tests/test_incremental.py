@@ -0,0 +1,137 @@
+import pytest
+
+from benchmarks.workloads import WORKLOADS
+from minilang.build import compile_source
+from minilang.compiler.incremental import IncrementalCompiler, split
+from minilang.vm.output import ListSink
+from minilang.vm.packed_vm import PackedVM
+
+
+SOURCE = """
+let n = 10;
+fn double(x) { return x * 2; }
+fn twice(x) { return double(double(x)); }
+print(twice(n));
+fn late() { return n + 1; }
+print(late());
+"""
+
+
+def run(code):
+    sink = ListSink()
+    PackedVM(code, output=sink).run()
+    return sink.values
+
+
+def test_split_at_top_level_functions():
+    assert split(SOURCE) == [
+        "\nlet n = 10;\n",
+        "fn double(x) { return x * 2; }",
+        "fn twice(x) { return double(double(x)); }",
+        "\nprint(twice(n));\n",
+        "fn late() { return n + 1; }",
+        "\nprint(late());\n",
+    ]
+    # The body of an unbraced `if` is not a top-level definition
+    assert split("if (1) fn f() { return 1; } print(f());") == [
+        "if (1) fn f() { return 1; } print(f());"
+    ]
+
+
+# Calls before definitions; k is set after the first call, so only the
+# top-level code may use its value
+FORWARD = """
+let n = 10;
+print(even(n));
+let k = 3;
+fn even(x) { if (x == 0) { return 1; } return odd(x - 1); }
+fn odd(x) { if (x == 0) { return 0; } return even(x - 1); }
+fn sum() { return k + n; }
+print(sum() + k);
+"""
+
+
+@pytest.mark.parametrize("source", [*sorted(WORKLOADS), FORWARD])
+def test_cold_build_matches_full_build(source):
+    source = WORKLOADS.get(source, source)
+    full = compile_source(source, peephole=False, inline=0)
+    code = IncrementalCompiler().compile(source)
+    assert list(code.ops) == list(full.ops)
+    assert list(code.args) == list(full.args)
+    assert (code.consts, code.functions, code.names) == (full.consts, full.functions, full.names)
+
+
+def test_edit_recompiles_only_the_changed_function():
+    session = IncrementalCompiler()
+    assert run(session.compile(SOURCE)) == [40, 11]
+    assert session.stats == {"chunks": 6, "parsed": 6, "compiled": 6, "relinked": 6}
+
+    edited = SOURCE.replace("x * 2", "x * 2 + 1")
+    assert run(session.compile(edited)) == [43, 11]
+    # double grew: everything after it moved
+    assert session.stats == {"chunks": 6, "parsed": 1, "compiled": 1, "relinked": 5}
+
+    assert run(session.compile(SOURCE)) == [40, 11]
+    assert session.stats["parsed"] == 1
+
+
+def test_constant_change_recompiles_readers():
+    session = IncrementalCompiler()
+    session.compile(SOURCE)
+    code = session.compile(SOURCE.replace("let n = 10;", "let n = 3;"))
+    assert run(code) == [12, 4]
+    # The `let`, and the two chunks the constant was propagated into
+    assert session.stats["compiled"] == 3
+
+    # Once n is assigned it is no longer a constant anywhere
+    code = session.compile(SOURCE + "n = 0;")
+    assert run(code) == [40, 11]
+
+
+def test_links_are_checked_again():
+    session = IncrementalCompiler()
+    session.compile(SOURCE)
+    with pytest.raises(Exception, match="expects 2 arguments, got 1"):
+        session.compile(SOURCE.replace("fn double(x)", "fn double(x, y)"))
+    with pytest.raises(Exception, match="Function 'gone' not defined"):
+        session.compile(SOURCE.replace("print(twice(n));", "print(gone());"))
+    # Calls may come before the definition
+    assert run(session.compile(SOURCE.replace("print(twice(n));", "print(late());"))) == [11, 11]
+    assert run(session.compile(SOURCE)) == [40, 11]
+
+
+@pytest.mark.parametrize("source", [
+    "print(x);",
+    "let a = 1; let a = 2;",
+    "let a = 1;\nfn f() { return 1; }\nlet a = 2;",
+    "fn f(a) { return a; }\nfn f(b) { return b; }",
+    "fn f(a) { return q; }\nprint(f(1));",
+    "fn f() { return late; }\nlet late = 1;",
+    "let k = 1;\nfn f() { let k = 2; return k; }",
+    "print(g(1));\nfn f() { return 1; }",
+    "print(y);\nlet y = 1;\nlet y = 2;",
+])
+def test_rejects_what_the_full_build_rejects(source):
+    with pytest.raises(Exception) as full:
+        compile_source(source, peephole=False, inline=0)
+    with pytest.raises(Exception) as incremental:
+        IncrementalCompiler().compile(source)
+    assert str(incremental.value) == str(full.value)
+
+
+def test_errors_are_checked_again_after_edits():
+    session = IncrementalCompiler()
+    session.compile(SOURCE)
+    with pytest.raises(Exception, match="Variable 'n' used before declaration"):
+        session.compile(SOURCE.replace("let n = 10;", "let m = 10;"))
+    assert run(session.compile(SOURCE)) == [40, 11]
+
+
+def test_parse_errors_point_into_the_whole_file():
+    broken = SOURCE.replace("return n + 1;", "return n + ;")
+    with pytest.raises(Exception) as full:
+        compile_source(broken, peephole=False, inline=0)
+    with pytest.raises(Exception) as incremental:
+        IncrementalCompiler().compile(broken)
+    assert "position=" in str(full.value)
+    assert str(incremental.value) == str(full.value)
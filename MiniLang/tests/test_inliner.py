@@ -0,0 +1,59 @@
+from minilang.compiler.bytecode import OpCode
+from minilang.compiler.inliner import Inliner
+from minilang.compiler.peephole import PeepholeOptimizer
+
+
+PROGRAM = """
+fn add(a, b) { return a + b; }
+fn sq(x) { let y = x * x; return y; }
+fn sumsq(a, b) { return add(sq(a), sq(b)); }
+fn pick(c) { if (c > 2) { return 10; } return 20; }
+fn loop(n) { let s = 0; while (n > 0) { s = add(s, n); n = n - 1; } return s; }
+fn fact(n) { if (n == 0) { return 1; } return n * fact(n - 1); }
+fn wrap(n) { return fact(n); }
+let g = 5;
+fn bump() { g = g + 1; return g; }
+print(add(1, 2));
+print(sumsq(3, 4));
+print(pick(1) + pick(3));
+print(loop(10));
+print(wrap(5) + bump() + bump());
+print(g);
+let i = 0;
+while (i < 3) { print(add(i, sq(i))); i = i + 1; }
+"""
+
+EXPECTED = "3\n25\n30\n55\n133\n7\n0\n2\n6\n"
+
+
+def called(bytecode, functions):
+    names = {addr: name for name, (addr, _, _) in functions.items()}
+    return [names[i.operand[0]] for i in bytecode if i.opcode in (OpCode.CALL, OpCode.TAIL_CALL)]
+
+
+def test_inlined_program_behaves_the_same(compile_bytecode, run_engines):
+    bytecode, functions, num_globals = compile_bytecode(PROGRAM)
+    inlined = Inliner().inline(bytecode, functions, num_globals)
+    assert run_engines(*inlined) == [EXPECTED] * 3
+    assert run_engines(*PeepholeOptimizer().optimize(*inlined)) == [EXPECTED] * 3
+
+
+def test_only_small_non_recursive_functions_are_inlined(compile_bytecode):
+    bytecode, functions, num_globals = compile_bytecode(PROGRAM)
+    inliner = Inliner()
+    bytecode, functions = inliner.inline(bytecode, functions, num_globals)
+
+    # fact is recursive; loop is too large. Both bodies themselves remain
+    assert sorted(set(called(bytecode, functions))) == ["fact", "loop"]
+    assert "inlined sq into <main> (3 sites)" in inliner.report()
+    assert ("loop", "add") in inliner.inlined
+    # add's two parameters are renamed into fresh slots after loop's own
+    assert functions["loop"][2] == 2 + 2
+
+
+def test_size_threshold(compile_bytecode):
+    bytecode, functions, num_globals = compile_bytecode(PROGRAM)
+    inliner = Inliner(max_size=0)
+    result, _ = inliner.inline(bytecode, functions, num_globals)
+    assert inliner.inlined == []
+    assert repr(result) == repr(bytecode)
@@ -0,0 +1,64 @@
+import io
+
+import pytest
+
+from minilang.lexer.lexer import Lexer
+from minilang.lexer.regex_lexer import RegexLexer
+from minilang.lexer.stream_lexer import StreamLexer
+from minilang.parser.parser import Parser
+from minilang.lexer.token import TokenType
+
+
+SOURCE = """
+fn fact(n) {
+    if (n == 0) { return 1; }
+    return n * fact(n - 1);
+}
+
+let _x1 = 10 / 2;
+while (_x1 > 0) { _x1 = _x1 - 1; }
+print(fact(5) < 200, 3);
+"""
+
+
+def scan(lexer):
+    tokens = []
+    while True:
+        tok = lexer.next_token()
+        tokens.append((tok.type, tok.value, tok.position))
+        if tok.type == TokenType.EOF:
+            return tokens
+
+
+def test_keywords_and_identifiers():
+    kinds = [t[0] for t in scan(Lexer("let fn return xlet"))]
+    assert kinds == [TokenType.LET, TokenType.FN, TokenType.RETURN, TokenType.IDENT, TokenType.EOF]
+
+
+@pytest.mark.parametrize("source", [SOURCE, "", "  \n", "a==b=c", "x=1;"])
+def test_regex_lexer_matches_lexer(source):
+    assert scan(RegexLexer(source)) == scan(Lexer(source))
+
+
+def test_regex_lexer_rejects_illegal_characters():
+    with pytest.raises(Exception, match="Illegal character: @"):
+        scan(RegexLexer("let x = @;"))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 4096])
+def test_stream_lexer_matches_lexer_across_chunks(chunk_size):
+    expected = scan(Lexer(SOURCE))
+    assert scan(StreamLexer(io.StringIO(SOURCE), chunk_size)) == expected
+    assert scan(StreamLexer(io.BytesIO(SOURCE.encode()), chunk_size)) == expected
+
+
+def test_stream_lexer_decodes_split_utf8():
+    source = "let é = 1;"
+    stream = StreamLexer(io.BytesIO(source.encode()), chunk_size=1)
+    assert scan(stream) == scan(Lexer(source))
+
+
+def test_parser_accepts_token_generator():
+    source = "fn add(a, b) { return a + b; } print(add(1, 2));"
+    ast = Parser(RegexLexer(source).tokens()).parse()
+    assert len(ast.statements) == 2
@@ -0,0 +1,105 @@
+import pytest
+
+from minilang.lexer.lexer import Lexer
+from minilang.parser.parser import Parser
+from minilang.semantic.semantic_analyzer import SemanticAnalyzer
+from minilang.compiler.compiler import Compiler
+from minilang.compiler.packed import pack
+from minilang.vm.vm import VirtualMachine
+from minilang.vm.dispatch_vm import DispatchVM
+from minilang.vm.packed_vm import PackedVM
+from minilang.vm.memo import MemoCache, MISSING, for_program
+from minilang.cli import main
+
+
+ENGINES = {
+    "switch": lambda bytecode, functions, memo: VirtualMachine(bytecode, None, memo),
+    "dispatch": lambda bytecode, functions, memo: DispatchVM(bytecode, None, memo),
+    "packed": lambda bytecode, functions, memo: PackedVM(pack(bytecode, functions), memo),
+}
+
+SOURCE = """
+let g = 2;
+fn fib(n) {
+    if (n < 2) { return n; }
+    return fib(n - 1) + fib(n - 2);
+}
+fn square(x) { let y = x * x; return y; }
+fn sum_squares(n) { if (n == 0) { return 0; } return square(n) + sum_squares(n - 1); }
+fn shout(x) { print(x); return x; }
+fn add_g(x) { return x + g; }
+fn set_g(x) { g = x; return 0; }
+fn twice_shout(x) { return shout(x) * 2; }
+print(fib(20));
+print(sum_squares(10) + sum_squares(10));
+print(twice_shout(4));
+print(add_g(1));
+let ignored = set_g(10);
+print(add_g(1));
+"""
+
+EXPECTED = "6765\n770\n4\n8\n3\n11\n"
+
+
+def analyze(code):
+    analyzer = SemanticAnalyzer()
+    ast = Parser(Lexer(code)).parse()
+    analyzer.analyze(ast)
+    return analyzer, ast
+
+
+def test_purity_analysis():
+    analyzer, _ = analyze(SOURCE)
+    assert analyzer.pure == {
+        "fib": True,
+        "square": True,
+        "sum_squares": True,
+        "shout": False,  # prints
+        "add_g": False,  # reads a global
+        "set_g": False,  # writes a global
+        "twice_shout": False,  # calls an impure function
+    }
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_memoized_calls_keep_results(engine, capsys):
+    analyzer, ast = analyze(SOURCE)
+    bytecode, functions = Compiler().compile(ast)
+    memo = for_program(functions, analyzer.pure_functions())
+    ENGINES[engine](bytecode, functions, memo).run()
+
+    assert capsys.readouterr().out == EXPECTED
+    # fib(20) misses once per n; sum_squares(10) misses for 10..0 and
+    # square(10..1), then the second sum_squares(10) is a single hit
+    assert memo.misses == 21 + 11 + 10
+    assert memo.hits == 18 + 1
+    assert memo.pending == []
+
+
+def test_lru_eviction():
+    memo = MemoCache([0], size=2)
+    memo.put("a", 1)
+    memo.put("b", 2)
+    assert memo.get("a") == 1
+    memo.put("c", 3)  # evicts "b", the least recently used
+    assert memo.get("b") is MISSING
+    assert list(memo.entries) == ["a", "c"]
+    assert memo.stats() == {"hits": 1, "misses": 1, "entries": 2, "size": 2}
+
+
+def test_cli_memo_stats(tmp_path, capsys):
+    path = tmp_path / "fib.ml"
+    path.write_text("fn fib(n) { if (n < 2) { return n; } return fib(n - 1) + fib(n - 2); } print(fib(30));")
+    main([str(path), "--memoize", "--memo-size", "8", "--memo-stats", "--engine", "packed", "--no-cache"])
+    captured = capsys.readouterr()
+    assert captured.out == "832040\n"
+    assert captured.err.startswith("memo: 28 hits, 31 misses")
+
+
+@pytest.mark.parametrize("engine", ["register", "python"])
+def test_cli_rejects_memo_options_without_a_memo(tmp_path, capsys, engine):
+    path = tmp_path / "fib.ml"
+    path.write_text(SOURCE)
+    with pytest.raises(SystemExit):
+        main([str(path), "--memoize", "--engine", engine, "--no-cache"])
+    assert "do not work with --engine" in capsys.readouterr().err
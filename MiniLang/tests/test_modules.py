@@ -0,0 +1,150 @@
+import pytest
+
+from minilang import modules as module_loading
+from minilang.build import compile_python, compile_register, compile_source, run_file
+from minilang.cli import main
+from minilang.compiler import cache, pycodegen
+from minilang.compiler.linker import link
+from minilang.modules import ModuleLoader, compile_module
+from minilang.vm.output import ListSink
+from minilang.vm.packed_vm import PackedVM
+from minilang.vm.register_vm import RegisterVM
+
+
+# Mutual recursion and a call before the callee is defined
+FORWARD = """
+print(even(7));
+fn even(x) { if (x == 0) { return 1; } return odd(x - 1); }
+fn odd(x) { if (x == 0) { return 0; } return even(x - 1); }
+"""
+
+LIBRARY = {
+    "mathlib.ml": """
+let calls = 0;
+fn square(x) { calls = calls + 1; return x * x; }
+fn cube(x) { return x * square(x); }
+fn count() { return calls; }
+""",
+    "shapes.ml": """
+import mathlib;
+let sides = 4;
+fn perimeter(s) { return sides * s; }
+fn volume(s) { return cube(s); }
+print(sides);
+""",
+}
+
+MAIN = """
+import shapes;
+import mathlib;
+let calls = 100;
+print(twice(square(3)));
+print(volume(2) + perimeter(5));
+print(count() + calls);
+fn twice(v) { return v + v; }
+"""
+
+
+def run(code):
+    sink = ListSink()
+    PackedVM(code, output=sink).run()
+    return sink.values
+
+
+@pytest.fixture
+def library(tmp_path):
+    for name, code in LIBRARY.items():
+        (tmp_path / name).write_text(code)
+    return tmp_path
+
+
+def test_calls_before_definitions():
+    assert run(compile_source(FORWARD)) == [0]
+    assert run(compile_source(FORWARD, optimize=False, peephole=False, inline=0)) == [0]
+
+    sink = ListSink()
+    RegisterVM(compile_register(FORWARD), sink).run()
+    assert sink.values == [0]
+    sink = ListSink()
+    pycodegen.execute(compile_python(FORWARD), output=sink)
+    assert sink.values == [0]
+
+    with pytest.raises(Exception, match="Function 'odd' not defined"):
+        compile_source(FORWARD.replace("fn odd", "fn other"))
+
+
+def test_functions_see_only_constants_set_before_the_first_call():
+    # f runs before `let k` does: k must not be folded into its body
+    code = compile_source("print(f()); let k = 3; print(f() + k); fn f() { return k; }")
+    assert run(code) == [0, 6]
+
+
+def test_modules_are_linked_before_the_program(library):
+    code = compile_source(MAIN, modules=ModuleLoader([library]))
+    # shapes' top-level code runs first, once; every module keeps its own globals
+    assert run(code) == [4, 18, 28, 102]
+    assert code.names["functions"] == ["square", "cube", "count", "perimeter", "volume", "twice"]
+    assert code.names["globals"] == ["mathlib.calls", "shapes.sides", "calls"]
+    assert [path for path, _ in code.names["modules"]] == [
+        str(library / "mathlib.ml"),
+        str(library / "shapes.ml"),
+    ]
+    # Whole-program passes still run after linking
+    assert code.disassemble() != compile_source(MAIN, modules=ModuleLoader([library]), peephole=False).disassemble()
+
+
+def test_object_tables(library):
+    obj = compile_module(LIBRARY["shapes.ml"], "shapes", modules=ModuleLoader([library]))
+    assert obj.imports == ["mathlib"]
+    assert obj.globals == ["sides"]
+    assert list(obj.symbols) == ["perimeter", "volume"]
+    assert [(name, argc) for _, name, argc in obj.calls] == [("cube", 1)]
+    assert obj.pure == []
+    assert compile_module("fn add(a, b) { return a + b; }", "m").pure == ["add"]
+    assert cache.loads_object(cache.dumps_object(obj, b"k" * 32), b"k" * 32).symbols == obj.symbols
+
+
+def test_link_errors(library):
+    loader = ModuleLoader([library])
+    mathlib = loader.load("mathlib")
+    with pytest.raises(Exception, match="Duplicate symbol: square"):
+        link([mathlib, compile_module("fn square(y) { return y; }", None)])
+    with pytest.raises(Exception, match="Undefined function: cube"):
+        link([loader.load("shapes")])
+    with pytest.raises(Exception, match="Function 'square' expects 1 arguments, got 2"):
+        compile_source("import mathlib; print(square(1, 2));", modules=loader)
+    with pytest.raises(Exception, match="Module not found: nothing"):
+        compile_source("import nothing;", modules=loader)
+
+    (library / "mathlib.ml").write_text("import shapes;" + LIBRARY["mathlib.ml"])
+    with pytest.raises(Exception, match="Circular import: shapes -> mathlib -> shapes"):
+        compile_source("import shapes;", modules=ModuleLoader([library], use_cache=False))
+
+
+def test_objects_compile_once(library, monkeypatch):
+    compile_source(MAIN, modules=ModuleLoader([library]))
+    assert (library / "mathlib.mlo").exists() and (library / "shapes.mlo").exists()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("recompiled")
+
+    monkeypatch.setattr(module_loading, "compile_module", fail)
+    assert run(compile_source(MAIN, modules=ModuleLoader([library]))) == [4, 18, 28, 102]
+
+
+def test_cached_program_goes_stale_with_its_modules(library, capsys):
+    (library / "lib").mkdir()
+    (library / "mathlib.ml").rename(library / "lib" / "mathlib.ml")
+    script = library / "main.ml"
+    script.write_text(MAIN)
+
+    main([str(script), "--module-path", str(library / "lib")])
+    assert capsys.readouterr().out == "4\n18\n28\n102\n"
+    assert (library / "main.mlc").exists()
+
+    (library / "lib" / "mathlib.ml").write_text(LIBRARY["mathlib.ml"].replace("x * x;", "x * x + 1;"))
+    main([str(script), "--module-path", str(library / "lib"), "--engine", "python"])
+    assert capsys.readouterr().out == "4\n20\n30\n102\n"
+
+    with pytest.raises(Exception, match="register backend does not link modules"):
+        run_file(str(script), engine="register", module_path=[str(library / "lib")])
@@ -0,0 +1,140 @@
+import contextlib
+import io
+
+import pytest
+
+from minilang.lexer.regex_lexer import RegexLexer
+from minilang.parser.parser import Parser
+from minilang.parser.arena import AstArena
+from minilang.parser.ast import *
+from minilang.compiler.compiler import Compiler
+from minilang.compiler.optimizer import Optimizer, PASSES
+from minilang.semantic.semantic_analyzer import SemanticAnalyzer
+from minilang.vm.vm import VirtualMachine
+
+
+PROGRAM = """
+let limit = 3 * 2;
+let debug = 0;
+
+fn scale(n) {
+    let factor = 2 + 0;
+    if (debug == 1) { print(n); }
+    return n * factor * 1;
+}
+
+fn shadow(limit) {
+    return limit + 1;
+}
+
+let i = 0;
+while (i < limit) {
+    print(scale(i) - 0);
+    i = i + 1;
+}
+while (1 > 2) { print(7); }
+if (limit < 10) { print(shadow(limit)); } else { print(42); }
+print(10 / (5 - 5 * 1 - 0 + 2));
+print(i - i);
+"""
+
+
+def parse(code, arena=False):
+    return Parser(RegexLexer(code), nodes=AstArena() if arena else None).parse()
+
+
+def run(ast):
+    SemanticAnalyzer().analyze(ast)
+    bytecode, _ = Compiler().compile(ast)
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        VirtualMachine(bytecode).run()
+    return out.getvalue()
+
+
+def count(node, cls):
+    if isinstance(node, cls):
+        return 1
+    total = 0
+    for attr in getattr(type(node), "__slots__", ()):
+        value = getattr(node, attr)
+        for child in value if isinstance(value, list) else [value]:
+            if hasattr(type(child), "__slots__"):
+                total += count(child, cls)
+    return total
+
+
+def test_output_unchanged():
+    assert run(Optimizer().optimize(parse(PROGRAM))) == run(parse(PROGRAM))
+
+
+@pytest.mark.parametrize("disabled", PASSES)
+def test_each_pass_can_be_disabled(disabled):
+    optimizer = Optimizer(**{disabled: False})
+    ast = optimizer.optimize(parse(PROGRAM))
+    assert optimizer.stats[disabled] == 0
+    assert run(ast) == run(parse(PROGRAM))
+
+
+def test_whole_tree_is_optimized():
+    optimizer = Optimizer()
+    ast = optimizer.optimize(parse(PROGRAM))
+
+    assert all(optimizer.stats[name] > 0 for name in PASSES)
+    # The debug print and `while (1 > 2)` are gone, as is the if on `limit`
+    assert count(ast, IfStatement) == 0
+    assert count(ast, WhileStatement) == 1
+    # `limit` is propagated, but not into `shadow` whose parameter hides it
+    shadow = ast.statements[3]
+    assert isinstance(shadow.body.statements[0].value.left, Identifier)
+
+
+def test_reassigned_and_conditional_lets_are_not_propagated():
+    source = """
+    let a = 1;
+    a = 2;
+    if (a == 2) { let b = 5; }
+    print(a);
+    print(b);
+    """
+    optimizer = Optimizer()
+    ast = optimizer.optimize(parse(source))
+    assert optimizer.stats["propagate"] == 0
+    assert run(ast) == "2\n5\n"
+
+
+def test_dead_branch_with_declaration_is_kept():
+    source = "if (0) { let x = 1; } print(x);"
+    assert run(Optimizer().optimize(parse(source))) == "0\n"
+
+
+def test_division_by_zero_and_calls_are_not_folded_away():
+    optimizer = Optimizer()
+    ast = optimizer.optimize(parse("fn f() { print(1); return 2; } print(f() * 0); print(1 / 0);"))
+    assert count(ast, CallExpression) == 1
+    assert count(ast, BinaryOp) == 2
+
+
+def test_arena_ast():
+    assert run(Optimizer().optimize(parse(PROGRAM, arena=True))) == run(parse(PROGRAM))
+
+
+def test_division_under_multiplication_by_zero_is_kept():
+    source = "let b = 0; b = 0; print((7 / b) * 0);"
+    ast = Optimizer().optimize(parse(source))
+    assert isinstance(ast.statements[2].expression, BinaryOp)
+    with pytest.raises(ZeroDivisionError):
+        run(ast)
+
+
+def test_nested_function_does_not_see_enclosing_constants():
+    # Without closures `k` in inner is the global k, not outer's local
+    source = """
+    fn outer(a) {
+        let k = 5;
+        fn inner(b) { return k + b; }
+        return inner(a);
+    }
+    print(outer(1));
+    """
+    assert run(Optimizer().optimize(parse(source))) == run(parse(source)) == "1\n"
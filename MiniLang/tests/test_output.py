@@ -0,0 +1,101 @@
+import io
+
+import pytest
+
+import minilang
+from minilang.build import run_file
+from minilang.cli import main
+from minilang.vm.output import CallbackSink, ListSink, StreamSink
+
+
+SOURCE = """
+fn sq(x) { return x * x; }
+let i = 0;
+while (i < 5) { print(sq(i)); i = i + 1; }
+"""
+
+EXPECTED = [0, 1, 4, 9, 16]
+
+
+class CountingStream(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        return super().write(text)
+
+
+@pytest.fixture
+def script(tmp_path):
+    path = tmp_path / "squares.ml"
+    path.write_text(SOURCE)
+    return path
+
+
+@pytest.mark.parametrize("engine", ["switch", "dispatch", "packed", "register", "python"])
+def test_engines_write_to_sink(script, engine, capsys):
+    sink = ListSink()
+    run_file(script, engine=engine, use_cache=False, output=sink)
+    assert sink.values == EXPECTED
+    assert sink.text() == "0\n1\n4\n9\n16\n"
+    assert capsys.readouterr().out == ""
+
+
+def test_profiler_and_program_write_to_sink(script):
+    sink = ListSink()
+    run_file(script, use_cache=False, profile=True, output=sink)
+    minilang.compile(SOURCE).run(output=sink)
+    assert sink.values == EXPECTED * 2
+
+
+def test_callback_sink():
+    seen = []
+    minilang.compile(SOURCE).run(output=CallbackSink(lambda value: seen.append(value * 10)))
+    assert seen == [v * 10 for v in EXPECTED]
+
+
+def test_stream_sink_buffers_until_full():
+    stream = CountingStream()
+    sink = StreamSink(stream, buffer_size=6)
+    for value in EXPECTED:
+        sink.write(value)
+    # "0\n1\n4\n" reaches 6 characters; "9\n16\n" is still pending
+    assert stream.getvalue() == "0\n1\n4\n"
+    sink.flush()
+    assert stream.getvalue() == "0\n1\n4\n9\n16\n"
+    assert stream.writes == 2
+
+
+@pytest.mark.parametrize("policy, writes", [("line", 5), ("exit", 1)])
+def test_flush_policies(policy, writes):
+    stream = CountingStream()
+    with StreamSink(stream, flush=policy) as sink:
+        minilang.compile(SOURCE).run(output=sink)
+    assert stream.getvalue() == "0\n1\n4\n9\n16\n"
+    assert stream.writes == writes
+
+
+def test_unknown_flush_policy():
+    with pytest.raises(ValueError):
+        StreamSink(io.StringIO(), flush="never")
+
+
+def test_binary_stream():
+    stream = io.BytesIO()
+    with StreamSink(stream) as sink:
+        minilang.compile(SOURCE).run(output=sink)
+    assert stream.getvalue() == b"0\n1\n4\n9\n16\n"
+
+
+def test_cli_output_file(script, tmp_path, capsys):
+    target = tmp_path / "out.txt"
+    main([str(script), "--no-cache", "--output-file", str(target), "--buffer-size", "4"])
+    assert target.read_text() == "0\n1\n4\n9\n16\n"
+    assert capsys.readouterr().out == ""
+
+
+def test_cli_buffered_stdout(script, capsys):
+    main([str(script), "--no-cache", "--engine", "packed", "--output", "buffered", "--flush", "exit"])
+    assert capsys.readouterr().out == "0\n1\n4\n9\n16\n"
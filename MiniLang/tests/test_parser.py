@@ -0,0 +1,76 @@
+import contextlib
+import io
+
+import pytest
+
+from minilang.lexer.regex_lexer import RegexLexer
+from minilang.parser.parser import Parser
+from minilang.parser.arena import AstArena
+from minilang.parser.ast import BinaryOp, CallExpression, Number
+from minilang.parser.ast_printer import ASTPrinter
+from minilang.compiler.compiler import Compiler
+from minilang.compiler.optimizer import Optimizer
+from minilang.semantic.semantic_analyzer import SemanticAnalyzer
+
+
+SOURCE = """
+fn fact(n) {
+    if (n == 0) { return 1; } else { return n * fact(n - 1); }
+}
+let x = 2 * 3 + 4000000000;
+while (x < 10) { x = x + 1; }
+print(fact(x / 2));
+"""
+
+
+def pipeline(ast):
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        ASTPrinter().print(ast)
+    ast = Optimizer().optimize(ast)
+    SemanticAnalyzer().analyze(ast)
+    bytecode, functions = Compiler().compile(ast)
+    return out.getvalue(), repr(bytecode), functions
+
+
+def test_arena_ast_feeds_every_pass():
+    tree = Parser(RegexLexer(SOURCE)).parse()
+    flat = Parser(RegexLexer(SOURCE), nodes=AstArena()).parse()
+    assert pipeline(flat) == pipeline(tree)
+
+
+def test_arena_from_tree():
+    tree = Parser(RegexLexer(SOURCE)).parse()
+    arena = AstArena.from_tree(tree)
+    assert pipeline(arena.program()) == pipeline(Parser(RegexLexer(SOURCE)).parse())
+
+
+def grouping(code):
+    # The expression in `print(...)`, fully parenthesized
+    def show(node):
+        if isinstance(node, BinaryOp):
+            return f"({show(node.left)} {node.op.type.value} {show(node.right)})"
+        if isinstance(node, CallExpression):
+            return f"{node.name}({', '.join(show(arg) for arg in node.args)})"
+        return str(node.value if isinstance(node, Number) else node.name)
+    return show(Parser(RegexLexer(f"print({code});")).parse().statements[0].expression)
+
+
+@pytest.mark.parametrize("code, expected", [
+    ("1 + 2 * 3", "(1 + (2 * 3))"),
+    ("1 * 2 + 3 * 4", "((1 * 2) + (3 * 4))"),
+    ("a - b - c", "((a - b) - c)"),
+    ("a / b * c", "((a / b) * c)"),
+    ("(a - b) * c", "((a - b) * c)"),
+    ("f(a + 1, b * 2) * 3", "(f((a + 1), (b * 2)) * 3)"),
+    # Comparisons bind like + and -, left to right
+    ("a < b + c", "((a < b) + c)"),
+    ("a + b == c * d", "((a + b) == (c * d))"),
+])
+def test_operator_precedence(code, expected):
+    assert grouping(code) == expected
+
+
+def test_expression_errors():
+    with pytest.raises(Exception, match="Unexpected token"):
+        Parser(RegexLexer("print(1 + );")).parse()
@@ -0,0 +1,62 @@
+import contextlib
+import io
+
+from minilang.compiler.bytecode import OpCode
+from minilang.compiler.peephole import PeepholeOptimizer
+from minilang.vm.dispatch_vm import DispatchVM
+
+
+PROGRAM = """
+fn sum_to(n) {
+    let s = 0;
+    while (n > 0) { s = s + n; n = n - 1; }
+    return s;
+    print(12345);
+}
+
+let i = 0;
+while (i < 6) {
+    if (i == 2) { print(999); } else { print(sum_to(i)); }
+    i = i + 1;
+}
+"""
+
+
+def count_steps(bytecode):
+    vm = DispatchVM(bytecode)
+    ip, steps = 0, 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        while ip < len(vm.code):
+            ip = vm.code[ip]()
+            steps += 1
+    return steps
+
+
+def test_optimized_code_behaves_the_same(compile_bytecode, run_engines):
+    bytecode, functions, _ = compile_bytecode(PROGRAM)
+    optimized = PeepholeOptimizer().optimize(bytecode, functions)
+
+    expected = run_engines(bytecode, functions)[0]
+    assert expected == "0\n1\n999\n6\n10\n15\n"
+    assert run_engines(*optimized) == [expected] * 3
+
+
+def test_superinstructions_and_dead_code(compile_bytecode):
+    bytecode, functions, _ = compile_bytecode(PROGRAM)
+    optimizer = PeepholeOptimizer()
+    optimized, _ = optimizer.optimize(bytecode, functions)
+    opcodes = {instr.opcode for instr in optimized}
+
+    assert OpCode.INC_LOCAL in opcodes
+    assert OpCode.INC_GLOBAL in opcodes
+    assert OpCode.BRANCH_GLOBAL in opcodes
+    assert OpCode.JUMP_IF_FALSE not in opcodes
+    # `print(12345)` after the return and the default `return 0` are gone
+    assert optimizer.stats["unreachable"] > 0
+    assert not any(i.opcode == OpCode.PUSH_CONST and i.operand == 12345 for i in optimized)
+
+
+def test_while_loop_runs_half_the_instructions(compile_bytecode):
+    bytecode, functions, _ = compile_bytecode("let i = 0; while (i < 1000) { print(i); i = i + 1; }")
+    optimized, _ = PeepholeOptimizer().optimize(bytecode, functions)
+    assert count_steps(optimized) * 2 <= count_steps(bytecode)
@@ -0,0 +1,86 @@
+import contextlib
+import io
+import json
+
+from minilang.vm.vm import VirtualMachine
+from minilang.vm.profiler import ProfilingVM, profile
+from minilang import cli
+
+
+PROGRAM = """
+fn fib(n) {
+    if (n < 2) { return n; }
+    return fib(n - 1) + fib(n - 2);
+}
+fn twice(x) { return fib(x) + fib(x); }
+let i = 0;
+while (i < 3) { print(twice(i + 5)); i = i + 1; }
+"""
+
+
+def test_profiled_run_matches_and_counts(compile_bytecode):
+    bytecode, functions, _ = compile_bytecode(PROGRAM)
+
+    plain, profiled = io.StringIO(), io.StringIO()
+    with contextlib.redirect_stdout(plain):
+        VirtualMachine(bytecode).run()
+    with contextlib.redirect_stdout(profiled):
+        result = profile(bytecode, functions)
+    assert profiled.getvalue() == plain.getvalue()
+
+    assert result.instructions == sum(result.opcodes()[op]["count"] for op in result.opcodes())
+    assert result.opcodes()["PRINT"]["count"] == 3
+    assert result.addresses[0] == 1
+
+    fib = result.functions["fib"]
+    twice = result.functions["twice"]
+    main = result.functions["<main>"]
+    # fib(5) + fib(6) + fib(7) each twice, 15 + 25 + 41 activations each
+    assert fib["calls"] == 2 * (15 + 25 + 41)
+    assert twice["calls"] == 3
+    assert twice["inclusive"] >= fib["inclusive"] >= fib["exclusive"] > 0
+    assert twice["exclusive"] <= twice["inclusive"] - fib["inclusive"] + 1e-9
+    assert main["inclusive"] == result.total_seconds
+
+
+def test_unknown_functions_are_named_by_address(compile_bytecode):
+    bytecode, _, _ = compile_bytecode(PROGRAM)
+    with contextlib.redirect_stdout(io.StringIO()):
+        vm = ProfilingVM(bytecode)
+        vm.run()
+    assert set(vm.profile.functions) == {"<main>", "fn@0", f"fn@{bytecode[0].operand}"}
+
+
+def test_cli_profile_json(tmp_path, capsys):
+    source = tmp_path / "prog.ml"
+    source.write_text(PROGRAM)
+    report = tmp_path / "profile.json"
+    # Without inlining, so that `twice` is still called
+    cli.main([
+        str(source), "--no-cache", "--inline-size", "0",
+        "--profile", "--profile-format", "json", "--profile-output", str(report),
+    ])
+
+    assert capsys.readouterr().out == "10\n16\n26\n"
+    data = json.loads(report.read_text())
+    assert data["functions"]["twice"]["calls"] == 3
+    assert data["opcodes"]["CALL"]["count"] > 0
+    assert data["addresses"][0]["count"] >= data["addresses"][-1]["count"]
+
+
+def test_cli_profile_text(tmp_path, capsys):
+    source = tmp_path / "prog.ml"
+    source.write_text(PROGRAM)
+    cli.main([str(source), "--no-cache", "--profile"])
+    captured = capsys.readouterr()
+    assert captured.out == "10\n16\n26\n"
+    assert "fib" in captured.err and "CALL" in captured.err
+
+
+def test_cli_profile_flag_before_the_file(tmp_path, capsys):
+    source = tmp_path / "prog.ml"
+    source.write_text(PROGRAM)
+    cli.main(["--profile", str(source), "--no-cache"])
+    captured = capsys.readouterr()
+    assert captured.out == "10\n16\n26\n"
+    assert "fib" in captured.err
@@ -0,0 +1,72 @@
+import threading
+
+import pytest
+
+import minilang
+
+
+SOURCE = """
+let total = 0;
+fn fib(n) {
+    if (n < 2) { return n; }
+    return fib(n - 1) + fib(n - 2);
+}
+fn add(x) { total = total + x; return total; }
+fn sum(n, acc) {
+    if (n == 0) { return acc; }
+    return sum(n - 1, acc + n);
+}
+total = add(5) + add(6);
+print(total);
+"""
+
+
+@pytest.fixture(scope="module")
+def program():
+    return minilang.compile(SOURCE)
+
+
+def test_run_returns_globals(program, capsys):
+    assert program.run() == {"total": 16}
+    assert program.run() == {"total": 16}
+    assert capsys.readouterr().out == "16\n16\n"
+
+
+def test_call_uses_fresh_state(program):
+    assert program.call("fib", 15) == 610
+    assert program.call("sum", 10000, 0) == 50005000
+    assert program.call("add", 3) == 3
+    assert program.call("add", 3) == 3
+    assert program.call("add", 3, globals={"total": 10}) == 13
+
+
+def test_call_checks_name_and_arity(program):
+    with pytest.raises(Exception, match="Undefined function: nope"):
+        program.call("nope")
+    with pytest.raises(Exception, match="expects 2 arguments, got 1"):
+        program.call("sum", 1)
+    with pytest.raises(Exception, match="Unknown global: missing"):
+        program.run(globals={"missing": 1})
+
+
+def test_program_is_immutable(program):
+    assert program.functions == ("fib", "add", "sum")
+    assert program.globals == ("total",)
+    with pytest.raises(AttributeError):
+        program.functions = ()
+    with pytest.raises(AttributeError):
+        program._code = None
+
+
+def test_shared_between_threads(program):
+    results = []
+
+    def work():
+        results.append([program.call("fib", n) for n in range(15)])
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [[program.call("fib", n) for n in range(15)]] * 4
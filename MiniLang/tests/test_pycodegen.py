@@ -0,0 +1,92 @@
+import contextlib
+import io
+
+import pytest
+
+from benchmarks.workloads import WORKLOADS
+from minilang.lexer.lexer import Lexer
+from minilang.parser.parser import Parser
+from minilang.parser.ast import Program
+from minilang.compiler.compiler import Compiler
+from minilang.compiler import pycodegen
+from minilang.vm.vm import VirtualMachine
+from minilang import build, cli
+
+
+def output(run):
+    buffer = io.StringIO()
+    with contextlib.redirect_stdout(buffer):
+        run()
+    return buffer.getvalue()
+
+
+def vm_output(code):
+    bytecode, _ = Compiler().compile(Parser(Lexer(code)).parse())
+    return output(VirtualMachine(bytecode).run)
+
+
+def native_output(code):
+    native = pycodegen.compile_program(Parser(Lexer(code)).parse())
+    return output(lambda: pycodegen.execute(native))
+
+
+@pytest.mark.parametrize("name", sorted(WORKLOADS))
+def test_native_code_matches_vm(name):
+    assert native_output(WORKLOADS[name]) == vm_output(WORKLOADS[name])
+
+
+def test_vm_semantics():
+    # Floor division, 0/1 comparisons, globals written from functions,
+    # unassigned locals reading 0 and names that are Python keywords
+    code = """
+    let g = 3;
+    let class = 0 - 7;
+    fn bump(k) { g = g + k; return g; }
+    fn flag(x) {
+        if (x > 100) { let unset = 1; }
+        return unset + (x < 5) + (x == 4) * 10;
+    }
+    print(class / 2);
+    print(bump(4));
+    print(g);
+    print(flag(4));
+    print(flag(9));
+    """
+    assert native_output(code) == vm_output(code) == "-4\n7\n7\n11\n0\n"
+
+
+def test_self_tail_calls_run_as_loops():
+    code = """
+    fn sum(n, acc) {
+        if (n == 0) { return acc; }
+        let scratch = n;
+        return sum(n - 1, acc + scratch);
+    }
+    print(sum(300000, 0));
+    """
+    assert native_output(code) == f"{300000 * 300001 // 2}\n"
+
+
+def test_unknown_nodes_are_unsupported():
+    with pytest.raises(pycodegen.Unsupported):
+        pycodegen.compile_program(Program([object()]))
+
+
+def test_run_python_falls_back_to_vm(monkeypatch, capsys):
+    code = "fn sq(x) { return x * x; } print(sq(12));"
+    assert build.run_python(code) is True
+    assert capsys.readouterr().out == "144\n"
+
+    def unsupported(program, filename="<minilang>"):
+        raise pycodegen.Unsupported("not translatable")
+
+    monkeypatch.setattr(pycodegen, "compile_program", unsupported)
+    assert build.run_python(code) is False
+    assert capsys.readouterr().out == "144\n"
+
+
+def test_cli_python_engine(tmp_path, capsys):
+    path = tmp_path / "prog.ml"
+    path.write_text("let i = 0; while (i < 3) { print(i * 7 / 2); i = i + 1; }")
+    cli.main([str(path), "--engine", "python"])
+    assert capsys.readouterr().out == "0\n3\n7\n"
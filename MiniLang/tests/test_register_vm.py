@@ -0,0 +1,88 @@
+import contextlib
+import io
+
+import pytest
+
+from benchmarks.workloads import WORKLOADS
+from minilang.lexer.lexer import Lexer
+from minilang.parser.parser import Parser
+from minilang.compiler.compiler import Compiler
+from minilang.compiler.register import RegisterCompiler, RegOp
+from minilang.vm.vm import VirtualMachine
+from minilang.vm.register_vm import RegisterVM
+from minilang.cli import main
+
+
+def output(run):
+    buffer = io.StringIO()
+    with contextlib.redirect_stdout(buffer):
+        run()
+    return buffer.getvalue()
+
+
+def register_program(code):
+    return RegisterCompiler().compile(Parser(Lexer(code)).parse())
+
+
+@pytest.mark.parametrize("name", sorted(WORKLOADS))
+def test_register_vm_matches_stack_vm(name):
+    code = WORKLOADS[name]
+    bytecode, _ = Compiler().compile(Parser(Lexer(code)).parse())
+    expected = output(VirtualMachine(bytecode).run)
+    assert output(RegisterVM(register_program(code)).run) == expected
+
+
+def test_three_address_code():
+    program = register_program("""
+    fn count(n) {
+        let i = 0;
+        while (i < n) { i = i + 1; }
+        return i;
+    }
+    print(count(5));
+    """)
+    body = program.code[program.functions[0][0]:]
+    # i = i + 1 is one instruction and the loop test branches on registers
+    assert repr(body[1]) == "JUMP_NOT_LT r1, r0, @" + str(body[1].c)
+    assert repr(body[2]) == "ADDK r1, r1, #1"
+
+
+def test_globals_only_for_names_functions_see():
+    program = register_program("""
+    let g = 3;
+    let local = 4;
+    fn bump(k) { g = g + k; return g; }
+    print(bump(local));
+    print(g);
+    """)
+    assert program.names["globals"] == ["g"]
+    assert output(RegisterVM(program).run) == "7\n7\n"
+
+
+def test_tail_calls_reuse_the_frame():
+    program = register_program("""
+    fn sum(n, acc) {
+        if (n == 0) { return acc; }
+        return sum(n - 1, acc + n);
+    }
+    print(10 + sum(30000, 0));
+    """)
+    assert RegOp.TAIL_CALL in [instr.opcode for instr in program.code]
+    vm = RegisterVM(program)
+    assert output(vm.run) == f"{10 + 30000 * 30001 // 2}\n"
+    assert vm.call_stack == []
+
+
+def test_cli_register_engine(tmp_path, capsys):
+    path = tmp_path / "fact.ml"
+    path.write_text("""
+    fn fact(n) { if (n == 0) { return 1; } return n * fact(n - 1); }
+    print(fact(10) / 7);
+    """)
+    main([str(path), "--engine", "register"])
+    assert capsys.readouterr().out == f"{3628800 // 7}\n"
+
+
+def test_deep_expressions_compile_without_recursion():
+    code = "fn f(a) { return " + " + ".join(["a"] * 10000) + "; } print(f(1));"
+    assert output(RegisterVM(register_program(code)).run) == "10000\n"
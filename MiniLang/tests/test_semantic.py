@@ -0,0 +1,66 @@
+import pytest
+
+from minilang.compiler.compiler import Compiler
+from minilang.lexer.regex_lexer import RegexLexer
+from minilang.parser.parser import Parser
+from minilang.semantic.semantic_analyzer import SemanticAnalyzer
+
+
+SOURCE = """
+let x = 1;
+let y = 2;
+fn f(a, x) {
+    let t = a + x + y;
+    if (t > 3) { let u = t; y = u; }
+    fn g(b) { return b + t; }
+    return g(t);
+}
+print(f(x, y));
+"""
+
+
+def analyze(code):
+    ast = Parser(RegexLexer(code)).parse()
+    analyzer = SemanticAnalyzer()
+    analyzer.analyze(ast)
+    return analyzer, ast
+
+
+def records(scope):
+    return {name: (b.depth, b.slot) for name, b in scope.resolved.items()}
+
+
+def test_every_use_resolves_to_depth_and_slot():
+    analyzer, _ = analyze(SOURCE)
+    symbols = analyzer.symbols
+    assert records(symbols.globals) == {"x": (0, 0), "y": (0, 1)}
+    # Params shadow the global x; lets in nested blocks share the frame
+    assert records(symbols.functions["f"]) == {
+        "a": (1, 0), "x": (1, 1), "t": (1, 2), "y": (0, 1), "u": (1, 3),
+    }
+    # No closures: f's `t` is read in g as the global of that name
+    assert records(symbols.functions["g"]) == {"b": (2, 0), "t": (0, 2)}
+    assert symbols.global_slots() == {"x": 0, "y": 1, "t": 2}
+
+
+def test_compiler_uses_the_records():
+    analyzer, ast = analyze(SOURCE)
+    resolved = Compiler(symbols=analyzer.symbols)
+    bytecode, functions = resolved.compile(ast)
+
+    unresolved = Compiler()
+    expected, expected_functions = unresolved.compile(Parser(RegexLexer(SOURCE)).parse())
+    assert [repr(i) for i in bytecode] == [repr(i) for i in expected]
+    assert functions == expected_functions
+    assert resolved.globals == unresolved.globals
+
+
+@pytest.mark.parametrize("code, message", [
+    ("let x = 1; let x = 2;", "Variable 'x' already declared"),
+    ("let x = 1; fn f() { let x = 2; return x; }", "Variable 'x' already declared"),
+    ("fn f() { let t = 1; return t; } print(t);", "Variable 't' used before declaration"),
+    ("y = 1;", "Variable 'y' used before declaration"),
+])
+def test_errors(code, message):
+    with pytest.raises(Exception, match=message):
+        analyze(code)
@@ -0,0 +1,94 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from minilang.vm.vector import VectorEvaluator, evaluate
+
+
+SOURCE = """
+let bonus = 7;
+fn clamp(x) { if (x < 0) { return 0; } if (x > 1000) { return 1000; } return x; }
+fn fact(n) { if (n == 0) { return 1; } return n * fact(n - 1); }
+fn collatz(n) {
+    let steps = 0;
+    while (n > 1) {
+        if ((n - n / 2 * 2) == 0) { n = n / 2; } else { n = 3 * n + 1; }
+        steps = steps + 1;
+    }
+    return steps;
+}
+fn score(a, b) {
+    let s = a * 3 - b / 2 + bonus;
+    if (a > b) { s = s + clamp(a - b); } else { s = s - clamp(b - a); }
+    return s + fact(a - a / 8 * 8);
+}
+fn huge(n) { return n * 1000000000000 * 1000000000000; }
+fn divide(a, b) { return a / b; }
+fn noisy(x) { print(x); return x + 1; }
+"""
+
+
+@pytest.fixture(scope="module")
+def evaluator():
+    return VectorEvaluator.from_source(SOURCE)
+
+
+def rows(evaluator, name, *columns):
+    # Reference: one scalar VM call per row
+    addr = evaluator.functions[name][0]
+    return [
+        evaluator.call_scalar(addr, [int(column[i]) for column in columns])
+        for i in range(len(columns[0]))
+    ]
+
+
+def test_branches_calls_and_recursion_match_the_vm(evaluator):
+    rng = np.random.default_rng(7)
+    a = rng.integers(-3000, 3000, 5000)
+    b = rng.integers(-3000, 3000, 5000)
+    result = evaluator.evaluate("score", a, b)
+    assert result.dtype == np.int64
+    assert result.tolist() == rows(evaluator, "score", a, b)
+
+
+def test_data_dependent_loops(evaluator):
+    n = np.arange(1, 600)
+    assert evaluator.evaluate("collatz", n).tolist() == rows(evaluator, "collatz", n)
+
+
+def test_unbounded_results_fall_back_per_lane(evaluator):
+    n = np.array([0, 1, -2, 3])
+    result = evaluator.evaluate("huge", n)
+    assert result.tolist() == [x * 10 ** 24 for x in n.tolist()]
+
+
+def test_division_by_zero_raises(evaluator):
+    with pytest.raises(ZeroDivisionError):
+        evaluator.evaluate("divide", np.arange(50), np.arange(50) - 25)
+    assert evaluator.evaluate("divide", np.array([7, -7]), np.array([2, 2])).tolist() == [3, -4]
+
+
+def test_side_effects_run_row_by_row(evaluator, capsys):
+    assert evaluator.evaluate("noisy", np.array([5, 6])).tolist() == [6, 7]
+    assert capsys.readouterr().out == "5\n6\n"
+
+
+def test_evaluate_checks_arguments():
+    with pytest.raises(Exception, match="expects 1 arguments"):
+        evaluate(SOURCE, "clamp", np.arange(3), np.arange(3))
+    with pytest.raises(TypeError):
+        evaluate(SOURCE, "clamp", np.linspace(0, 1, 3))
+
+
+def test_global_in_a_branch_condition():
+    # The peephole pass turns `if (lim == 4)` into BRANCH_GLOBAL
+    source = """
+    let lim = 3;
+    lim = lim + 1;
+    fn f(x) { let s = x; if (lim == 4) { s = s + 1; } return s; }
+    """
+    evaluator = VectorEvaluator.from_source(source)
+    opcodes = {instr.opcode.name for instr in evaluator.code}
+    assert "BRANCH_GLOBAL" in opcodes
+    n = np.arange(40)
+    assert evaluator.evaluate("f", n).tolist() == (n + 1).tolist()
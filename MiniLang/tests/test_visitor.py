@@ -0,0 +1,80 @@
+import contextlib
+import io
+import sys
+
+import pytest
+
+from minilang.build import compile_source
+from minilang.lexer.regex_lexer import RegexLexer
+from minilang.parser.arena import AstArena
+from minilang.parser.ast import BinaryOp, Identifier, Number
+from minilang.parser.ast_printer import ASTPrinter
+from minilang.parser.parser import Parser
+from minilang.parser.visitor import Visitor
+from minilang.vm.output import ListSink
+from minilang.vm.packed_vm import PackedVM
+
+
+def chain(terms):
+    # One expression nested `terms` deep: far past the recursion limit
+    return "let x = 1; print(" + " + ".join(["x"] * terms) + ");"
+
+
+class Sum(Visitor):
+    def visit_Number(self, node):
+        return node.value
+
+    def visit_BinaryOp(self, node):
+        left = yield node.left
+        right = yield node.right
+        return left + right
+
+
+class Names(Visitor):
+    def __init__(self):
+        self.names = []
+
+    def visit_BinaryOp(self, node):
+        return [node.left, node.right]
+
+    def visit_Identifier(self, node):
+        self.names.append(node.name)
+
+
+def test_methods_are_dispatched_by_type():
+    assert set(Sum.dispatch) == {Number, BinaryOp}
+    tree = BinaryOp(BinaryOp(Number(1), None, Number(2)), None, Number(3))
+    assert Sum().visit(tree) == 6
+
+    names = Names()
+    assert names.visit(BinaryOp(Identifier("a"), None, BinaryOp(Identifier("b"), None, Identifier("c")))) is None
+    assert names.names == ["a", "b", "c"]
+
+    with pytest.raises(Exception, match="Unknown AST node"):
+        Sum().visit(Identifier("a"))
+
+
+def test_subclasses_of_node_types_use_their_base_method():
+    arena = AstArena()
+    tree = Parser(RegexLexer("print(1 + 2 + 4);"), nodes=arena).parse()
+    expression = tree.statements[0].expression
+    assert type(expression) is not BinaryOp
+    assert Sum().visit(expression) == 7
+
+
+@pytest.mark.parametrize("ast", ["tree", "arena"])
+def test_deep_expression_compiles(ast):
+    terms = 20_000
+    sink = ListSink()
+    PackedVM(compile_source(chain(terms), ast=ast), output=sink).run()
+    assert sink.values == [terms]
+
+
+def test_deep_expression_prints():
+    terms = sys.getrecursionlimit() + 100
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        ASTPrinter().print(Parser(RegexLexer(chain(terms))).parse())
+    lines = out.getvalue().splitlines()
+    assert len(lines) == 2 * terms + 3
+    assert max(len(line) - len(line.lstrip()) for line in lines) == 2 * (terms + 1)
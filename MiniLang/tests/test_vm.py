@@ -0,0 +1,101 @@
+import pytest
+
+from minilang.compiler.bytecode import OpCode
+from minilang.compiler.packed import pack
+from minilang.vm.vm import VirtualMachine
+from minilang.vm.dispatch_vm import DispatchVM
+from minilang.vm.packed_vm import PackedVM
+
+
+ENGINES = {
+    "switch": lambda bytecode, functions: VirtualMachine(bytecode),
+    "dispatch": lambda bytecode, functions: DispatchVM(bytecode),
+    "packed": lambda bytecode, functions: PackedVM(pack(bytecode, functions)),
+}
+
+
+@pytest.fixture(params=sorted(ENGINES))
+def run(request, compile_bytecode):
+    def run_code(code):
+        bytecode, functions, _ = compile_bytecode(code)
+        ENGINES[request.param](bytecode, functions).run()
+    return run_code
+
+
+def test_recursion_keeps_caller_locals(run, capsys):
+    run("""
+    fn fib(n) {
+        if (n < 2) { return n; }
+        let a = fib(n - 1);
+        let b = fib(n - 2);
+        return a + b;
+    }
+    print(fib(10));
+    """)
+    assert capsys.readouterr().out == "55\n"
+
+
+def test_functions_write_globals(run, capsys):
+    run("""
+    let g = 3;
+    fn bump(k) { g = g + k; return g; }
+    print(bump(4));
+    print(g);
+    """)
+    assert capsys.readouterr().out == "7\n7\n"
+
+
+def test_deep_recursion(run, capsys):
+    run("""
+    fn down(n) {
+        if (n == 0) { return 0; }
+        return down(n - 1) + 1;
+    }
+    print(down(20000));
+    """)
+    assert capsys.readouterr().out == "20000\n"
+
+
+def test_tail_calls(run, capsys):
+    # The 10 pushed before the call must survive the reused frames
+    run("""
+    fn double(x) { return x * 2; }
+    fn sum(n, acc) {
+        if (n == 0) { return double(acc); }
+        let next = acc + n;
+        return sum(n - 1, next);
+    }
+    print(10 + sum(30000, 0));
+    """)
+    assert capsys.readouterr().out == f"{10 + 30000 * 30001}\n"
+
+
+def test_tail_calls_run_in_constant_frames(compile_bytecode):
+    source = """
+    fn sum(n, acc) {
+        if (n == 0) { return acc; }
+        return sum(n - 1, acc + n);
+    }
+    print(sum(5000, 0));
+    """
+    bytecode, _, _ = compile_bytecode(source)
+    opcodes = [instr.opcode for instr in bytecode]
+    assert OpCode.TAIL_CALL in opcodes and opcodes.count(OpCode.CALL) == 1
+
+    vm = DispatchVM(bytecode)
+    ip, depth = 0, 0
+    while ip < len(vm.code):
+        ip = vm.code[ip]()
+        depth = max(depth, len(vm.call_stack))
+    assert depth == 1
+    assert vm.stack == []
+
+
+def test_packed_code_round_trips_to_instructions(compile_bytecode):
+    bytecode, functions, _ = compile_bytecode("""
+    fn add(a, b) { return a + b; }
+    let x = add(5, 7);
+    print(x);
+    """)
+    packed = pack(bytecode, functions)
+    assert repr(packed.instructions()) == repr(bytecode)